@@ -0,0 +1,6 @@
+"""Benchmarks for osuapi.
+
+Run with ``python -m bench``. Connector benchmarks run against
+:class:`bench.server.FakeOsuServer`, a local stand-in for the osu! api
+serving fixture payloads, so no api key or network is needed.
+"""
@@ -0,0 +1,227 @@
+"""Run the benchmarks.
+
+.. code:: sh
+
+    python -m bench                       # everything
+    python -m bench parse                 # model parsing only
+    python -m bench ingest --ingest-rows 200000
+    python -m bench connectors --latency 0.02 --error-rate 0.01 --concurrency 32
+    python -m bench imports               # import time of osuapi's modules
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+import osuapi
+from osuapi import endpoints
+from osuapi.ingest import ingest, ingest_columns
+from osuapi.model import Beatmap, BeatmapScore, SoloScore, User, Match, JsonList
+
+from . import fixtures
+from .server import FakeOsuServer, ENDPOINTS
+
+CALLS = {
+    endpoints.USER: lambda api: api.get_user(2),
+    endpoints.USER_BEST: lambda api: api.get_user_best(2, limit=100),
+    endpoints.USER_RECENT: lambda api: api.get_user_recent(2),
+    endpoints.SCORES: lambda api: api.get_scores(75, limit=100),
+    endpoints.BEATMAPS: lambda api: api.get_beatmaps(limit=500),
+    endpoints.MATCH: lambda api: api.get_match(1),
+}
+
+# Modules timed by the imports suite, each in a fresh interpreter.
+IMPORTS = ["osuapi", "osuapi.metrics", "osuapi.cache", "osuapi.connectors", "osuapi.difficulty"]
+
+PARSERS = [
+    ("Beatmap", endpoints.BEATMAPS, 500, JsonList(Beatmap)),
+    ("BeatmapScore", endpoints.SCORES, 100, JsonList(BeatmapScore)),
+    ("SoloScore", endpoints.USER_BEST, 100, JsonList(SoloScore)),
+    ("User", endpoints.USER, 1, JsonList(User)),
+    ("Match", endpoints.MATCH, None, Match),
+]
+
+
+class RebasedConnector:
+    """Wraps a connector, sending requests to another api base url."""
+
+    def __init__(self, connector, base):
+        self.connector = connector
+        self.base = base
+
+    def close(self):
+        self.connector.close()
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return self.connector.process_request(
+            self.base + endpoint[len(endpoints.API_BASE):], data, type_, retries)
+
+
+def percentile(timings, q):
+    """q-th quantile of a sorted list."""
+    return timings[min(len(timings) - 1, int(q * len(timings)))]
+
+
+def report(name, timings, wall):
+    timings.sort()
+    print("{:<24} {:>8} {:>10.1f} {:>10.2f} {:>10.2f}".format(
+        name, len(timings), len(timings) / wall,
+        percentile(timings, 0.5) * 1000, percentile(timings, 0.99) * 1000))
+
+
+def bench_req(server, endpoint, requests, concurrency):
+    api = osuapi.OsuApi("key", connector=RebasedConnector(osuapi.ReqConnector(), server.url))
+    call = CALLS[endpoint]
+
+    def timed(_):
+        start = time.perf_counter()
+        call(api)
+        return time.perf_counter() - start
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        timings = list(pool.map(timed, range(requests)))
+        wall = time.perf_counter() - start
+    api.close()
+    return timings, wall
+
+
+def bench_ah(server, endpoint, requests, concurrency):
+    async def run():
+        api = osuapi.OsuApi("key", connector=RebasedConnector(osuapi.AHConnector(), server.url))
+        call = CALLS[endpoint]
+        sem = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with sem:
+                start = time.perf_counter()
+                await call(api)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*[timed() for _ in range(requests)])
+        wall = time.perf_counter() - start
+        await api.connector.connector.sess.close()
+        return list(timings), wall
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+def bench_connectors(args):
+    print("{:<24} {:>8} {:>10} {:>10} {:>10}".format("connector/endpoint", "requests", "req/s", "p50 ms", "p99 ms"))
+    benches = {"req": bench_req, "ah": bench_ah}
+    with FakeOsuServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as server:
+        for name in args.connector:
+            for endpoint in ENDPOINTS:
+                try:
+                    timings, wall = benches[name](server, endpoint, args.requests, args.concurrency)
+                except NotImplementedError as e:
+                    print("{}: skipped ({})".format(name, e))
+                    break
+                report("{}/{}".format(name, endpoint.rsplit("/", 1)[-1]), timings, wall)
+
+
+def import_times(module):
+    """Cumulative microseconds spent importing each module loaded by importing module, from ``-X importtime``."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                          stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def bench_imports(args):
+    print("{:<24} {:>10} {:>10}  {}".format("import", "ms", "modules", "slowest dependencies (ms)"))
+    # loaded by the interpreter before module
+    startup = import_times("sys")
+    for module in IMPORTS:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        # fastest of the runs for each module, like timeit
+        times = {name: min(run.get(name, 0) for run in runs) for name in runs[0] if name not in startup}
+        slowest = sorted((name for name in times if name != module and "." not in name),
+                         key=times.get, reverse=True)[:4]
+        print("{:<24} {:>10.1f} {:>10}  {}".format(
+            module, times.get(module, 0) / 1000, len(times),
+            ", ".join("{} {:.1f}".format(name, times[name] / 1000) for name in slowest)))
+
+
+def bench_parse(args):
+    print("{:<24} {:>8} {:>12} {:>12}".format("model", "rows", "ms/response", "us/row"))
+    for name, endpoint, limit, converter in PARSERS:
+        data = json.loads(fixtures.payload(endpoint, limit).decode("utf-8"))
+        rows = len(data) if isinstance(data, list) else 1
+        number = max(1, args.parse_rows // rows)
+        best = min(timeit.repeat(lambda: converter(data), number=number, repeat=args.repeat)) / number
+        print("{:<24} {:>8} {:>12.3f} {:>12.2f}".format(name, rows, best * 1000, best / rows * 1e6))
+
+
+def bench_ingest(args):
+    # one saved get_user_best response per line
+    responses = -(-args.ingest_rows // 100)
+    dump = b"\n".join(fixtures.payload(endpoints.USER_BEST, 100, seed) for seed in range(responses))
+    rows = responses * 100
+    print("{:<24} {:>8} {:>10} {:>10}".format("ingest", "workers", "rows/s", "speedup"))
+
+    start = time.perf_counter()
+    for line in io.BytesIO(dump):
+        JsonList(SoloScore)(json.loads(line))
+    baseline = time.perf_counter() - start
+    print("{:<24} {:>8} {:>10.0f} {:>10}".format("JsonList (no encoding)", 1, rows / baseline, "1.00"))
+
+    workers = 1
+    while True:
+        for name, run in (("binary", ingest), ("columns", ingest_columns)):
+            start = time.perf_counter()
+            result = run(io.BytesIO(dump), SoloScore, workers=workers)
+            if name == "binary":
+                for _ in result:
+                    pass
+            wall = time.perf_counter() - start
+            print("{:<24} {:>8} {:>10.0f} {:>10.2f}".format(name, workers, rows / wall, baseline / wall))
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(workers * 2, os.cpu_count())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.split("\n")[0])
+    parser.add_argument("suite", nargs="?", choices=["all", "parse", "ingest", "connectors", "imports"], default="all")
+    parser.add_argument("--connector", action="append", choices=["req", "ah"],
+                        help="Connectors to benchmark (default: both)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0, help="Server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="Random extra server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with 504")
+    parser.add_argument("--parse-rows", type=int, default=5000, help="Rows parsed per timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ingest-rows", type=int, default=100000, help="Rows in the ingestion dump")
+    args = parser.parse_args(argv)
+    args.connector = args.connector or ["req", "ah"]
+
+    if args.suite in ("all", "parse"):
+        bench_parse(args)
+    if args.suite in ("all", "ingest"):
+        bench_ingest(args)
+    if args.suite in ("all", "connectors"):
+        bench_connectors(args)
+    if args.suite in ("all", "imports"):
+        bench_imports(args)
+
+
+if __name__ == "__main__":
+    main()
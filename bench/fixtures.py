@@ -0,0 +1,227 @@
+"""Fixture payloads shaped like real osu! api responses.
+
+Field order and value types (everything is a string, some fields are null)
+follow responses recorded from the live api. Values are generated from a
+seeded PRNG so payloads are reproducible and any size can be produced.
+"""
+import json
+import random
+
+from osuapi import endpoints
+
+ARTISTS = ["xi", "DragonForce", "Camellia", "nano", "Halozy", "LeaF", "t+pazolite", "Various Artists"]
+CREATORS = ["Sotarks", "Monstrata", "Nevo", "pishifat", "Mismagius", "Shiirn"]
+COUNTRIES = ["US", "JP", "KR", "DE", "PL", "FR", "RU", "GB"]
+RANKS = ["XH", "X", "SH", "S", "A", "B", "C", "D"]
+MODS = [0, 8, 16, 24, 64, 72, 576, 1024]
+
+
+def _date(rng):
+    return "20{:02d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
+        rng.randint(8, 20), rng.randint(1, 12), rng.randint(1, 28),
+        rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))
+
+
+def beatmap(rng, beatmap_id):
+    mode = rng.choice("0000123")
+    return {
+        "beatmapset_id": str(beatmap_id // 4),
+        "beatmap_id": str(beatmap_id),
+        "approved": str(rng.choice([-2, -1, 0, 1, 1, 1, 2, 3, 4])),
+        "total_length": str(rng.randint(30, 600)),
+        "hit_length": str(rng.randint(25, 550)),
+        "version": rng.choice(["Easy", "Normal", "Hard", "Insane", "Expert", "Extra"]),
+        "file_md5": "{:032x}".format(rng.getrandbits(128)),
+        "diff_size": str(rng.randint(2, 7)),
+        "diff_overall": str(rng.randint(3, 10)),
+        "diff_approach": str(rng.randint(4, 10)),
+        "diff_drain": str(rng.randint(3, 8)),
+        "mode": mode,
+        "count_normal": str(rng.randint(50, 2000)),
+        "count_slider": str(rng.randint(10, 800)),
+        "count_spinner": str(rng.randint(0, 5)),
+        "submit_date": _date(rng),
+        "approved_date": _date(rng) if rng.random() < 0.7 else None,
+        "last_update": _date(rng),
+        "artist": rng.choice(ARTISTS),
+        "artist_unicode": rng.choice(ARTISTS),
+        "title": "Song {}".format(beatmap_id // 4),
+        "title_unicode": "Song {}".format(beatmap_id // 4),
+        "creator": rng.choice(CREATORS),
+        "creator_id": str(rng.randint(1, 20000000)),
+        "bpm": str(rng.randint(60, 280)),
+        "source": rng.choice(["", "Touhou", "Cytus", "Deemo"]),
+        "tags": " ".join(rng.sample(["jump", "stream", "tech", "farm", "anime", "vocaloid", "remix"], 3)),
+        "genre_id": str(rng.choice([0, 1, 2, 3, 4, 5, 6, 7, 9, 10])),
+        "language_id": str(rng.randint(0, 14)),
+        "favourite_count": str(rng.randint(0, 10000)),
+        "rating": "{:.5f}".format(rng.uniform(5, 10)),
+        "storyboard": rng.choice("01"),
+        "video": rng.choice("01"),
+        "download_unavailable": "0",
+        "audio_unavailable": "0",
+        "playcount": str(rng.randint(0, 5000000)),
+        "passcount": str(rng.randint(0, 500000)),
+        "packs": rng.choice([None, "S123", "S123,T45"]),
+        "max_combo": str(rng.randint(100, 3000)),
+        "diff_aim": "{:.5f}".format(rng.uniform(1, 4)) if mode == "0" else None,
+        "diff_speed": "{:.5f}".format(rng.uniform(1, 4)) if mode == "0" else None,
+        "difficultyrating": "{:.5f}".format(rng.uniform(1, 8)),
+    }
+
+
+def _score_counts(rng):
+    return {
+        "score": str(rng.randint(10000, 100000000)),
+        "maxcombo": str(rng.randint(10, 3000)),
+        "count50": str(rng.randint(0, 20)),
+        "count100": str(rng.randint(0, 100)),
+        "count300": str(rng.randint(100, 2000)),
+        "countmiss": str(rng.randint(0, 20)),
+        "countkatu": str(rng.randint(0, 50)),
+        "countgeki": str(rng.randint(0, 300)),
+        "perfect": rng.choice("01"),
+        "enabled_mods": str(rng.choice(MODS)),
+    }
+
+
+def beatmap_score(rng, score_id):
+    row = {"score_id": str(score_id)}
+    row.update(_score_counts(rng))
+    user_id = rng.randint(1, 20000000)
+    row.update({
+        "username": "player{}".format(user_id),
+        "user_id": str(user_id),
+        "date": _date(rng),
+        "rank": rng.choice(RANKS),
+        "pp": "{:.4f}".format(rng.uniform(10, 800)) if rng.random() < 0.9 else None,
+        "replay_available": rng.choice("01"),
+    })
+    return row
+
+
+def solo_score(rng, score_id):
+    row = {"beatmap_id": str(rng.randint(1, 4000000)), "score_id": str(score_id)}
+    row.update(_score_counts(rng))
+    row.update({
+        "user_id": str(rng.randint(1, 20000000)),
+        "date": _date(rng),
+        "rank": rng.choice(RANKS),
+        "pp": "{:.4f}".format(rng.uniform(10, 800)),
+        "replay_available": rng.choice("01"),
+    })
+    return row
+
+
+def recent_score(rng, _):
+    row = {"beatmap_id": str(rng.randint(1, 4000000))}
+    row.update(_score_counts(rng))
+    row.update({
+        "user_id": str(rng.randint(1, 20000000)),
+        "date": _date(rng),
+        "rank": rng.choice(RANKS + ["F"]),
+    })
+    return row
+
+
+def user_event(rng):
+    beatmap_id = rng.randint(1, 4000000)
+    return {
+        "display_html": "<img src='/images/A_small.png'/> <b><a href='/u/2'>player</a></b> achieved "
+                        "rank #{} on <a href='/b/{}?m=0'>Some Artist - Some Song [Insane]</a> (osu!)".format(
+                            rng.randint(1, 1000), beatmap_id),
+        "beatmap_id": str(beatmap_id),
+        "beatmapset_id": str(beatmap_id // 4),
+        "date": _date(rng),
+        "epicfactor": str(rng.randint(1, 32)),
+    }
+
+
+def user(rng, user_id, events=10):
+    return {
+        "user_id": str(user_id),
+        "username": "player{}".format(user_id),
+        "join_date": _date(rng),
+        "count300": str(rng.randint(0, 50000000)),
+        "count100": str(rng.randint(0, 5000000)),
+        "count50": str(rng.randint(0, 500000)),
+        "playcount": str(rng.randint(0, 200000)),
+        "ranked_score": str(rng.randint(0, 50000000000)),
+        "total_score": str(rng.randint(0, 200000000000)),
+        "pp_rank": str(rng.randint(1, 2000000)),
+        "level": "{:.5f}".format(rng.uniform(1, 110)),
+        "pp_raw": "{:.3f}".format(rng.uniform(0, 20000)),
+        "accuracy": "{:.12f}".format(rng.uniform(80, 100)),
+        "count_rank_ss": str(rng.randint(0, 1000)),
+        "count_rank_ssh": str(rng.randint(0, 1000)),
+        "count_rank_s": str(rng.randint(0, 5000)),
+        "count_rank_sh": str(rng.randint(0, 5000)),
+        "count_rank_a": str(rng.randint(0, 5000)),
+        "country": rng.choice(COUNTRIES),
+        "total_seconds_played": str(rng.randint(0, 10000000)),
+        "pp_country_rank": str(rng.randint(1, 100000)),
+        "events": [user_event(rng) for _ in range(events)],
+    }
+
+
+def match(rng, match_id, games=8, players=8):
+    def team_score(slot):
+        row = {"slot": str(slot), "team": str(1 + slot % 2), "user_id": str(rng.randint(1, 20000000))}
+        row.update(_score_counts(rng))
+        row["rank"] = "0"
+        row["pass"] = rng.choice("01")
+        return row
+
+    return {
+        "match": {
+            "match_id": str(match_id),
+            "name": "OWC: (Team {}) vs (Team {})".format(rng.randint(1, 64), rng.randint(1, 64)),
+            "start_time": _date(rng),
+            "end_time": _date(rng),
+        },
+        "games": [{
+            "game_id": str(rng.randint(1, 500000000)),
+            "start_time": _date(rng),
+            "end_time": _date(rng),
+            "beatmap_id": str(rng.randint(1, 4000000)),
+            "play_mode": "0",
+            "match_type": "0",
+            "scoring_type": str(rng.randint(0, 3)),
+            "team_type": str(rng.randint(0, 3)),
+            "mods": str(rng.choice(MODS)),
+            "scores": [team_score(slot) for slot in range(players)],
+        } for _ in range(games)],
+    }
+
+
+_ROWS = {
+    endpoints.BEATMAPS: (beatmap, 500),
+    endpoints.SCORES: (beatmap_score, 50),
+    endpoints.USER_BEST: (solo_score, 50),
+    endpoints.USER_RECENT: (recent_score, 10),
+    endpoints.USER: (user, 1),
+}
+
+
+def response(endpoint, limit=None, seed=0):
+    """Return the decoded json response for an endpoint.
+
+    Parameters
+    ----------
+    endpoint : str
+        One of the constants in :mod:`osuapi.endpoints`.
+    limit : int
+        Number of rows to return. Defaults to the api's default limit.
+    seed : int
+        Seed for the generated values.
+    """
+    rng = random.Random(seed)
+    if endpoint == endpoints.MATCH:
+        return match(rng, seed + 1)
+    make_row, default_limit = _ROWS[endpoint]
+    return [make_row(rng, seed * 1000 + i + 1) for i in range(limit or default_limit)]
+
+
+def payload(endpoint, limit=None, seed=0):
+    """Return :func:`response` encoded as the api would send it."""
+    return json.dumps(response(endpoint, limit, seed)).encode("utf-8")
@@ -0,0 +1,114 @@
+"""Local stand-in for the osu! api."""
+import http.server
+import random
+import socketserver
+import threading
+import time
+import urllib.parse
+
+from osuapi import endpoints
+
+from . import fixtures
+
+ENDPOINTS = [endpoints.USER, endpoints.USER_BEST, endpoints.USER_RECENT,
+             endpoints.SCORES, endpoints.BEATMAPS, endpoints.MATCH]
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        url = urllib.parse.urlsplit(self.path)
+        endpoint = server.routes.get(url.path)
+        if endpoint is None:
+            self.send_error(404)
+            return
+
+        if server.latency or server.jitter:
+            time.sleep(server.latency + server.jitter * random.random())
+        if server.error_rate and random.random() < server.error_rate:
+            self.send_error(server.error_status)
+            return
+
+        params = urllib.parse.parse_qs(url.query)
+        limit = int(params["limit"][0]) if "limit" in params else None
+        body = server.payload(endpoint, limit)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOsuServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Threaded http server answering the six osu! api endpoints.
+
+    Parameters
+    ----------
+    port : int
+        Port to listen on. 0 picks a free port.
+    latency : float
+        Seconds to wait before answering each request.
+    jitter : float
+        Up to this many extra seconds are added to latency at random.
+    error_rate : float
+        Fraction of requests answered with ``error_status``.
+    error_status : int
+        Status to answer failed requests with. Defaults to 504, which connectors retry.
+    payloads : dict
+        Maps endpoint constants to fixed response bodies. Endpoints not given
+        are answered with :func:`bench.fixtures.payload`.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    # The default backlog of 5 overflows under concurrent clients, and the
+    # retransmitted SYNs then show up as second long latencies.
+    request_queue_size = 128
+
+    def __init__(self, port=0, *, latency=0, jitter=0, error_rate=0, error_status=504, payloads=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payloads = dict(payloads or {})
+        self.routes = {urllib.parse.urlsplit(endpoint).path: endpoint for endpoint in ENDPOINTS}
+        self._generated = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base url to use in place of :data:`osuapi.endpoints.API_BASE`."""
+        return "http://127.0.0.1:{}/api".format(self.server_address[1])
+
+    def payload(self, endpoint, limit=None):
+        try:
+            return self.payloads[endpoint]
+        except KeyError:
+            pass
+        try:
+            return self._generated[endpoint, limit]
+        except KeyError:
+            body = self._generated[endpoint, limit] = fixtures.payload(endpoint, limit)
+            return body
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
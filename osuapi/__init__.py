@@ -5,6 +5,22 @@ __copyright__ = "Copyright khazhyk"
 __version__ = "0.0.43"
 
 from .osu import OsuApi
-from .connectors import *
 from .enums import *
 from .errors import *
+
+# connectors import aiohttp and requests, which take longer to import than the
+# rest of the package, so they are only loaded once one is asked for
+_CONNECTORS = ("AHConnector", "ReqConnector", "ThreadedAHConnector")
+
+__all__ = [name for name in globals() if not name.startswith("_")] + list(_CONNECTORS)
+
+
+def __getattr__(name):
+    if name in _CONNECTORS:
+        from . import connectors
+        return getattr(connectors, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_CONNECTORS))
@@ -0,0 +1,215 @@
+"""In-memory index for filtering beatmaps.
+
+.. code:: python
+
+    index = BeatmapIndex(beatmaps)
+    index.query(difficultyrating=(5.5, 6.5), mode=OsuMode.osu, hit_length=(None, 180),
+                approved=[BeatmapStatus.ranked, BeatmapStatus.loved])
+    index.add(new_beatmaps)
+
+Numeric fields are kept as sorted arrays and answer ranges by binary search,
+enum fields keep the set of beatmap ids for each value. A query estimates the
+number of matches of each constraint from the index, walks the smallest one
+and checks the remaining constraints on those beatmaps only.
+
+The index is built for bulk loads followed by occasional updates, like the
+newly ranked maps of a day. A single update costs a move of the sorted
+arrays, about a millisecond per field for a million beatmaps; updates larger
+than a small fraction of the index rebuild the arrays in one pass instead.
+"""
+import bisect
+import collections.abc
+import enum
+
+NUMERIC_FIELDS = (
+    "difficultyrating", "bpm", "hit_length", "total_length", "diff_size", "diff_overall",
+    "diff_approach", "diff_drain", "max_combo", "favourite_count", "playcount")
+ENUM_FIELDS = ("mode", "approved", "genre_id", "language_id")
+
+# changes to a column above which it is rebuilt instead of updated in place:
+# _BULK at least, or one in _REBUILD_RATIO of its values
+_BULK = 256
+_REBUILD_RATIO = 64
+
+
+def _first(pair):
+    return pair[0]
+
+
+def _pairs(beatmaps, field):
+    """(value, beatmap id) of each beatmap with a value for field."""
+    return [(getattr(beatmap, field), beatmap.beatmap_id) for beatmap in beatmaps
+            if getattr(beatmap, field) is not None]
+
+
+def _members(value, postings):
+    """The enum members an enum constraint accepts.
+
+    A plain value, like the 0 of ``mode=0``, stands for the member with that value."""
+    if isinstance(value, (enum.Enum, str)) or not isinstance(value, collections.abc.Iterable):
+        value = (value,)
+    members = set()
+    for member in value:
+        if not isinstance(member, enum.Enum):
+            member = next((key for key in postings if getattr(key, "value", key) == member), member)
+        members.add(member)
+    return frozenset(members)
+
+
+class _Sorted:
+    """Values of one numeric field in order, with the beatmap id of each."""
+
+    def __init__(self):
+        self.values = []
+        self.ids = []
+
+    def _bulk(self, changes):
+        return changes > _BULK or changes * _REBUILD_RATIO > len(self.values)
+
+    def insert(self, pairs):
+        """Insert (value, beatmap id) pairs."""
+        if not self._bulk(len(pairs)):
+            for value, beatmap_id in pairs:
+                i = bisect.bisect_right(self.values, value)
+                self.values.insert(i, value)
+                self.ids.insert(i, beatmap_id)
+            return
+        # sorting once is much faster than inserting many values one by one,
+        # and nearly linear as both parts are sorted already
+        pairs = list(zip(self.values, self.ids)) + pairs
+        pairs.sort(key=_first)
+        self.values = [value for value, _ in pairs]
+        self.ids = [beatmap_id for _, beatmap_id in pairs]
+
+    def remove(self, pairs):
+        """Remove (value, beatmap id) pairs."""
+        if not self._bulk(len(pairs)):
+            for value, beatmap_id in pairs:
+                i = bisect.bisect_left(self.values, value)
+                while self.ids[i] != beatmap_id:
+                    i += 1
+                del self.values[i]
+                del self.ids[i]
+            return
+        removed = {beatmap_id for _, beatmap_id in pairs}
+        keep = [i for i, beatmap_id in enumerate(self.ids) if beatmap_id not in removed]
+        self.values = [self.values[i] for i in keep]
+        self.ids = [self.ids[i] for i in keep]
+
+    def span(self, lo, hi):
+        start = 0 if lo is None else bisect.bisect_left(self.values, lo)
+        end = len(self.values) if hi is None else bisect.bisect_right(self.values, hi)
+        return start, max(start, end)
+
+
+class BeatmapIndex:
+    """Index over a collection of :class:`osuapi.model.Beatmap`.
+
+    Each ``beatmap_id`` is stored once, adding a beatmap again replaces the
+    previous version.
+
+    Parameters
+    ----------
+    beatmaps : iterable
+        Beatmaps to index.
+    numeric : tuple
+        Names of number fields indexed for range queries.
+    enums : tuple
+        Names of enum fields indexed for value queries.
+    """
+
+    def __init__(self, beatmaps=(), numeric=NUMERIC_FIELDS, enums=ENUM_FIELDS):
+        self.beatmaps = {}
+        self._numeric = {field: _Sorted() for field in numeric}
+        self._enums = {field: {} for field in enums}
+        self.add(beatmaps)
+
+    def __len__(self):
+        return len(self.beatmaps)
+
+    def __contains__(self, beatmap_id):
+        return beatmap_id in self.beatmaps
+
+    def add(self, beatmaps):
+        """Add or replace beatmaps.
+
+        If beatmaps has the same ``beatmap_id`` more than once, the last one is kept."""
+        beatmaps = list({beatmap.beatmap_id: beatmap for beatmap in beatmaps}.values())
+        self._remove([beatmap.beatmap_id for beatmap in beatmaps])
+        for beatmap in beatmaps:
+            self.beatmaps[beatmap.beatmap_id] = beatmap
+            for field, postings in self._enums.items():
+                postings.setdefault(getattr(beatmap, field), set()).add(beatmap.beatmap_id)
+        for field, column in self._numeric.items():
+            column.insert(_pairs(beatmaps, field))
+
+    def remove(self, beatmap_id):
+        """Remove a beatmap by id, if it is indexed."""
+        self._remove([beatmap_id])
+
+    def _remove(self, beatmap_ids):
+        removed = [self.beatmaps.pop(beatmap_id) for beatmap_id in beatmap_ids if beatmap_id in self.beatmaps]
+        if not removed:
+            return
+        for field, column in self._numeric.items():
+            column.remove(_pairs(removed, field))
+        for field, postings in self._enums.items():
+            for beatmap in removed:
+                postings[getattr(beatmap, field)].discard(beatmap.beatmap_id)
+
+    def _constraint(self, field, value):
+        """Return (estimated matches, candidate ids, check) for one constraint."""
+        if field in self._enums:
+            postings = self._enums[field]
+            members = _members(value, postings)
+            sets = [postings.get(member, ()) for member in members]
+
+            def candidates():
+                return sets[0] if len(sets) == 1 else set().union(*sets)
+
+            def check(beatmap):
+                return getattr(beatmap, field) in members
+            return sum(map(len, sets)), candidates, check
+
+        if field in self._numeric:
+            lo, hi = value if isinstance(value, tuple) else (value, value)
+            column = self._numeric[field]
+            start, end = column.span(lo, hi)
+
+            def candidates():
+                return column.ids[start:end]
+
+            def check(beatmap):
+                v = getattr(beatmap, field)
+                return v is not None and (lo is None or lo <= v) and (hi is None or v <= hi)
+            return end - start, candidates, check
+
+        raise TypeError("{} is not an indexed field".format(field))
+
+    def query(self, **constraints):
+        """Beatmaps matching every constraint, in no particular order.
+
+        Numeric fields take a ``(low, high)`` tuple of inclusive bounds, either
+        of which may be None for an open range, or a single value. Enum fields
+        take a member or an iterable of accepted members, members can also be
+        given by their value. With no constraints every beatmap is returned."""
+        if not constraints:
+            return list(self.beatmaps.values())
+        plans = sorted((self._constraint(field, value) for field, value in constraints.items()),
+                       key=lambda plan: plan[0])
+        _, candidates, _ = plans[0]
+        checks = [check for _, _, check in plans[1:]]
+        beatmaps = self.beatmaps
+        result = []
+        for beatmap_id in candidates():
+            beatmap = beatmaps[beatmap_id]
+            if all(check(beatmap) for check in checks):
+                result.append(beatmap)
+        return result
+
+    def count(self, **constraints):
+        """Number of beatmaps matching every constraint, see :meth:`query`."""
+        if len(constraints) == 1:
+            (field, value), = constraints.items()
+            return self._constraint(field, value)[0]
+        return len(self.query(**constraints))
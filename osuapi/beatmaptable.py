@@ -0,0 +1,230 @@
+"""Read-only, memory mapped table of beatmaps.
+
+The table is written once with :meth:`BeatmapTable.build` and then opened by
+any number of processes, which share the mapped pages instead of each keeping
+its own :class:`osuapi.model.Beatmap` objects. Beatmap objects are only built
+for the rows looked up.
+
+.. code:: python
+
+    BeatmapTable.build("beatmaps.tbl", beatmaps)
+
+    # in each worker
+    table = BeatmapTable("beatmaps.tbl")
+    table[129891].title
+
+Layout: a header, the sorted ``beatmap_id`` of every row as uint32 (the
+index, binary searched in place), fixed width rows in the same order, and a
+heap of utf-8 strings referenced from the rows by offset and length.
+"""
+import bisect
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from .model import Beatmap
+from .serialization import codec, _encode_date, _decode_date
+
+_MAGIC = b"OSBT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHIIQQQ")
+
+
+class _Column:
+    def __init__(self, field):
+        self.name = field.name
+        self.bit = field.bit
+        self.kind = field.kind
+        self.nullable = field.nullable
+        self.is_list = field.is_list
+        # strings are stored as (heap offset, length)
+        self.code = "II" if self.kind == "str" else field.code
+        self.slots = len(self.code)
+        self.coded = field.coded
+        if self.coded:
+            self.decode = None
+        elif self.kind == "enum":
+            members = {member.value: member for member in field.oftype}
+            self.decode = members.__getitem__
+        elif self.kind == "flags":
+            self.decode = field.oftype
+        elif self.kind == "date":
+            self.decode = _decode_date
+        else:
+            self.decode = None
+
+    def encode(self, value, heap):
+        if value is None:
+            return (0,) * self.slots
+        if self.kind == "str":
+            return heap(",".join(value) if self.is_list else value)
+        if self.kind in ("enum", "flags") and not self.coded:
+            return (value.value,)
+        if self.kind == "date":
+            return (_encode_date(value),)
+        return (value,)
+
+
+def _columns(model):
+    """Columns for every field of model that fits in a fixed width row."""
+    fields = codec(model).fields
+    if len(fields) > 64:
+        raise TypeError("Too many fields in {}".format(model.__name__))
+    return [_Column(f) for f in fields if f.fixed or (f.is_list and f.kind == "str")]
+
+
+class _Heap:
+    """String heap built while writing, identical strings are stored once."""
+    def __init__(self):
+        self.offsets = {}
+        self.chunks = []
+        self.size = 0
+
+    def __call__(self, value):
+        try:
+            return self.offsets[value]
+        except KeyError:
+            data = value.encode("utf-8")
+            ref = self.offsets[value] = (self.size, len(data))
+            self.chunks.append(data)
+            self.size += len(data)
+            return ref
+
+
+class BeatmapTable:
+    """A beatmap table mapped into memory.
+
+    Supports ``table[beatmap_id]``, ``get``, ``in``, ``len`` and iteration over
+    beatmaps in ``beatmap_id`` order.
+
+    Parameters
+    ----------
+    path : str
+        Path of a table written by :meth:`build`.
+    """
+    model = Beatmap
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, fingerprint, count, ids_offset, rows_offset, heap_offset = _HEADER.unpack_from(self._map, 0)
+        self._columns = _columns(self.model)
+        self._row = struct.Struct("<Q" + "".join(c.code for c in self._columns))
+        if magic != _MAGIC or version != _VERSION or fingerprint != self._fingerprint(self._row):
+            self.close()
+            raise ValueError("{} is not a beatmap table for this version of osuapi".format(path))
+
+        self._buf = memoryview(self._map)
+        ids = self._buf[ids_offset:ids_offset + 4 * count]
+        if sys.byteorder == "little":
+            self.ids = ids.cast("I")
+        else:
+            self.ids = struct.unpack("<{}I".format(count), ids)
+        self._rows_offset = rows_offset
+        self._heap_offset = heap_offset
+
+    @classmethod
+    def _fingerprint(cls, row):
+        return zlib.crc32(row.format.encode("ascii") + codec(cls.model).fingerprint.to_bytes(4, "little"))
+
+    @classmethod
+    def build(cls, path, beatmaps):
+        """Write a table of beatmaps to path.
+
+        The file is written next to path and moved into place once complete, so
+        processes with the old table open are unaffected. If several beatmaps
+        share a ``beatmap_id`` the last one is kept."""
+        columns = _columns(cls.model)
+        row = struct.Struct("<Q" + "".join(c.code for c in columns))
+        by_id = {beatmap.beatmap_id: beatmap for beatmap in beatmaps}
+        ids = sorted(by_id)
+        heap = _Heap()
+
+        rows = []
+        for beatmap_id in ids:
+            get = by_id[beatmap_id].__dict__.get
+            mask = 0
+            values = []
+            for column in columns:
+                value = get(column.name)
+                if value is not None:
+                    mask |= 1 << column.bit
+                values.extend(column.encode(value, heap))
+            rows.append(row.pack(mask, *values))
+
+        ids_offset = _HEADER.size + (-_HEADER.size % 8)
+        rows_offset = ids_offset + 4 * len(ids) + (-4 * len(ids) % 8)
+        heap_offset = rows_offset + row.size * len(rows)
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, cls._fingerprint(row), len(ids),
+                                 ids_offset, rows_offset, heap_offset))
+            f.write(b"\0" * (ids_offset - f.tell()))
+            f.write(struct.pack("<{}I".format(len(ids)), *ids))
+            f.write(b"\0" * (rows_offset - f.tell()))
+            f.write(b"".join(rows))
+            f.write(b"".join(heap.chunks))
+        os.replace(tmp, path)
+
+    def _load(self, index):
+        values = self._row.unpack_from(self._buf, self._rows_offset + index * self._row.size)
+        mask = values[0]
+        pos = 1
+        obj = object.__new__(self.model)
+        dct = obj.__dict__
+        for column in self._columns:
+            if not mask >> column.bit & 1:
+                dct[column.name] = None
+            elif column.kind == "str":
+                start = self._heap_offset + values[pos]
+                value = str(self._buf[start:start + values[pos + 1]], "utf-8")
+                dct[column.name] = value.split(",") if column.is_list else value
+            elif column.decode is not None:
+                dct[column.name] = column.decode(values[pos])
+            else:
+                dct[column.name] = values[pos]
+            pos += column.slots
+        return obj
+
+    def _index(self, beatmap_id):
+        i = bisect.bisect_left(self.ids, beatmap_id)
+        if i < len(self.ids) and self.ids[i] == beatmap_id:
+            return i
+        return None
+
+    def __getitem__(self, beatmap_id):
+        i = self._index(beatmap_id)
+        if i is None:
+            raise KeyError(beatmap_id)
+        return self._load(i)
+
+    def get(self, beatmap_id, default=None):
+        i = self._index(beatmap_id)
+        return default if i is None else self._load(i)
+
+    def __contains__(self, beatmap_id):
+        return self._index(beatmap_id) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self._load(i)
+
+    def close(self):
+        if getattr(self, "_buf", None) is not None:
+            if isinstance(self.ids, memoryview):
+                self.ids.release()
+            self._buf.release()
+            self._buf = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
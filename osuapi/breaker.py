@@ -0,0 +1,296 @@
+"""Circuit breaking and load shedding.
+
+:class:`BreakerConnector` wraps another connector and keeps a circuit for
+each endpoint. While an endpoint mostly fails, its circuit opens and requests
+fail immediately with :class:`osuapi.errors.CircuitOpenError` instead of
+spending their retries on it. After ``reset_timeout`` seconds a single request
+is let through, with a single attempt; the circuit closes if it succeeds and
+opens again if it doesn't.
+
+.. code:: python
+
+    cache = ResponseCache()
+    breaker = BreakerConnector(ReqConnector(cache=cache), fallback=cache, shed_at=32)
+    api = OsuApi("mykey", connector=breaker)
+
+    # background work, rejected with RequestShedError while 32 requests are in flight
+    crawler_api = OsuApi("mykey", connector=breaker.low_priority())
+
+Given a :class:`osuapi.cache.ResponseCache` as ``fallback``, requests that are
+rejected or fail because of an outage return the last result cached for the
+same request, if there is one, instead of raising.
+
+Works with both synchronous and asynchronous connectors. With an asynchronous
+one, requests are admitted when their coroutine is awaited, not when it is
+created.
+"""
+import asyncio
+import collections
+import inspect
+import sys
+import threading
+import time
+
+from .errors import CircuitOpenError, HTTPError, RequestShedError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_outage(error):
+    """Whether an error counts against a circuit: server errors, rate limiting and
+    connection failures. Other errors, like a 404, mean the api is up."""
+    if isinstance(error, HTTPError):
+        return error.code >= 500 or error.code == 429
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    # only an aiohttp error if aiohttp was imported
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(error, aiohttp.ClientError)
+
+
+class _Circuit:
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = collections.deque(maxlen=window)
+        self.failures = 0
+        self.opened = 0.0
+        self.probing = False
+
+    def record(self, failed):
+        if len(self.outcomes) == self.outcomes.maxlen:
+            self.failures -= self.outcomes[0]
+        self.outcomes.append(failed)
+        self.failures += failed
+
+    def trip(self, now):
+        self.state = OPEN
+        self.opened = now
+
+    def reset(self):
+        self.state = CLOSED
+        self.outcomes.clear()
+        self.failures = 0
+
+
+def _capturing(type_, captured):
+    """Wrap a converter so the json it is given is also appended to captured."""
+    def convert(data):
+        captured.append(data)
+        return type_(data)
+    # still hand the response body to a recording connector wrapping this one
+    convert.body_received = getattr(type_, "body_received", None)
+    return convert
+
+
+class BreakerConnector:
+    """Connector failing fast on endpoints that are down.
+
+    Parameters
+    ----------
+    connector
+        The connector actually making requests.
+    failure_rate : float
+        Fraction of the last ``window`` requests to an endpoint that have to
+        fail for its circuit to open.
+    window : int
+        Number of recent requests per endpoint the failure rate is taken over.
+    min_requests : int
+        Requests to an endpoint needed before its circuit can open.
+    reset_timeout : float
+        Seconds an open circuit waits before letting a request through.
+    fallback : :class:`osuapi.cache.ResponseCache`
+        If given, answer rejected and failed requests from this cache.
+        Successful results are stored in it as json and converted again when
+        used. It can also be the wrapped connector's cache, results the
+        connector stored with their validators are left as they are.
+    shed_at : int
+        If given, reject requests made through :meth:`low_priority` while this
+        many requests are in flight.
+    is_failure : callable
+        Called with an exception raised by the wrapped connector, returns
+        whether it counts as a failure. Defaults to :func:`is_outage`.
+    clock : callable
+        Returns the current time in seconds.
+    """
+
+    def __init__(self, connector, *, failure_rate=0.5, window=20, min_requests=5, reset_timeout=30.0,
+                 fallback=None, shed_at=None, is_failure=is_outage, clock=time.monotonic):
+        self.connector = connector
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.fallback = fallback
+        self.shed_at = shed_at
+        self.is_failure = is_failure
+        self.clock = clock
+        self.in_flight = 0
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @property
+    def asynchronous(self):
+        """Whether :meth:`process_request` returns coroutines, like the wrapped connector."""
+        return getattr(self.connector, "asynchronous", False) or \
+            inspect.iscoroutinefunction(self.connector.process_request)
+
+    def close(self):
+        self.connector.close()
+
+    def low_priority(self):
+        """A connector making requests through this one at low priority, for
+        work that can be dropped under load. Closing it does nothing."""
+        return _LowPriority(self)
+
+    def state(self, endpoint):
+        """``"closed"``, ``"open"`` or ``"half_open"``."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and self.clock() - circuit.opened >= self.reset_timeout:
+                return HALF_OPEN
+            return circuit.state
+
+    def _admit(self, endpoint, low_priority):
+        with self._lock:
+            if low_priority and self.shed_at is not None and self.in_flight >= self.shed_at:
+                raise RequestShedError(endpoint, self.in_flight)
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                circuit = self._circuits[endpoint] = _Circuit(self.window)
+            if circuit.state == OPEN:
+                remaining = circuit.opened + self.reset_timeout - self.clock()
+                if remaining > 0:
+                    raise CircuitOpenError(endpoint, remaining)
+                circuit.state = HALF_OPEN
+            probe = circuit.state == HALF_OPEN
+            if probe:
+                if circuit.probing:
+                    raise CircuitOpenError(endpoint, 0)
+                circuit.probing = True
+            self.in_flight += 1
+            return circuit, probe
+
+    def _finish(self, circuit, probe, failed):
+        """Record the outcome of an admitted request; failed is None if it was cancelled."""
+        with self._lock:
+            self.in_flight -= 1
+            if probe:
+                circuit.probing = False
+                if failed:
+                    circuit.trip(self.clock())
+                elif failed is not None:
+                    circuit.reset()
+            elif failed is not None and circuit.state == CLOSED:
+                circuit.record(failed)
+                if len(circuit.outcomes) >= self.min_requests and \
+                        circuit.failures >= self.failure_rate * len(circuit.outcomes):
+                    circuit.trip(self.clock())
+
+    def _succeeded(self, circuit, probe, endpoint, data, captured):
+        self._finish(circuit, probe, False)
+        if captured:
+            entry = self.fallback.get(endpoint, data)
+            # a cache shared with the connector may hold this json with its
+            # validators already, which storing again would drop
+            if entry is None or entry.data is not captured[0]:
+                self.fallback.store(endpoint, data, {}, captured[0], require_validator=False)
+
+    def _errored(self, circuit, probe, endpoint, data, error):
+        """Record a failed request, returning the fallback entry to answer it with if any."""
+        failed = bool(self.is_failure(error))
+        self._finish(circuit, probe, failed)
+        if failed and self.fallback is not None:
+            return self.fallback.get(endpoint, data)
+        return None
+
+    def _rejected(self, endpoint, data):
+        """The fallback entry to answer a rejected request with, if any."""
+        return self.fallback.get(endpoint, data) if self.fallback is not None else None
+
+    def _wrap(self, type_):
+        """(converter to pass on, list it appends the json to) for storing results in the fallback."""
+        if self.fallback is None:
+            return type_, None
+        captured = []
+        return _capturing(type_, captured), captured
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return self._process(endpoint, data, type_, retries, False)
+
+    def _process(self, endpoint, data, type_, retries, low_priority):
+        if self.asynchronous:
+            return self._process_async(endpoint, data, type_, retries, low_priority)
+        try:
+            circuit, probe = self._admit(endpoint, low_priority)
+        except (CircuitOpenError, RequestShedError):
+            entry = self._rejected(endpoint, data)
+            if entry is None:
+                raise
+            return type_(entry.data)
+
+        convert, captured = self._wrap(type_)
+        try:
+            result = self.connector.process_request(endpoint, data, convert, 1 if probe else retries)
+        except Exception as e:
+            entry = self._errored(circuit, probe, endpoint, data, e)
+            if entry is None:
+                raise
+            return type_(entry.data)
+        except BaseException:
+            self._finish(circuit, probe, None)
+            raise
+        if inspect.isawaitable(result):
+            # a connector returning coroutines without saying so; it was admitted already
+            return self._await(result, circuit, probe, endpoint, data, type_, captured)
+        self._succeeded(circuit, probe, endpoint, data, captured)
+        return result
+
+    async def _process_async(self, endpoint, data, type_, retries, low_priority):
+        # admitted when awaited, so a coroutine that is never awaited holds nothing
+        try:
+            circuit, probe = self._admit(endpoint, low_priority)
+        except (CircuitOpenError, RequestShedError):
+            entry = self._rejected(endpoint, data)
+            if entry is None:
+                raise
+            return type_(entry.data)
+        convert, captured = self._wrap(type_)
+        try:
+            result = self.connector.process_request(endpoint, data, convert, 1 if probe else retries)
+        except BaseException:
+            self._finish(circuit, probe, None)
+            raise
+        return await self._await(result, circuit, probe, endpoint, data, type_, captured)
+
+    async def _await(self, result, circuit, probe, endpoint, data, type_, captured):
+        try:
+            result = await result
+        except Exception as e:
+            entry = self._errored(circuit, probe, endpoint, data, e)
+            if entry is None:
+                raise
+            return type_(entry.data)
+        except BaseException:
+            self._finish(circuit, probe, None)
+            raise
+        self._succeeded(circuit, probe, endpoint, data, captured)
+        return result
+
+
+class _LowPriority:
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    @property
+    def asynchronous(self):
+        return self.breaker.asynchronous
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return self.breaker._process(endpoint, data, type_, retries, True)
@@ -0,0 +1,84 @@
+"""Cache of decoded responses, used for conditional requests.
+
+Give a :class:`ResponseCache` to a connector and it keeps the decoded json of
+each request whose response had an ``ETag`` or ``Last-Modified`` header, along
+with those headers. Repeat requests send them back as
+``If-None-Match``/``If-Modified-Since``, and a ``304 Not Modified`` answer is
+converted from the cached json without downloading or decoding the body
+again. The json is converted for every request, so the same request can be
+made for model objects and for rows.
+
+.. code:: python
+
+    api = OsuApi("mykey", connector=ReqConnector(cache=ResponseCache()))
+
+Cached json is shared between callers making the same request, converters
+mustn't modify it.
+"""
+import collections
+import threading
+import time
+
+from .recording import request_key
+
+CacheEntry = collections.namedtuple("CacheEntry", "data etag last_modified stored")
+CacheEntry.__doc__ = """Decoded json of a response and the validators it was served with."""
+
+
+class ResponseCache:
+    """Bounded, thread safe cache of decoded responses.
+
+    Parameters
+    ----------
+    maxsize : int
+        Number of requests kept, the least recently used are dropped first.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, params):
+        """The :class:`CacheEntry` of a request, or None."""
+        key = request_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, endpoint, params, headers, data, *, require_validator=True):
+        """Remember the decoded json of a request, headers being its response headers.
+
+        Responses without an ``ETag`` or ``Last-Modified`` can't be revalidated,
+        they are only stored if require_validator is False. Returns whether
+        the response was stored."""
+        entry = CacheEntry(data, headers.get("ETag"), headers.get("Last-Modified"), time.time())
+        if require_validator and entry.etag is None and entry.last_modified is None:
+            return False
+        key = request_key(endpoint, params)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Request headers revalidating a cached entry, empty if it has no validators."""
+        headers = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,115 @@
+"""The ``osuapi`` command.
+
+.. code:: sh
+
+    export OSU_API_KEY=...
+    osuapi crawl beatmaps -o beatmaps.jsonl --since 2020-01-01
+    osuapi crawl users --ids 1-100000 --mode osu taiko -o users.db --rate 10
+    osuapi crawl scores --ids-file ranked.txt -o scores.parquet --concurrency 16
+
+Crawls save their progress to ``<output>.checkpoint`` (see ``--checkpoint``)
+and pick up from it when run again with the same arguments.
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+from .crawl import Checkpoint, RateLimiter, RawConnector, open_sink, crawl_beatmaps, crawl_scores, crawl_users
+from .enums import OsuMode
+from .osu import OsuApi
+
+
+def _ids(spec):
+    """Parse ``1-100,200,300-310`` into a list of ids."""
+    ids = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def _date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d")
+
+
+def parser():
+    p = argparse.ArgumentParser(prog="osuapi", description="osu! api tools.")
+    commands = p.add_subparsers(dest="command")
+    crawl = commands.add_parser("crawl", help="Download api results in bulk.")
+    crawl.add_argument("target", choices=["beatmaps", "users", "scores"])
+    crawl.add_argument("-o", "--output", required=True,
+                       help="Output path; .jsonl(.gz), .db/.sqlite or .parquet (a directory).")
+    crawl.add_argument("--format", choices=["jsonl", "sqlite", "parquet"],
+                       help="Output format, if not implied by the output path.")
+    crawl.add_argument("--table", help="SQLite table name. Defaults to the crawl target.")
+    crawl.add_argument("--key", default=os.environ.get("OSU_API_KEY"),
+                       help="osu! api key. Defaults to $OSU_API_KEY.")
+    crawl.add_argument("--ids", type=_ids, help="User or beatmap ids, e.g. 1-1000,2000.")
+    crawl.add_argument("--ids-file", help="File with one user or beatmap id per line.")
+    crawl.add_argument("--mode", nargs="+", choices=[mode.name for mode in OsuMode],
+                       help="Game modes to crawl. Defaults to osu for users and scores, all for beatmaps.")
+    crawl.add_argument("--since", type=_date, help="beatmaps: start from maps ranked after this date (YYYY-MM-DD).")
+    crawl.add_argument("--limit", type=int, default=100, help="scores: scores per beatmap, at most 100.")
+    crawl.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+    crawl.add_argument("--rate", type=float, default=5, help="Requests per second.")
+    crawl.add_argument("--burst", type=int, help="Requests allowed at once after a pause. Defaults to --rate.")
+    crawl.add_argument("--batch-size", type=int, default=1000, help="Rows written at once.")
+    crawl.add_argument("--retries", type=int, default=3, help="Attempts per request after the first.")
+    crawl.add_argument("--checkpoint", help="Checkpoint path. Defaults to <output>.checkpoint.")
+    return p
+
+
+def _connector():
+    from .connectors import ReqConnector
+    return ReqConnector()
+
+
+def crawl(args, connector=None):
+    if not args.key:
+        raise SystemExit("No api key, pass --key or set OSU_API_KEY")
+    ids = args.ids or []
+    if args.ids_file:
+        with open(args.ids_file) as f:
+            ids += [int(line) for line in f if line.strip()]
+    if args.target != "beatmaps" and not ids:
+        raise SystemExit("crawl {} needs --ids or --ids-file".format(args.target))
+    modes = [OsuMode[name] for name in args.mode] if args.mode else None
+    if args.target == "scores" and modes and len(modes) > 1:
+        raise SystemExit("crawl scores takes a single --mode")
+
+    api = OsuApi(args.key, connector=RawConnector(connector or _connector()))
+    options = dict(
+        limiter=RateLimiter(args.rate, args.burst),
+        checkpoint=Checkpoint(args.checkpoint or args.output.rstrip("/") + ".checkpoint"),
+        concurrency=args.concurrency, batch_size=args.batch_size, retries=args.retries)
+    try:
+        with open_sink(args.output, args.format, args.table or args.target) as sink:
+            if args.target == "beatmaps":
+                written = crawl_beatmaps(api, sink, since=args.since, modes=modes or tuple(OsuMode), **options)
+            elif args.target == "users":
+                written = crawl_users(api, ids, sink, modes=modes or (OsuMode.osu,), **options)
+            else:
+                written = crawl_scores(api, ids, sink, mode=(modes or [OsuMode.osu])[0], limit=args.limit,
+                                       **options)
+    finally:
+        api.close()
+    failed = options["checkpoint"].state.get(args.target, {}).get("failed")
+    print("Wrote {} rows to {}{}".format(
+        written, args.output, ", {} failed (see checkpoint)".format(len(failed)) if failed else ""))
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "crawl":
+        crawl(args)
+    else:
+        parser().print_help()
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,25 +3,89 @@
 
 Connectors have to implement `process_request`.
 """
-from .errors import HTTPError
+import asyncio
+import json
+import threading
+import time
 
+from .errors import HTTPError, _bad_import_class
+
+
+def _decode(observer, endpoint, body, type_):
+    """Decode a response body, reporting the time spent to observer if there is one.
+
+    If type_ has a ``body_received`` attribute it is called with the body first."""
+    received = getattr(type_, "body_received", None)
+    if received is not None:
+        received(body)
+    if observer is None:
+        return json.loads(body.decode("utf-8"))
+    start = time.perf_counter()
+    data = json.loads(body.decode("utf-8"))
+    observer.response_decoded(endpoint, time.perf_counter() - start)
+    return data
+
+
+def _convert(observer, endpoint, data, type_):
+    """Convert decoded json with type_, reporting the time spent to observer if there is one."""
+    if observer is None:
+        return type_(data)
+    start = time.perf_counter()
+    result = type_(data)
+    observer.response_parsed(endpoint, time.perf_counter() - start)
+    return result
+
+
+def _retried(attempts, retries):
+    """Retries made by a request loop that allowed attempts and has retries left."""
+    # The loop stops early on anything but a 504, after one retry per 504
+    # seen. Running out means every attempt was made, the first not a retry.
+    return attempts - retries if retries else attempts - 1
 
-def _bad_import_class(msg):
-    class _BadImportClass:
-        def __init__(self, *args, **kwargs):
-            raise NotImplementedError(msg)
-    return _BadImportClass
 
 try:
     import aiohttp
-    import asyncio
     import inspect
 
+    def _ah_session(limit):
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit))
+
+    def _ah_accept_encoding():
+        encodings = ["gzip", "deflate"]
+        try:
+            from aiohttp import compression_utils
+        except ImportError:
+            return ", ".join(encodings)
+        if getattr(compression_utils, "HAS_BROTLI", False):
+            encodings.append("br")
+        if getattr(compression_utils, "HAS_ZSTD", False):
+            encodings.append("zstd")
+        return ", ".join(encodings)
+
+    _AH_ACCEPT_ENCODING = _ah_accept_encoding()
+
     class AHConnector:
-        """Connector implementation using aiohttp."""
-        def __init__(self, sess=None, loop=None):
+        """Connector implementation using aiohttp.
+
+        Parameters
+        ----------
+        sess : aiohttp.ClientSession
+            Session to make requests with. A new one is created if not given.
+        loop
+            Event loop to use. Defaults to the current event loop.
+        observer : :class:`osuapi.metrics.RequestObserver`
+            If given, notified about every request made.
+        cache : :class:`osuapi.cache.ResponseCache`
+            If given, responses are cached and revalidated with conditional requests.
+        """
+        #: :meth:`process_request` returns coroutines.
+        asynchronous = True
+
+        def __init__(self, sess=None, loop=None, observer=None, cache=None):
             self.loop = loop or asyncio.get_event_loop()
             self.sess = sess or aiohttp.ClientSession(loop=self.loop)
+            self.observer = observer
+            self.cache = cache
             self.closed = False
 
         def close(self):
@@ -34,8 +98,22 @@ try:
             if inspect.isawaitable(aiohttp_is_silly):
                 asyncio.ensure_future(aiohttp_is_silly)
 
-        @asyncio.coroutine
-        def process_request(self, endpoint, data, type_, retries=5):
+        async def _get(self, endpoint, data, headers):
+            """Make one request, returning the response and its body.
+
+            The connection goes back to the pool once the body is read. If
+            reading fails or the request is cancelled, the connection is
+            closed instead, since it may still have part of the body on it."""
+            resp = await self.sess.get(endpoint, params=data, headers=headers)
+            try:
+                body = await resp.read()
+            except BaseException:
+                resp.close()
+                raise
+            resp.release()
+            return resp, body
+
+        async def process_request(self, endpoint, data, type_, retries=5):
             """Make and process the request.
 
             This can raise anything aiohttp.get() can raise, or
@@ -52,36 +130,150 @@ try:
             retries: `int`
                 Maximum number of times to try request.
             """
+            observer = self.observer
+            if observer is not None:
+                observer.request_started(endpoint, data)
+                start = time.perf_counter()
+            attempts = retries
+            entry = self.cache.get(endpoint, data) if self.cache is not None else None
+            headers = {"Accept-Encoding": _AH_ACCEPT_ENCODING}
+            if entry is not None:
+                headers.update(self.cache.conditional_headers(entry))
 
-            while retries:
-                resp = yield from self.sess.get(endpoint, params=data)
-                try:
-                    if resp.status == 200:
-                        data = yield from resp.json()
-                        return type_(data)
-                    elif resp.status == 504:
-                        # Retry on 504
-                        retries -= 1
-                        yield from asyncio.sleep(1)
-                    else:
+            try:
+                while retries:
+                    resp, body = await self._get(endpoint, data, headers)
+                    if resp.status != 504:
                         break
-                finally:
-                    if not retries or resp.status not in {200, 504}:
-                        error_text = yield from resp.text()
-                    resp.close()
-            raise HTTPError(resp.status, resp.reason, error_text)
+                    # Retry on 504
+                    retries -= 1
+                    await asyncio.sleep(1)
+            except BaseException:
+                # including cancellation, so observers don't count the request as in flight forever
+                if observer is not None:
+                    observer.request_finished(endpoint, None, 0, attempts - retries, time.perf_counter() - start)
+                raise
+
+            if observer is not None:
+                observer.request_finished(
+                    endpoint, resp.status, len(body), _retried(attempts, retries), time.perf_counter() - start)
+                # aiohttp only hands out the decompressed body
+                observer.response_received(
+                    endpoint, resp.headers.get("Content-Encoding", "identity"),
+                    int(resp.headers.get("Content-Length", len(body))))
+            if resp.status == 304 and entry is not None:
+                return _convert(observer, endpoint, entry.data, type_)
+            if resp.status == 200:
+                decoded = _decode(observer, endpoint, body, type_)
+                if self.cache is not None:
+                    self.cache.store(endpoint, data, resp.headers, decoded)
+                return _convert(observer, endpoint, decoded, type_)
+            raise HTTPError(resp.status, resp.reason, body.decode("utf-8", "replace"))
 except ImportError:
     AHConnector = _bad_import_class(
         "You need to install `aiohttp` to use osuapi.AHConenctor")
+    _ah_session = None
+
+class ThreadedAHConnector:
+    """Blocking connector running :class:`AHConnector` on a background event loop.
+
+    A daemon thread runs its own event loop with one aiohttp session, so any
+    number of threads can make requests concurrently over one connection
+    pool without owning an event loop themselves.
+
+    Parameters
+    ----------
+    limit : int
+        Maximum number of connections open at once.
+    observer : :class:`osuapi.metrics.RequestObserver`
+        If given, notified about every request made.
+    factory : callable
+        Called on the loop thread to create the wrapped connector, which must
+        have a coroutine ``process_request``. Defaults to an :class:`AHConnector`
+        with a session limited to limit connections, which needs aiohttp.
+    """
+    def __init__(self, limit=100, observer=None, factory=None):
+        if factory is None and _ah_session is None:
+            raise ImportError("You need to install `aiohttp` to use osuapi.ThreadedAHConnector")
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="osuapi-loop", daemon=True)
+        self._thread.start()
+        if factory is None:
+            def factory():
+                return AHConnector(sess=_ah_session(limit), loop=self.loop, observer=observer)
+
+        async def create():
+            return factory()
+        try:
+            self.connector = asyncio.run_coroutine_threadsafe(create(), self.loop).result()
+        except BaseException:
+            self._stop()
+            raise
+
+    def submit(self, endpoint, data, type_, retries=5):
+        """Start a request and return a :class:`concurrent.futures.Future` of its result.
+
+        Takes the same arguments as :meth:`process_request`."""
+        return asyncio.run_coroutine_threadsafe(
+            self.connector.process_request(endpoint, data, type_, retries), self.loop)
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        """Make and process the request, blocking until it is done.
+
+        See :meth:`AHConnector.process_request`"""
+        return self.submit(endpoint, data, type_, retries).result()
+
+    def _stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def close(self):
+        """Wait for requests in progress, close the session and stop the loop thread."""
+        if self.loop.is_closed():
+            return
+
+        async def close():
+            current = asyncio.current_task()
+            await asyncio.gather(*(task for task in asyncio.all_tasks() if task is not current),
+                                 return_exceptions=True)
+            self.connector.close()
+            # AHConnector.close schedules the session close as a task
+            await asyncio.gather(*(task for task in asyncio.all_tasks() if task is not current),
+                                 return_exceptions=True)
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        self._stop()
+
 
 try:
     import requests
-    import time
+    import urllib3
+
+    # what urllib3 can decode: gzip and deflate, br and zstd if their modules are installed
+    _REQ_ACCEPT_ENCODING = urllib3.util.make_headers(accept_encoding=True)["accept-encoding"]
+
+    def _wire_size(resp):
+        try:
+            return resp.raw.tell() or len(resp.content)
+        except (AttributeError, ValueError):
+            return len(resp.content)
 
     class ReqConnector:
-        """Connector implementation using requests."""
-        def __init__(self, sess=None):
+        """Connector implementation using requests.
+
+        Parameters
+        ----------
+        sess : requests.Session
+            Session to make requests with. A new one is created if not given.
+        observer : :class:`osuapi.metrics.RequestObserver`
+            If given, notified about every request made.
+        cache : :class:`osuapi.cache.ResponseCache`
+            If given, responses are cached and revalidated with conditional requests.
+        """
+        def __init__(self, sess=None, observer=None, cache=None):
             self.sess = sess or requests.Session()
+            self.observer = observer
+            self.cache = cache
 
         def close(self):
             self.sess.close()
@@ -103,18 +295,42 @@ try:
             retries: `int`
                 Maximum number of times to try request.
             """
-            while retries:
-                resp = self.sess.get(endpoint, params=data)
-                try:
-                    if resp.status_code == 200:
-                        return type_(resp.json())
-                    elif resp.status_code == 504:
-                        retries -= 1
-                        time.sleep(1)
-                    else:
-                        break
-                finally:
+            observer = self.observer
+            if observer is not None:
+                observer.request_started(endpoint, data)
+                start = time.perf_counter()
+            attempts = retries
+            entry = self.cache.get(endpoint, data) if self.cache is not None else None
+            headers = {"Accept-Encoding": _REQ_ACCEPT_ENCODING}
+            if entry is not None:
+                headers.update(self.cache.conditional_headers(entry))
+
+            try:
+                while retries:
+                    resp = self.sess.get(endpoint, params=data, headers=headers)
                     resp.close()
+                    if resp.status_code != 504:
+                        break
+                    retries -= 1
+                    time.sleep(1)
+            except Exception:
+                if observer is not None:
+                    observer.request_finished(endpoint, None, 0, attempts - retries, time.perf_counter() - start)
+                raise
+
+            if observer is not None:
+                observer.request_finished(
+                    endpoint, resp.status_code, len(resp.content), _retried(attempts, retries),
+                    time.perf_counter() - start)
+                observer.response_received(
+                    endpoint, resp.headers.get("Content-Encoding", "identity"), _wire_size(resp))
+            if resp.status_code == 304 and entry is not None:
+                return _convert(observer, endpoint, entry.data, type_)
+            if resp.status_code == 200:
+                decoded = _decode(observer, endpoint, resp.content, type_)
+                if self.cache is not None:
+                    self.cache.store(endpoint, data, resp.headers, decoded)
+                return _convert(observer, endpoint, decoded, type_)
             raise HTTPError(resp.status_code, resp.reason, resp.text)
 except ImportError:
     ReqConnector = _bad_import_class(
@@ -0,0 +1,398 @@
+"""Bulk crawling of the api.
+
+The pieces behind the ``osuapi crawl`` command: a rate limiter shared by
+worker threads, a checkpoint file so interrupted crawls resume where they
+stopped, and sinks writing rows to JSONL, SQLite or Parquet in batches.
+
+Rows are written as the api returns them (every value a string, nested
+lists kept as json) rather than as model objects.
+
+.. code:: python
+
+    api = OsuApi(key, connector=RawConnector(ReqConnector()))
+    with open_sink("users.jsonl") as sink:
+        crawl_users(api, range(1, 10001), sink, limiter=RateLimiter(10),
+                    checkpoint=Checkpoint("users.checkpoint"))
+
+A checkpoint only advances after the rows before it have been written, so a
+resumed crawl may write a few rows again but never skips any.
+"""
+import concurrent.futures
+import datetime
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .enums import OsuMode
+from .errors import HTTPError
+
+log = logging.getLogger(__name__)
+
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _shift(date, seconds):
+    return (datetime.datetime.strptime(date, _DATE_FORMAT) + datetime.timedelta(seconds=seconds)).strftime(
+        _DATE_FORMAT)
+
+
+def _identity(data):
+    return data
+
+
+class RawConnector:
+    """Wraps a connector so api methods return the decoded json instead of model objects.
+
+    Requests are made with a single attempt by default: the crawl functions
+    retry failed requests themselves, with backoff, and retrying in the
+    connector as well would multiply the attempts."""
+
+    def __init__(self, connector, retries=1):
+        self.connector = connector
+        self.retries = retries
+
+    def close(self):
+        self.connector.close()
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return self.connector.process_request(endpoint, data, _identity, self.retries)
+
+
+class RateLimiter:
+    """Token bucket limiting requests per second across threads.
+
+    Parameters
+    ----------
+    rate : float
+        Requests per second.
+    burst : int
+        Requests allowed at once after a quiet period. Defaults to rate.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request may be made."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """Progress of a crawl, saved as json to path.
+
+    :attr:`state` is a dict saved by :meth:`save`; the file is replaced
+    atomically so it is never left half written."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+
+    def save(self):
+        tmp = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+class _Sink:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlSink(_Sink):
+    """Appends rows as json lines, gzip compressed if path ends with ``.gz``."""
+
+    def __init__(self, path):
+        self._file = gzip.open(path, "at", encoding="utf-8") if path.endswith(".gz") else \
+            open(path, "a", encoding="utf-8")
+
+    def write(self, rows):
+        self._file.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _cell(value):
+    return value if value is None or isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+
+class SqliteSink(_Sink):
+    """Inserts rows into a table of text columns, adding a column for each new field."""
+
+    def __init__(self, path, table):
+        self._db = sqlite3.connect(path)
+        self._table = table
+        self._columns = [row[1] for row in self._db.execute('PRAGMA table_info("{}")'.format(table))]
+
+    def write(self, rows):
+        if not rows:
+            return
+        with self._db:
+            for key in dict.fromkeys(key for row in rows for key in row):
+                if key in self._columns:
+                    continue
+                if self._columns:
+                    self._db.execute('ALTER TABLE "{}" ADD COLUMN "{}" TEXT'.format(self._table, key))
+                else:
+                    self._db.execute('CREATE TABLE "{}" ("{}" TEXT)'.format(self._table, key))
+                self._columns.append(key)
+            self._db.executemany('INSERT INTO "{}" ({}) VALUES ({})'.format(
+                self._table, ", ".join('"{}"'.format(column) for column in self._columns),
+                ", ".join("?" * len(self._columns))),
+                [[_cell(row.get(column)) for column in self._columns] for row in rows])
+
+    def close(self):
+        self._db.close()
+
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+
+    class ParquetSink(_Sink):
+        """Writes rows to a directory of Parquet files, one or more per run.
+
+        Every column is a string. A file's columns are fixed when it is
+        created, so when a batch brings fields not seen before, a new file is
+        started with the columns so far and those."""
+
+        def __init__(self, path):
+            os.makedirs(path, exist_ok=True)
+            self._dir = path
+            self._part = len([name for name in os.listdir(path) if name.startswith("part-")])
+            self._columns = []
+            self._writer = None
+
+        def write(self, rows):
+            if not rows:
+                return
+            new = [key for key in dict.fromkeys(key for row in rows for key in row) if key not in self._columns]
+            if new:
+                self.close()
+                self._columns += new
+                self._schema = pyarrow.schema([(column, pyarrow.string()) for column in self._columns])
+                self._writer = pyarrow.parquet.ParquetWriter(
+                    os.path.join(self._dir, "part-{:05}.parquet".format(self._part)), self._schema)
+                self._part += 1
+            self._writer.write_table(pyarrow.Table.from_pydict(
+                {column: [_cell(row.get(column)) for row in rows] for column in self._schema.names},
+                schema=self._schema))
+
+        def close(self):
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+except ImportError:
+    from .errors import _bad_import_class
+    ParquetSink = _bad_import_class("You need to install `pyarrow` to write Parquet")
+
+
+def open_sink(path, format=None, table="rows"):
+    """Open a sink, choosing the format from the extension of path if not given.
+
+    Parameters
+    ----------
+    path : str
+        File, or directory for Parquet.
+    format : str
+        One of ``jsonl``, ``sqlite`` or ``parquet``.
+    table : str
+        Table name for SQLite.
+    """
+    if format is None:
+        name = path[:-3] if path.endswith(".gz") else path
+        format = {".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite", ".parquet": "parquet"}.get(
+            os.path.splitext(name)[1], "jsonl")
+    if format == "sqlite":
+        return SqliteSink(path, table)
+    if format == "parquet":
+        return ParquetSink(path)
+    if format == "jsonl":
+        return JsonlSink(path)
+    raise ValueError("Unknown format {}".format(format))
+
+
+def _retrying(fetch, limiter, retries):
+    def call(*args):
+        for attempt in range(retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return fetch(*args)
+            except HTTPError as e:
+                # 4xx other than rate limiting won't get better by retrying
+                if attempt == retries or (e.code < 500 and e.code != 429):
+                    raise
+            except OSError:
+                if attempt == retries:
+                    raise
+            time.sleep(min(2 ** attempt, 60))
+    return call
+
+
+def crawl_keys(keys, fetch, sink, *, name, concurrency=8, limiter=None, checkpoint=None, batch_size=1000,
+               retries=3):
+    """Fetch rows for each key on a thread pool and write them to sink in batches.
+
+    Progress is saved under name in the checkpoint as the position in keys
+    below which every key has been written. Keys that still fail after
+    retries are logged and listed under ``failed``; a resumed crawl tries
+    them again first.
+
+    Parameters
+    ----------
+    keys : sequence
+        Work items, passed to fetch.
+    fetch : callable
+        Called with a key, returns a list of rows.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    state = checkpoint.state.setdefault(name, {"position": 0, "failed": []}) if checkpoint else \
+        {"position": 0, "failed": []}
+    call = _retrying(fetch, limiter, retries)
+    start = state["position"]
+    # keys that failed in earlier runs, then the ones not reached yet
+    retry = list(state["failed"])
+    work = retry + list(keys[start:])
+    failed = []
+    finished_work = 0
+    next_key = 0
+    done = set()
+    pending_rows = []
+    written = 0
+
+    def flush():
+        nonlocal finished_work, written
+        sink.write(pending_rows)
+        written += len(pending_rows)
+        del pending_rows[:]
+        while finished_work in done:
+            done.remove(finished_work)
+            finished_work += 1
+        state["position"] = start + max(0, finished_work - len(retry))
+        state["failed"] = retry[finished_work:] + failed
+        if checkpoint:
+            checkpoint.save()
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        in_flight = {}
+        while in_flight or next_key < len(work):
+            while next_key < len(work) and len(in_flight) < 2 * concurrency:
+                in_flight[pool.submit(call, work[next_key])] = next_key
+                next_key += 1
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                index = in_flight.pop(future)
+                try:
+                    pending_rows.extend(future.result())
+                except Exception as e:
+                    log.warning("Giving up on %r: %r", work[index], e)
+                    failed.append(work[index])
+                done.add(index)
+            if len(pending_rows) >= batch_size:
+                flush()
+        flush()
+    return written
+
+
+def crawl_users(api, user_ids, sink, *, modes=(OsuMode.osu,), **kwargs):
+    """Crawl the profiles of user_ids in each mode. Rows get an added ``mode`` field.
+
+    Takes the keyword arguments of :func:`crawl_keys`."""
+    def fetch(key):
+        user_id, mode = key
+        rows = api.get_user(user_id, mode=OsuMode(mode))
+        for row in rows:
+            row["mode"] = str(mode)
+        return rows
+    keys = [(user_id, mode.value) for user_id in user_ids for mode in modes]
+    return crawl_keys(keys, fetch, sink, name="users", **kwargs)
+
+
+def crawl_scores(api, beatmap_ids, sink, *, mode=OsuMode.osu, limit=100, **kwargs):
+    """Crawl the top scores of beatmap_ids. Rows get an added ``beatmap_id`` field.
+
+    Takes the keyword arguments of :func:`crawl_keys`."""
+    def fetch(beatmap_id):
+        rows = api.get_scores(beatmap_id, mode=mode, limit=limit)
+        for row in rows:
+            row["beatmap_id"] = str(beatmap_id)
+        return rows
+    return crawl_keys(list(beatmap_ids), fetch, sink, name="scores", **kwargs)
+
+
+def crawl_beatmaps(api, sink, *, since=None, modes=tuple(OsuMode), limiter=None, checkpoint=None, retries=3,
+                   **kwargs):
+    """Crawl every beatmap ranked after since, following ``approved_date``.
+
+    Each mode is paged through separately and the modes are crawled
+    concurrently. The checkpoint keeps the date reached in each mode and
+    which modes are finished, those aren't crawled again.
+    Accepts but ignores ``batch_size``; each page is written as a batch."""
+    state = checkpoint.state.setdefault("beatmaps", {}) if checkpoint else {}
+    done = state.setdefault("done", [])
+    start = (since or datetime.datetime(2007, 1, 1)).strftime(_DATE_FORMAT)
+    cursors = {mode.value: state.get(str(mode.value), start) for mode in modes if mode.value not in done}
+    seen = {mode: set() for mode in cursors}
+    call = _retrying(lambda mode, since: api.get_beatmaps(
+        mode=OsuMode(mode), since=datetime.datetime.strptime(since, _DATE_FORMAT), limit=500), limiter, retries)
+    written = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max(1, len(cursors))) as pool:
+        while cursors:
+            pages = {mode: pool.submit(call, mode, since) for mode, since in cursors.items()}
+            for mode, future in pages.items():
+                rows = future.result()
+                new = [row for row in rows if row["beatmap_id"] not in seen[mode]]
+                sink.write(new)
+                written += len(new)
+                if len(rows) < 500:
+                    del cursors[mode]
+                    done.append(mode)
+                    continue
+                # since may or may not include maps ranked at that exact second, so
+                # back off a second and skip what was already written instead
+                dates = [row["approved_date"] for row in rows if row["approved_date"] is not None]
+                if not dates:
+                    log.warning("No approval dates to page by in mode %s, stopping", mode)
+                    del cursors[mode]
+                    continue
+                last = max(dates)
+                cursor = _shift(last, -1)
+                if not new:
+                    log.warning("More than a page of beatmaps ranked at %s in mode %s, skipping ahead", last, mode)
+                    cursor = last
+                seen[mode] = {row["beatmap_id"] for row in rows
+                              if row["approved_date"] is not None and row["approved_date"] >= cursor}
+                cursors[mode] = state[str(mode)] = cursor
+            if checkpoint:
+                checkpoint.save()
+    return written
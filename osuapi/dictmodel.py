@@ -1,10 +1,45 @@
+from collections.abc import Sequence
 from enum import Enum
+import functools
 import logging
 import datetime
 import warnings
+import weakref
 
 log = logging.getLogger(__name__)
 
+# Distinct key layouts remembered per model, beyond this shapes are planned every time.
+MAX_SHAPES = 64
+
+
+def _warn_drift(model, unknown, missing):
+    for k, v in unknown.items():
+        warnings.warn("Unknown attribute {} (\"{}\") in API response for type {}".format(k, v, model), Warning)
+
+
+_drift_handler = _warn_drift
+_drift = {}
+# model -> key sets already given to the drift handler
+_reported = {}
+
+
+def set_drift_handler(handler):
+    """Set the function told about api responses that don't match a model.
+
+    handler(model, unknown, missing) is called once for each distinct set of
+    keys seen for a model that has fields the model doesn't define, or lacks
+    fields it does. unknown maps each unknown field to an example value, missing
+    is a frozenset of the json names of absent fields.
+
+    The default handler warns about each unknown field. Pass None to restore it."""
+    global _drift_handler
+    _drift_handler = handler or _warn_drift
+
+
+def schema_drift():
+    """Return every unknown field seen so far, as a dict of model -> set of json names."""
+    return {model: set(fields) for model, fields in _drift.items()}
+
 
 class Attribute:
     def __init__(self, type, *, name=None):
@@ -20,6 +55,41 @@ class Attribute:
         return self.type(value)
 
 
+class EnumAttribute(Attribute):
+    """Attribute for an enum or flags field, storing only its int value.
+
+    The value is wrapped in the enum when read, which saves building an
+    :class:`osuapi.enums.OsuMod` for every object parsed. type is the same
+    converter an :class:`Attribute` would take, e.g. ``PreProcessInt(OsuMod)``."""
+
+    def __init__(self, type, *, name=None):
+        super().__init__(type, name=name)
+        factories, self.enum = unwrap(type)
+        self.nullable = Nullable in factories
+        if issubclass(self.enum, Enum):
+            self._wrap = {member.value: member for member in self.enum}.__getitem__
+        else:
+            # flags are built per value, share them between reads and objects
+            self._wrap = functools.lru_cache(maxsize=1024)(self.enum)
+
+    def parse(self, value):
+        if value is None and self.nullable:
+            return None
+        return int(value)
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[self.field_name]
+        except KeyError:
+            raise AttributeError(self.field_name) from None
+        return None if value is None else self._wrap(value)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.field_name] = getattr(value, "value", value)
+
+
 class AttributeModelMeta(type):
     def __new__(cls, name, parents, dct):
 
@@ -34,6 +104,7 @@ class AttributeModelMeta(type):
                 attrmodel[value.name or field] = value
 
         dct['__attributemodel__'] = attrmodel
+        dct['__shapes__'] = {}
         return super().__new__(cls, name, parents, dct)
 
 
@@ -42,13 +113,84 @@ class AttributeModel(object, metaclass=AttributeModelMeta):
         """Generated initializer for creating object from parsed dict.
 
         dct needs to have every field."""
-        for k, v in dct.items():
-            try:
-                attr = self.__attributemodel__[k]
-            except KeyError:
-                warnings.warn("Unknown attribute {} (\"{}\") in API response for type {}".format(k, v, type(self)), Warning)
+        keys = tuple(dct)
+        try:
+            make = self.__shapes__[keys]
+        except KeyError:
+            make = self._shape(keys, dct)
+        self.__dict__.update(make(dct))
+
+    @classmethod
+    def _shape(cls, keys, dct):
+        """Generate the function converting dicts with exactly these keys.
+
+        The function takes such a dict and returns the converted attributes as
+        a dict of field name -> value. Reports drift the first time a set of
+        keys is seen. Once :data:`MAX_SHAPES` shapes are cached, further ones
+        share a generic function instead of generating one each."""
+        model = cls.__attributemodel__
+        missing = frozenset(model).difference(keys)
+        unknown = {k: dct[k] for k in keys if k not in model}
+        if unknown or missing:
+            reported = _reported.setdefault(cls, set())
+            if frozenset(keys) not in reported:
+                reported.add(frozenset(keys))
+                _drift.setdefault(cls, set()).update(unknown)
+                _drift_handler(cls, unknown, missing)
+
+        if len(cls.__shapes__) >= MAX_SHAPES:
+            def make(dct):
+                return {model[k].field_name: model[k].parse(v) for k, v in dct.items() if k in model}
+            return make
+
+        namespace = {}
+        values, items = [], []
+        for i, k in enumerate(keys):
+            if k not in model:
+                values.append("_")
+                continue
+            attr = model[k]
+            # Skip a call per field when parse isn't overridden.
+            namespace["_p{}".format(i)] = attr.type if type(attr).parse is Attribute.parse else attr.parse
+            values.append("_v{}".format(i))
+            items.append("{!r}: _p{}(_v{})".format(attr.field_name, i, i))
+        source = "def make(dct):\n    {}, = dct.values()\n    return {{{}}}".format(
+            ", ".join(values), ", ".join(items)) if keys else "def make(dct):\n    return {}"
+        exec(source, namespace)
+        make = cls.__shapes__[keys] = namespace["make"]
+        return make
+
+    @classmethod
+    def _from_list(cls, lst):
+        """Convert a list of dicts, specializing on the keys of the first one."""
+        if not lst:
+            return []
+        keys = tuple(lst[0])
+        try:
+            make = cls.__shapes__[keys]
+        except KeyError:
+            make = cls._shape(keys, lst[0])
+        new = object.__new__
+        result = []
+        for dct in lst:
+            if tuple(dct) == keys:
+                obj = new(cls)
+                obj.__dict__ = make(dct)
             else:
-                setattr(self, attr.field_name, attr.parse(v))
+                obj = cls(dct)
+            result.append(obj)
+        return result
+
+    def to_bytes(self):
+        """Encode this object with :mod:`osuapi.serialization`."""
+        from .serialization import codec
+        return codec(type(self)).encode(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode an object encoded by :meth:`to_bytes`."""
+        from .serialization import codec
+        return codec(cls).decode(data)
 
     def _iterator(self):
         for attr in dir(self):
@@ -59,13 +201,68 @@ class AttributeModel(object, metaclass=AttributeModelMeta):
         return self._iterator()
 
 
-def JsonList(oftype):
-    """Generate a converter that accepts a list of :oftype.
+class LazyList(Sequence):
+    """List whose items are converted from json the first time they're read.
 
-    field = JsonList(int) would expect to be passed a list of things to convert to int"""
-    def _(lst):
-        return [oftype(entry) for entry in lst]
+    Made by ``JsonList(oftype, lazy=True)``. Converted items are kept, so each
+    one is converted at most once. Compares equal to a list of the same items."""
+
+    __slots__ = ("_raw", "_items", "_oftype")
+
+    def __init__(self, raw, oftype):
+        self._raw = raw
+        self._items = None
+        self._oftype = oftype
 
+    def __len__(self):
+        return len(self._raw)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._raw)))]
+        if self._items is None:
+            self._items = [_UNCONVERTED] * len(self._raw)
+        item = self._items[i]
+        if item is _UNCONVERTED:
+            item = self._items[i] = self._oftype(self._raw[i])
+        return item
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyList)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __getstate__(self):
+        return self._raw, self._items, self._oftype
+
+    def __setstate__(self, state):
+        self._raw, self._items, self._oftype = state
+
+
+_UNCONVERTED = object()
+
+
+def JsonList(oftype, lazy=False):
+    """Generate a converter that accepts a list of :oftype.
+
+    field = JsonList(int) would expect to be passed a list of things to convert to int.
+    With :lazy, the converter returns a :class:`LazyList` instead, for fields that are
+    expensive to convert and seldom read."""
+    if lazy:
+        def _(lst):
+            return LazyList(lst, oftype)
+    elif isinstance(oftype, AttributeModelMeta) and oftype.__init__ is AttributeModel.__init__:
+        def _(lst):
+            return oftype._from_list(lst)
+    else:
+        def _(lst):
+            return [oftype(entry) for entry in lst]
+
+    _.factory = JsonList
+    _.oftype = oftype
     return _
 
 
@@ -74,6 +271,55 @@ def CsvList(oftype):
     def _(lst):
         return [oftype(entry) for entry in lst.split(",")]
 
+    _.factory = CsvList
+    _.oftype = oftype
+    return _
+
+
+_interned = weakref.WeakSet()
+_interning = True
+
+
+def set_interning(enabled):
+    """Turn sharing of equal values by :func:`Interned` converters on or off.
+
+    Each converter keeps every value it shares alive for as long as the
+    process runs, up to its maxsize (65536 for the model fields), so a long
+    running process parsing many users ends up holding that many names.
+    Turning interning off also clears the values kept so far."""
+    global _interning
+    _interning = enabled
+    if not enabled:
+        clear_interned()
+
+
+def clear_interned():
+    """Forget the values kept by every :func:`Interned` converter."""
+    for converter in list(_interned):
+        converter.table.clear()
+
+
+def Interned(oftype, maxsize=1 << 16):
+    """Generate a converter of :oftype that shares equal values between objects.
+
+    field = Attribute(Interned(str)) for strings repeated across many responses,
+    like a country or mapper name. Each converter remembers up to :maxsize
+    distinct values, values first seen after that aren't shared. See
+    :func:`set_interning` and :func:`clear_interned` to release them."""
+    table = {}
+
+    def _(it):
+        value = oftype(it)
+        if not _interning:
+            return value
+        if len(table) < maxsize:
+            return table.setdefault(value, value)
+        return table.get(value, value)
+
+    _.factory = Interned
+    _.oftype = oftype
+    _.table = table
+    _interned.add(_)
     return _
 
 
@@ -87,6 +333,8 @@ def Nullable(oftype):
         else:
             return oftype(it)
 
+    _.factory = Nullable
+    _.oftype = oftype
     return _
 
 
@@ -96,9 +344,22 @@ def PreProcessInt(oftype):
     field = PreProcessInt(MyEnum) if field is a string in the json response to be interpteded as int"""
     def _(it):
         return oftype(int(it))
+    _.factory = PreProcessInt
+    _.oftype = oftype
     return _
 
 
+def unwrap(converter):
+    """Split a converter into the factories applied and the innermost type.
+
+    unwrap(Nullable(PreProcessInt(OsuMod))) == ([Nullable, PreProcessInt], OsuMod)"""
+    factories = []
+    while hasattr(converter, "factory"):
+        factories.append(converter.factory)
+        converter = converter.oftype
+    return factories, converter
+
+
 def DateConverter(val):
     """Converter to convert osu! api's date type into datetime."""
     return datetime.datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,142 @@
+"""Difficulty settings of beatmaps with mods applied.
+
+The api returns a beatmap's settings without mods. :func:`with_mods` (also
+available as :meth:`osuapi.model.Beatmap.with_mods`) applies Easy, HardRock,
+DoubleTime/Nightcore and HalfTime, results are cached per beatmap and
+combination of those mods.
+
+.. code:: python
+
+    beatmap.with_mods(OsuMod.HardRock | OsuMod.DoubleTime).diff_approach  # 10.33
+
+    # many beatmaps at once, as columns
+    adjusted = with_mods_many(beatmaps, OsuMod.DoubleTime)
+    adjusted["bpm"]
+
+AR and OD are converted through their osu!standard timing windows, so
+DoubleTime AR 9 becomes AR 10.33, not 13.5.
+"""
+import collections
+import functools
+import math
+
+from .enums import OsuMod
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#: Mods that change difficulty settings; other mods give the nomod result.
+DIFFICULTY_MODS = OsuMod.Easy | OsuMod.HardRock | OsuMod.DoubleTime | OsuMod.HalfTime
+
+COLUMNS = ("diff_approach", "diff_overall", "diff_size", "diff_drain", "bpm", "total_length", "hit_length")
+
+ModdedDifficulty = collections.namedtuple("ModdedDifficulty", ("beatmap_id", "mods") + COLUMNS)
+ModdedDifficulty.__doc__ = """Settings of a beatmap with mods applied.
+
+Field names match :class:`osuapi.model.Beatmap`. mods only has the mods in
+:data:`DIFFICULTY_MODS` set."""
+
+
+def _factors(bits):
+    """(rate, AR/OD/HP scale, CS scale) for a combination of mod bits."""
+    rate = 1.5 if bits & OsuMod.DoubleTime.value else 0.75 if bits & OsuMod.HalfTime.value else 1.0
+    if bits & OsuMod.HardRock.value:
+        return rate, 1.4, 1.3
+    if bits & OsuMod.Easy.value:
+        return rate, 0.5, 0.5
+    return rate, 1.0, 1.0
+
+
+def _ar(ar, rate):
+    ms = (1800 - 120 * ar if ar < 5 else 1200 - 150 * (ar - 5)) / rate
+    return (1800 - ms) / 120 if ms > 1200 else 5 + (1200 - ms) / 150
+
+
+def _od(od, rate):
+    return (80 - (80 - 6 * od) / rate) / 6
+
+
+def _settings(bits, ar, od, cs, hp, bpm, total_length, hit_length):
+    rate, scale, cs_scale = _factors(bits)
+    ar = min(ar * scale, 10.0)
+    od = min(od * scale, 10.0)
+    if rate != 1.0:
+        ar, od = _ar(ar, rate), _od(od, rate)
+    return (ar, od, min(cs * cs_scale, 10.0), min(hp * scale, 10.0),
+            bpm * rate, math.floor(total_length / rate), math.floor(hit_length / rate))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _adjust(beatmap_id, bits, *settings):
+    return ModdedDifficulty(beatmap_id, OsuMod(bits), *_settings(bits, *settings))
+
+
+def _bits(mods):
+    return (mods.value if isinstance(mods, OsuMod) else mods) & DIFFICULTY_MODS.value
+
+
+def with_mods(beatmap, mods):
+    """Settings of a :class:`osuapi.model.Beatmap` with mods applied.
+
+    Parameters
+    ----------
+    beatmap : :class:`osuapi.model.Beatmap`
+        Beatmap to adjust.
+    mods : :class:`osuapi.enums.OsuMod` or int
+        Mods to apply, mods that don't change settings are ignored.
+
+    Returns
+    -------
+    :class:`ModdedDifficulty`
+    """
+    return _adjust(beatmap.beatmap_id, _bits(mods), beatmap.diff_approach, beatmap.diff_overall,
+                   beatmap.diff_size, beatmap.diff_drain, beatmap.bpm, beatmap.total_length, beatmap.hit_length)
+
+
+def adjust_columns(columns, mods):
+    """Apply mods to columns of settings.
+
+    Parameters
+    ----------
+    columns : dict
+        Maps each name in :data:`COLUMNS` to a sequence of values, one per
+        beatmap. numpy arrays are computed without a Python loop.
+    mods : :class:`osuapi.enums.OsuMod` or int
+        Mods applied to every beatmap.
+
+    Returns
+    -------
+    dict
+        The same names mapped to adjusted values, numpy arrays if numpy is
+        installed, otherwise lists.
+    """
+    bits = _bits(mods)
+    if numpy is None:
+        rows = [_settings(bits, *row) for row in zip(*(columns[name] for name in COLUMNS))]
+        return {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+
+    rate, scale, cs_scale = _factors(bits)
+    ar, od, cs, hp, bpm, total_length, hit_length = (numpy.asarray(columns[name], dtype=numpy.float64)
+                                                     for name in COLUMNS)
+    ar = numpy.minimum(ar * scale, 10.0)
+    od = numpy.minimum(od * scale, 10.0)
+    if rate != 1.0:
+        ms = numpy.where(ar < 5, 1800 - 120 * ar, 1200 - 150 * (ar - 5)) / rate
+        ar = numpy.where(ms > 1200, (1800 - ms) / 120, 5 + (1200 - ms) / 150)
+        od = (80 - (80 - 6 * od) / rate) / 6
+    return {
+        "diff_approach": ar,
+        "diff_overall": od,
+        "diff_size": numpy.minimum(cs * cs_scale, 10.0),
+        "diff_drain": numpy.minimum(hp * scale, 10.0),
+        "bpm": bpm * rate,
+        "total_length": numpy.floor(total_length / rate).astype(numpy.int64),
+        "hit_length": numpy.floor(hit_length / rate).astype(numpy.int64),
+    }
+
+
+def with_mods_many(beatmaps, mods):
+    """:func:`adjust_columns` for a sequence of :class:`osuapi.model.Beatmap`."""
+    return adjust_columns({name: [getattr(beatmap, name) for beatmap in beatmaps] for name in COLUMNS}, mods)
@@ -1,5 +1,32 @@
+def _bad_import_class(msg):
+    """Stand-in for a class whose optional dependency isn't installed, raising msg when used."""
+    class _BadImportClass:
+        def __init__(self, *args, **kwargs):
+            raise NotImplementedError(msg)
+    return _BadImportClass
+
+
 class HTTPError(Exception):
     def __init__(self, code, reason, body):
         self.code = code
         self.reason = reason
         self.body = body
+
+
+class CircuitOpenError(Exception):
+    """Raised by :class:`osuapi.breaker.BreakerConnector` instead of making a request
+    while an endpoint's circuit is open.
+
+    ``retry_after`` is the number of seconds until a request is let through
+    again, 0 while one is already testing the endpoint."""
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class RequestShedError(Exception):
+    """Raised by :class:`osuapi.breaker.BreakerConnector` instead of making a low
+    priority request while too many requests are in flight."""
+    def __init__(self, endpoint, in_flight):
+        self.endpoint = endpoint
+        self.in_flight = in_flight
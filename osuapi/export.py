@@ -0,0 +1,203 @@
+"""Export of multiplayer matches as flat tables.
+
+:class:`MatchExporter` writes :class:`osuapi.model.Match` objects into three
+tables in a directory, one row per match, per game and per score:
+
+``matches``
+    The fields of :class:`osuapi.model.MatchMetadata`.
+``games``
+    ``match_id`` followed by the fields of :class:`osuapi.model.Game`.
+``scores``
+    ``match_id`` and ``game_id`` followed by the fields of :class:`osuapi.model.TeamScore`.
+
+.. code:: python
+
+    with MatchExporter("owc2018", format="parquet") as exporter:
+        for match_id in match_ids:
+            exporter.write(api.get_match(match_id))
+
+Columns and their types come from the model definitions (see :data:`TABLES`),
+so every file has the same schema however many matches went into it. Rows are
+written out every ``batch_size`` rows, keeping memory bounded however many
+matches are exported.
+
+Parquet and Arrow need ``pyarrow``, CSV files are written with :mod:`csv`.
+Enums and mods are written as their int values; in CSV, dates are written as
+``YYYY-MM-DD HH:MM:SS`` and nulls as empty cells.
+"""
+import collections
+import csv
+import os
+
+from .model import Game, MatchMetadata, TeamScore
+from .serialization import codec
+
+Column = collections.namedtuple("Column", "name kind nullable")
+Column.__doc__ = """A column of an exported table.
+
+kind is one of ``int``, ``float``, ``bool``, ``str``, ``date``, ``enum`` or ``flags``.
+Only the ids the exporter adds aren't nullable: a response can lack any field
+of a model, not just the ones the api sends as null."""
+
+
+def _columns(model, keys=()):
+    columns = [Column(name, "int", False) for name in keys]
+    for field in codec(model).fields:
+        if field.kind != "model" and not field.is_list:
+            columns.append(Column(field.name, field.kind, True))
+    return columns
+
+
+#: Table name -> list of :class:`Column`.
+TABLES = collections.OrderedDict([
+    ("matches", _columns(MatchMetadata)),
+    ("games", _columns(Game, ["match_id"])),
+    ("scores", _columns(TeamScore, ["match_id", "game_id"])),
+])
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _getter(model, columns, keys=()):
+    """Function returning the values of a model object's columns, prefixed by keys."""
+    coded = {field.name for field in codec(model).fields if field.coded}
+    getters = []
+    for column in columns[len(keys):]:
+        if column.kind in ("enum", "flags") and column.name not in coded:
+            getters.append(lambda get, name=column.name: None if get(name) is None else get(name).value)
+        else:
+            getters.append(lambda get, name=column.name: get(name))
+
+    def values(obj, *key_values):
+        get = obj.__dict__.get
+        return list(key_values) + [getter(get) for getter in getters]
+    return values
+
+
+class _CsvTable:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([column.name for column in columns])
+        self._dates = [i for i, column in enumerate(columns) if column.kind == "date"]
+
+    def write(self, rows):
+        for row in rows:
+            for i in self._dates:
+                if row[i] is not None:
+                    row[i] = "{:%Y-%m-%d %H:%M:%S}".format(row[i])
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    _ARROW_TYPES = {
+        "int": pyarrow.int64(), "float": pyarrow.float64(), "bool": pyarrow.bool_(), "str": pyarrow.string(),
+        "date": pyarrow.timestamp("s"), "enum": pyarrow.int64(), "flags": pyarrow.int64()}
+
+    class _ArrowTable:
+        def __init__(self, path, columns, format):
+            self.schema = pyarrow.schema([
+                pyarrow.field(column.name, _ARROW_TYPES[column.kind], column.nullable) for column in columns])
+            if format == "parquet":
+                self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+            else:
+                self._writer = pyarrow.ipc.new_file(path, self.schema)
+
+        def write(self, rows):
+            self._writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)],
+                schema=self.schema))
+
+        def close(self):
+            self._writer.close()
+except ImportError:
+    from .errors import _bad_import_class
+    _ArrowTable = _bad_import_class("You need to install `pyarrow` to write Parquet or Arrow files")
+
+
+class MatchExporter:
+    """Writes matches to a table per level of the match.
+
+    Parameters
+    ----------
+    path : str
+        Directory to write ``matches``, ``games`` and ``scores`` files to, created if missing.
+    format : str
+        ``parquet``, ``arrow`` (Arrow IPC files) or ``csv``.
+    batch_size : int
+        Rows buffered per table before they are written.
+    """
+
+    def __init__(self, path, format="parquet", batch_size=10000):
+        if format not in FORMATS:
+            raise ValueError("Unknown format {}".format(format))
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        #: Rows written to each table so far.
+        self.counts = dict.fromkeys(TABLES, 0)
+        self._pending = {name: [] for name in TABLES}
+        self._match = _getter(MatchMetadata, TABLES["matches"])
+        self._game = _getter(Game, TABLES["games"], ["match_id"])
+        self._score = _getter(TeamScore, TABLES["scores"], ["match_id", "game_id"])
+        self._tables = {}
+        try:
+            for name, columns in TABLES.items():
+                file_path = os.path.join(path, name + FORMATS[format])
+                self._tables[name] = _CsvTable(file_path, columns) if format == "csv" else \
+                    _ArrowTable(file_path, columns, format)
+        except BaseException:
+            self.close()
+            raise
+
+    def write(self, match):
+        """Add the rows of one :class:`osuapi.model.Match`."""
+        match_id = match.match.match_id
+        self._add("matches", self._match(match.match))
+        for game in match.games or ():
+            self._add("games", self._game(game, match_id))
+            for score in game.scores or ():
+                self._add("scores", self._score(score, match_id, game.game_id))
+
+    def _add(self, table, row):
+        pending = self._pending[table]
+        pending.append(row)
+        if len(pending) >= self.batch_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        pending = self._pending[table]
+        if pending:
+            self._tables[table].write(pending)
+            self.counts[table] += len(pending)
+            self._pending[table] = []
+
+    def close(self):
+        """Write out buffered rows and close the files."""
+        for name, table in self._tables.items():
+            try:
+                self._flush(name)
+            finally:
+                table.close()
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_matches(matches, path, format="parquet", batch_size=10000):
+    """Write an iterable of matches with a :class:`MatchExporter`, returning its row counts."""
+    with MatchExporter(path, format, batch_size) as exporter:
+        for match in matches:
+            exporter.write(match)
+    return exporter.counts
@@ -0,0 +1,167 @@
+"""Parallel parsing of raw api dumps.
+
+:func:`ingest` reads json lines, such as the output of ``osuapi crawl`` or
+saved api responses, and converts them to model objects on worker
+processes. Workers send their results back encoded with
+:mod:`osuapi.serialization`, or as columns from :func:`ingest_columns`,
+rather than as pickled model objects, which would take the parent about as
+long to unpickle as parsing the json did.
+
+.. code:: python
+
+    with gzip.open("scores.jsonl.gz") as f:
+        for blob in ingest(f, SoloScore):
+            scores = codec(SoloScore).decode(blob)
+
+    with open("beatmaps.jsonl", "rb") as f:
+        columns = ingest_columns(f, Beatmap)
+    columns["difficultyrating"]  # array('d', [...])
+
+Each line holds a single row or a whole response, i.e. a list of rows.
+"""
+import array
+import collections
+import concurrent.futures
+import functools
+import json
+import os
+
+from . import rows
+from .dictmodel import JsonList
+from .serialization import codec
+
+#: Bytes of input parsed per chunk; each chunk is one task for a worker.
+CHUNK_SIZE = 1 << 20
+
+
+def _chunks(lines, size):
+    chunk, total = [], 0
+    for line in lines:
+        if not line.strip():
+            continue
+        chunk.append(line)
+        total += len(line)
+        if total >= size:
+            yield chunk
+            chunk, total = [], 0
+    if chunk:
+        yield chunk
+
+
+def _rows(lines):
+    result = []
+    for line in lines:
+        data = json.loads(line)
+        if isinstance(data, list):
+            result.extend(data)
+        else:
+            result.append(data)
+    return result
+
+
+def _encode_chunk(model, lines):
+    return codec(model).encode_many(JsonList(model)(_rows(lines)))
+
+
+_TYPECODES = {int: "q", float: "d", bool: "b"}
+
+
+def _column(values):
+    """values as an array if they are all ints, floats or bools, otherwise as a list."""
+    kinds = set(map(type, values))
+    if len(kinds) == 1:
+        typecode = _TYPECODES.get(kinds.pop())
+        if typecode is not None:
+            try:
+                return array.array(typecode, values)
+            except OverflowError:
+                pass
+    return list(values)
+
+
+def _columns_chunk(model, conversions, lines):
+    converted = rows.converter(model, conversions)(_rows(lines))
+    fields = rows.row_type(model, conversions)._fields
+    if not converted:
+        return {name: [] for name in fields}
+    return {name: _column(values) for name, values in zip(fields, zip(*converted))}
+
+
+def _map(fn, chunks, workers):
+    """fn applied to each chunk, in order, on up to workers processes."""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    workers = workers or os.cpu_count() or 1
+    # starting processes isn't worth it for a single chunk
+    if second is None or workers == 1:
+        yield fn(first)
+        if second is not None:
+            yield fn(second)
+            yield from map(fn, chunks)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        pending = collections.deque([executor.submit(fn, first), executor.submit(fn, second)])
+        for chunk in chunks:
+            pending.append(executor.submit(fn, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest(lines, model, *, workers=None, chunk_size=CHUNK_SIZE):
+    """Parse json lines into model objects on worker processes.
+
+    Parameters
+    ----------
+    lines : iterable of bytes or str
+        Json documents, one per line, e.g. a file opened in binary mode.
+    model : :class:`osuapi.dictmodel.AttributeModel` subclass
+        Model each row is parsed as.
+    workers : int
+        Number of worker processes. Defaults to the number of CPUs, 1 parses
+        everything in this process.
+    chunk_size : int
+        Bytes of input per chunk.
+
+    Returns
+    -------
+    iterator of bytes
+        One :meth:`osuapi.serialization.Codec.encode_many` payload per chunk, in input order.
+    """
+    return _map(functools.partial(_encode_chunk, model), _chunks(lines, chunk_size), workers)
+
+
+def ingest_columns(lines, model, conversions=(), *, workers=None, chunk_size=CHUNK_SIZE):
+    """Parse json lines into columns on worker processes.
+
+    Values are converted as by :mod:`osuapi.rows`, with the extra
+    conversions asked for. Columns of ints, floats or bools without nulls
+    are arrays, others lists.
+
+    Takes the other parameters of :func:`ingest`.
+
+    Returns
+    -------
+    dict
+        Field name -> values, one per row, in input order.
+    """
+    conversions = frozenset(conversions)
+    columns = {name: [] for name in rows.row_type(model, conversions)._fields}
+    for part in _map(functools.partial(_columns_chunk, model, conversions), _chunks(lines, chunk_size), workers):
+        for name, values in part.items():
+            column = columns[name]
+            if not column:
+                columns[name] = values
+            elif isinstance(column, array.array) and isinstance(values, array.array) and \
+                    column.typecode == values.typecode:
+                column.extend(values)
+            else:
+                if isinstance(column, array.array):
+                    column = columns[name] = list(column)
+                column.extend(values)
+    return columns
@@ -0,0 +1,178 @@
+"""Aggregate scores into leaderboards.
+
+A :class:`Leaderboards` keeps the top ``k`` scores of every (beatmap, mods)
+pair, counting only each user's best score, optionally split further into
+groups such as countries. Scores can be added as they are fetched, and
+leaderboards built in other processes merged in.
+
+.. code:: python
+
+    boards = Leaderboards(k=50)
+    for beatmap_id in beatmap_ids:
+        boards.add(api.get_scores(beatmap_id, mods=OsuMod.HardRock), beatmap_id=beatmap_id)
+    boards.top(129891, mods=OsuMod.HardRock)
+
+Ranking follows the game: higher score first, ties go to the score set
+first (the lower ``score_id``).
+"""
+import heapq
+
+from .enums import OsuMod
+
+
+def _mods_value(mods):
+    return mods.value if isinstance(mods, OsuMod) else mods
+
+
+class _Board:
+    """Top k entries with at most one per user.
+
+    Entries are ``(score, -score_id, user_id, obj)`` tuples in a min heap, so
+    the lowest ranked entry is on top. Entries replaced by a user's better
+    score are left in the heap and skipped when they surface."""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.best = {}
+
+    def _prune(self):
+        heap, best = self.heap, self.best
+        while heap and best.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+
+    def push(self, entry):
+        user_id = entry[2]
+        current = self.best.get(user_id)
+        if current is not None and current[:2] >= entry[:2]:
+            return
+        if current is None and len(self.best) >= self.k:
+            self._prune()
+            if self.heap[0][:2] >= entry[:2]:
+                return
+        self.best[user_id] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.best) > self.k:
+            self._prune()
+            del self.best[heapq.heappop(self.heap)[2]]
+        if len(self.heap) > 2 * self.k + 16:
+            self.heap = list(self.best.values())
+            heapq.heapify(self.heap)
+
+    def entries(self):
+        return sorted(self.best.values(), reverse=True)
+
+
+class Leaderboards:
+    """Top scores per beatmap and mod combination.
+
+    Parameters
+    ----------
+    k : int
+        Number of scores kept per leaderboard, at least 1.
+    group : callable
+        If given, called with each score and its result used as an extra
+        part of the leaderboard key, e.g. a user's country.
+    """
+
+    def __init__(self, k=50, group=None):
+        if k < 1:
+            raise ValueError("Leaderboards need to keep at least one score")
+        self.k = k
+        self.group = group
+        self._boards = {}
+
+    def _board(self, key):
+        # boards are stored per beatmap, so top() only looks at that beatmap's
+        boards = self._boards.setdefault(key[0], {})
+        try:
+            return boards[key]
+        except KeyError:
+            board = boards[key] = _Board(self.k)
+            return board
+
+    def _items(self):
+        for boards in self._boards.values():
+            yield from boards.items()
+
+    def add(self, scores, beatmap_id=None):
+        """Add scores.
+
+        Parameters
+        ----------
+        scores : iterable
+            Scores with ``enabled_mods``, such as :class:`osuapi.model.BeatmapScore`
+            or :class:`osuapi.model.SoloScore`.
+        beatmap_id : int
+            Beatmap the scores are for. Required for scores without a
+            ``beatmap_id`` attribute, like the results of ``get_scores``.
+        """
+        for score in scores:
+            key = (score.beatmap_id if beatmap_id is None else beatmap_id, score.enabled_mods.value)
+            if self.group is not None:
+                key += (self.group(score),)
+            self._board(key).push((score.score, -score.score_id, score.user_id, score))
+
+    def merge(self, other):
+        """Add every score kept by another :class:`Leaderboards`, e.g. one built in a worker process."""
+        if other.k < self.k:
+            raise ValueError("Can't merge leaderboards keeping fewer scores")
+        if (other.group is None) != (self.group is None):
+            raise ValueError("Can't merge grouped and ungrouped leaderboards")
+        for key, board in other._items():
+            mine = self._board(key)
+            for entry in board.entries()[:self.k]:
+                mine.push(entry)
+
+    def __getstate__(self):
+        # group is usually a lambda, which can't be pickled; the receiving side
+        # only needs to know whether keys carry a group.
+        return self.k, self.group is not None, {key: board.entries() for key, board in self._items()}
+
+    def __setstate__(self, state):
+        self.k, grouped, boards = state
+        self.group = _grouped if grouped else None
+        self._boards = {}
+        for key, entries in boards.items():
+            board = self._board(key)
+            for entry in entries:
+                board.push(entry)
+
+    def keys(self):
+        """The ``(beatmap_id, mods value[, group])`` keys of every leaderboard."""
+        return [key for key, _ in self._items()]
+
+    def __len__(self):
+        return sum(len(boards) for boards in self._boards.values())
+
+    def top(self, beatmap_id, mods=None, group=None):
+        """Scores on a leaderboard, best first.
+
+        Parameters
+        ----------
+        beatmap_id : int
+            Beatmap to look up.
+        mods : :class:`osuapi.enums.OsuMod` or int
+            Mod combination. If not given, the leaderboards of every mod
+            combination are combined, keeping each user's best score.
+        group
+            Group to look up, for leaderboards with a ``group`` function. If
+            not given, every group is combined.
+        """
+        mods = _mods_value(mods)
+        boards = [board for key, board in self._boards.get(beatmap_id, {}).items()
+                  if (mods is None or key[1] == mods) and
+                  (group is None or key[2] == group)]
+        if len(boards) == 1:
+            return [entry[3] for entry in boards[0].entries()]
+        seen = set()
+        result = []
+        for entry in heapq.merge(*(board.entries() for board in boards), reverse=True):
+            if entry[2] not in seen:
+                seen.add(entry[2])
+                result.append(entry[3])
+        return result[:self.k]
+
+
+def _grouped(score):
+    raise TypeError("Leaderboards were unpickled without their group function, set .group before adding scores")
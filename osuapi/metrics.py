@@ -0,0 +1,260 @@
+"""Request instrumentation.
+
+Connectors accept an ``observer`` which is notified about every request they
+make. Nothing is measured unless an observer is set.
+
+.. code:: python
+
+    metrics = MetricsObserver()
+    api = OsuApi("mykey", connector=ReqConnector(observer=metrics))
+    api.get_beatmaps()
+    metrics.latency[endpoints.BEATMAPS].percentile(0.99)
+"""
+import bisect
+import threading
+
+from .errors import _bad_import_class
+
+
+def endpoint_name(endpoint):
+    """Short name of an endpoint url, e.g. ``get_beatmaps``."""
+    return endpoint.rsplit("/", 1)[-1]
+
+
+class RequestObserver:
+    """Base class for request observers.
+
+    Every hook is a no-op, override the ones you are interested in. ``endpoint``
+    is always one of the constants in :mod:`osuapi.endpoints`.
+    """
+
+    def request_started(self, endpoint, params):
+        """Called before the first attempt of a request is made."""
+
+    def request_finished(self, endpoint, status, nbytes, retries, elapsed):
+        """Called once a request is done, successfully or not.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint requested.
+        status : Optional[int]
+            HTTP status of the final response, or None if no response was received.
+        nbytes : int
+            Size of the final response body.
+        retries : int
+            Number of times the request was retried.
+        elapsed : float
+            Seconds since :meth:`request_started`, including retries.
+        """
+
+    def response_received(self, endpoint, encoding, wire_bytes):
+        """Called after :meth:`request_finished` with the final response's
+        ``Content-Encoding`` and its size as sent over the wire, before
+        decompression."""
+
+    def response_decoded(self, endpoint, elapsed):
+        """Called with the seconds spent decoding the response json."""
+
+    def response_parsed(self, endpoint, elapsed):
+        """Called with the seconds spent building model objects from the json."""
+
+
+LATENCY_BUCKETS = tuple(0.0005 * 2 ** i for i in range(18))  # 0.5ms to ~65s
+SIZE_BUCKETS = tuple(256 * 2 ** i for i in range(18))  # 256B to 32MiB
+
+
+class Histogram:
+    """Fixed bucket histogram.
+
+    Parameters
+    ----------
+    bounds : tuple
+        Sorted upper bounds of each bucket. Values larger than the last bound
+        are counted in an overflow bucket.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the observations of another histogram with the same buckets."""
+        if other.bounds != self.bounds:
+            raise ValueError("Can only merge histograms with the same bounds")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th quantile (0 <= q <= 1)."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def __repr__(self):
+        return "<Histogram count={0.count} mean={0.mean} max={0.max}>".format(self)
+
+
+class MetricsObserver(RequestObserver):
+    """In-memory observer keeping a histogram per endpoint.
+
+    Attributes
+    ----------
+    latency : dict[str, Histogram]
+        Seconds per request, including retries.
+    size : dict[str, Histogram]
+        Response body size in bytes.
+    wire_size : dict[str, Histogram]
+        Response size in bytes as transferred, before decompression.
+    encodings : dict[tuple[str, str], int]
+        Response count per ``(endpoint, content encoding)``.
+    decode : dict[str, Histogram]
+        Seconds spent decoding json.
+    parse : dict[str, Histogram]
+        Seconds spent building model objects.
+    retries : dict[str, int]
+        Total retries.
+    statuses : dict[tuple[str, int], int]
+        Response count per ``(endpoint, status)``.
+    in_flight : dict[str, int]
+        Requests started but not yet finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.size = {}
+        self.wire_size = {}
+        self.encodings = {}
+        self.decode = {}
+        self.parse = {}
+        self.retries = {}
+        self.statuses = {}
+        self.in_flight = {}
+
+    @staticmethod
+    def _histogram(table, endpoint, bounds=LATENCY_BUCKETS):
+        try:
+            return table[endpoint]
+        except KeyError:
+            hist = table[endpoint] = Histogram(bounds)
+            return hist
+
+    def request_started(self, endpoint, params):
+        with self._lock:
+            self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + 1
+
+    def request_finished(self, endpoint, status, nbytes, retries, elapsed):
+        with self._lock:
+            self.in_flight[endpoint] -= 1
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + retries
+            key = (endpoint, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self._histogram(self.latency, endpoint).observe(elapsed)
+            self._histogram(self.size, endpoint, SIZE_BUCKETS).observe(nbytes)
+
+    def response_received(self, endpoint, encoding, wire_bytes):
+        with self._lock:
+            key = (endpoint, encoding)
+            self.encodings[key] = self.encodings.get(key, 0) + 1
+            self._histogram(self.wire_size, endpoint, SIZE_BUCKETS).observe(wire_bytes)
+
+    def response_decoded(self, endpoint, elapsed):
+        with self._lock:
+            self._histogram(self.decode, endpoint).observe(elapsed)
+
+    def response_parsed(self, endpoint, elapsed):
+        with self._lock:
+            self._histogram(self.parse, endpoint).observe(elapsed)
+
+    def summary(self):
+        """Return a dict of per endpoint request count, p50 and p99 latency."""
+        with self._lock:
+            return {
+                endpoint_name(endpoint): dict(
+                    count=hist.count,
+                    p50=hist.percentile(0.5),
+                    p99=hist.percentile(0.99),
+                    retries=self.retries.get(endpoint, 0))
+                for endpoint, hist in self.latency.items()}
+
+
+try:
+    import prometheus_client
+
+    class PrometheusObserver(RequestObserver):
+        """Observer exporting to prometheus_client metrics, labelled by endpoint name.
+
+        Parameters
+        ----------
+        registry
+            The prometheus_client registry to register metrics with. Defaults to the
+            global registry.
+        namespace : str
+            Prefix for the metric names.
+        """
+        def __init__(self, registry=prometheus_client.REGISTRY, namespace="osuapi"):
+            kw = dict(namespace=namespace, registry=registry)
+            self.requests = prometheus_client.Counter(
+                "requests", "Requests made", ["endpoint", "status"], **kw)
+            self.retries = prometheus_client.Counter(
+                "retries", "Requests retried", ["endpoint"], **kw)
+            self.in_flight = prometheus_client.Gauge(
+                "requests_in_flight", "Requests in flight", ["endpoint"], **kw)
+            self.latency = prometheus_client.Histogram(
+                "request_seconds", "Request latency", ["endpoint"], buckets=LATENCY_BUCKETS, **kw)
+            self.size = prometheus_client.Histogram(
+                "response_bytes", "Response body size", ["endpoint"], buckets=SIZE_BUCKETS, **kw)
+            self.wire_size = prometheus_client.Histogram(
+                "response_wire_bytes", "Response size before decompression", ["endpoint", "encoding"],
+                buckets=SIZE_BUCKETS, **kw)
+            self.decode = prometheus_client.Histogram(
+                "decode_seconds", "Json decode time", ["endpoint"], buckets=LATENCY_BUCKETS, **kw)
+            self.parse = prometheus_client.Histogram(
+                "parse_seconds", "Model build time", ["endpoint"], buckets=LATENCY_BUCKETS, **kw)
+
+        def request_started(self, endpoint, params):
+            self.in_flight.labels(endpoint_name(endpoint)).inc()
+
+        def request_finished(self, endpoint, status, nbytes, retries, elapsed):
+            name = endpoint_name(endpoint)
+            self.in_flight.labels(name).dec()
+            self.requests.labels(name, str(status)).inc()
+            if retries:
+                self.retries.labels(name).inc(retries)
+            self.latency.labels(name).observe(elapsed)
+            self.size.labels(name).observe(nbytes)
+
+        def response_received(self, endpoint, encoding, wire_bytes):
+            self.wire_size.labels(endpoint_name(endpoint), encoding).observe(wire_bytes)
+
+        def response_decoded(self, endpoint, elapsed):
+            self.decode.labels(endpoint_name(endpoint)).observe(elapsed)
+
+        def response_parsed(self, endpoint, elapsed):
+            self.parse.labels(endpoint_name(endpoint)).observe(elapsed)
+except ImportError:
+    PrometheusObserver = _bad_import_class(
+        "You need to install `prometheus_client` to use osuapi.metrics.PrometheusObserver")
@@ -1,7 +1,8 @@
 """Different classes to parse dicts/lists returned from json into meaningful data objects."""
 
 from .enums import *
-from .dictmodel import AttributeModel, Attribute, JsonList, CsvList, Nullable, PreProcessInt, DateConverter
+from .dictmodel import AttributeModel, Attribute, EnumAttribute, JsonList, CsvList, Nullable, PreProcessInt, DateConverter, \
+    Interned
 
 
 class Score(AttributeModel):
@@ -57,7 +58,7 @@ class Score(AttributeModel):
     countgeki = Attribute(int)
     perfect = Attribute(PreProcessInt(bool))
     user_id = Attribute(int)
-    rank = Attribute(str)
+    rank = Attribute(Interned(str))
 
     def accuracy(self, mode: OsuMode):
         """Calculated accuracy.
@@ -104,7 +105,7 @@ class TeamScore(Score):
     """
     slot = Attribute(int)
     team = Attribute(int)
-    enabled_mods = Attribute(PreProcessInt(OsuMod))
+    enabled_mods = EnumAttribute(PreProcessInt(OsuMod))
     passed = Attribute(PreProcessInt(bool), name="pass")
 
     def __repr__(self):
@@ -130,7 +131,7 @@ class RecentScore(Score):
     <https://osu.ppy.sh/wiki/Score>
     """
     beatmap_id = Attribute(int)
-    enabled_mods = Attribute(PreProcessInt(OsuMod))
+    enabled_mods = EnumAttribute(PreProcessInt(OsuMod))
     date = Attribute(DateConverter)
 
     def __repr__(self):
@@ -161,7 +162,7 @@ class SoloScore(Score):
     """
     beatmap_id = Attribute(int)
     pp = Attribute(Nullable(float))
-    enabled_mods = Attribute(PreProcessInt(OsuMod))
+    enabled_mods = EnumAttribute(PreProcessInt(OsuMod))
     score_id = Attribute(int)
     date = Attribute(DateConverter)
     replay_available = Attribute(PreProcessInt(bool))
@@ -200,9 +201,9 @@ class BeatmapScore(Score):
     ---------
     <https://osu.ppy.sh/wiki/Score>
     """
-    username = Attribute(str)
+    username = Attribute(Interned(str))
     pp = Attribute(Nullable(float))
-    enabled_mods = Attribute(PreProcessInt(OsuMod))
+    enabled_mods = EnumAttribute(PreProcessInt(OsuMod))
     date = Attribute(DateConverter)
     score_id = Attribute(int)
     replay_available = Attribute(PreProcessInt(bool))
@@ -289,8 +290,9 @@ class User(AttributeModel):
         Country the user is registered to.
     pp_country_rank : int
         Country ranking place.
-    events : list[dict]
-        Information about recent "interesting" events.
+    events : Sequence[:class:`UserEvent`]
+        Information about recent "interesting" events. Each event is parsed
+        the first time it is read.
 
     See Also
     ---------
@@ -298,7 +300,7 @@ class User(AttributeModel):
 
     """
     user_id = Attribute(int)
-    username = Attribute(str)
+    username = Attribute(Interned(str))
     count300 = Attribute(Nullable(int))
     count100 = Attribute(Nullable(int))
     count50 = Attribute(Nullable(int))
@@ -315,9 +317,9 @@ class User(AttributeModel):
     count_rank_sh = Attribute(Nullable(int))
     count_rank_s = Attribute(Nullable(int))
     count_rank_a = Attribute(Nullable(int))
-    country = Attribute(str)
+    country = Attribute(Interned(str))
     pp_country_rank = Attribute(int)
-    events = Attribute(JsonList(UserEvent))
+    events = Attribute(JsonList(UserEvent, lazy=True))
     join_date = Attribute(DateConverter)
 
     @property
@@ -339,6 +341,45 @@ class User(AttributeModel):
         return "https://s.ppy.sh/a/{0.user_id}".format(self)
 
 
+class UserModes:
+    """A user's profiles in every game mode, as returned by :meth:`osuapi.OsuApi.get_user_all_modes`.
+
+    The fields in :data:`SHARED_FIELDS` are kept once here, and the
+    :class:`User` of each mode refers to the same objects instead of its own copies.
+
+    Supports ``user_modes[OsuMode.taiko]``, ``in``, ``len`` and iteration over the modes.
+
+    Attributes
+    ----------
+    modes : dict[:class:`osuapi.enums.OsuMode`, :class:`User`]
+        Profile in each mode the api returned one for.
+    """
+    SHARED_FIELDS = ("user_id", "username", "country", "join_date", "events")
+
+    def __init__(self, modes):
+        self.modes = modes
+        first = next(iter(modes.values()))
+        shared = {name: first.__dict__[name] for name in self.SHARED_FIELDS if name in first.__dict__}
+        self.__dict__.update(shared)
+        for user in modes.values():
+            user.__dict__.update(shared)
+
+    def __getitem__(self, mode):
+        return self.modes[mode]
+
+    def __contains__(self, mode):
+        return mode in self.modes
+
+    def __iter__(self):
+        return iter(self.modes)
+
+    def __len__(self):
+        return len(self.modes)
+
+    def __repr__(self):
+        return "<{0.__module__}.UserModes username={0.username} user_id={0.user_id}>".format(self)
+
+
 class Beatmap(AttributeModel):
     """Class representing a beatmap
 
@@ -437,12 +478,12 @@ class Beatmap(AttributeModel):
     approved_date = Attribute(Nullable(DateConverter))
     submit_date = Attribute(DateConverter)
     last_update = Attribute(DateConverter)
-    artist = Attribute(str)
-    artist_unicode = Attribute(str)
+    artist = Attribute(Interned(str))
+    artist_unicode = Attribute(Interned(str))
     beatmap_id = Attribute(int)
     beatmapset_id = Attribute(int)
     bpm = Attribute(float)
-    creator = Attribute(str)
+    creator = Attribute(Interned(str))
     creator_id = Attribute(int)
     difficultyrating = Attribute(float)
     diff_aim = Attribute(Nullable(float))
@@ -452,7 +493,7 @@ class Beatmap(AttributeModel):
     diff_approach = Attribute(float)
     diff_drain = Attribute(float)
     hit_length = Attribute(int)
-    source = Attribute(str)
+    source = Attribute(Interned(str))
     genre_id = Attribute(PreProcessInt(BeatmapGenre))
     language_id = Attribute(PreProcessInt(BeatmapLanguage))
     title = Attribute(str)
@@ -495,6 +536,13 @@ class Beatmap(AttributeModel):
     def cover_thumbnail(self):
         return "https://b.ppy.sh/thumb/{0.beatmapset_id}l.jpg".format(self)
 
+    def with_mods(self, mods):
+        """Difficulty settings with mods applied.
+
+        See :func:`osuapi.difficulty.with_mods`"""
+        from . import difficulty
+        return difficulty.with_mods(self, mods)
+
 
 class MatchMetadata(AttributeModel):
     """Class representing info about a match.
@@ -553,7 +601,7 @@ class Game(AttributeModel):
     match_type = Attribute(str)  # not sure what this is?
     scoring_type = Attribute(PreProcessInt(ScoringType))
     team_type = Attribute(PreProcessInt(TeamType))
-    mods = Attribute(PreProcessInt(OsuMod))
+    mods = EnumAttribute(PreProcessInt(OsuMod))
     scores = Attribute(JsonList(TeamScore))
 
     def __repr__(self):
@@ -1,6 +1,5 @@
-from .model import User, BeatmapScore, RecentScore, Score, SoloScore, JsonList, OsuMode, Beatmap, Match
-from . import endpoints
-from .connectors import *
+from .model import User, UserModes, BeatmapScore, RecentScore, Score, SoloScore, JsonList, OsuMode, Beatmap, Match
+from . import endpoints, rows
 import warnings
 
 def _username_type(username):
@@ -8,6 +7,15 @@ def _username_type(username):
         return None
     return "id" if isinstance(username, int) else "string"
 
+def _result_type(model, as_tuples, many=True):
+    if not as_tuples:
+        return JsonList(model) if many else model
+    return rows.converter(model, () if as_tuples is True else as_tuples, many=many)
+
+async def _gathered(results, combine):
+    import asyncio
+    return combine(await asyncio.gather(*results))
+
 class OsuApi:
     """osu! api client.
 
@@ -30,7 +38,22 @@ class OsuApi:
     def _make_req(self, endpoint, data, type_):
         return self.connector.process_request(endpoint, {k: v for k, v in data.items() if v is not None}, type_)
 
-    def get_user(self, username, *, mode=OsuMode.osu, event_days=31):
+    def _make_reqs(self, reqs, combine):
+        """Make several requests at once, returning combine called with the list of results.
+
+        reqs are (endpoint, data, type_) tuples. With an asynchronous connector
+        a coroutine is returned, otherwise the requests are made on threads."""
+        if getattr(self.connector, "asynchronous", False):
+            return _gathered([self._make_req(*req) for req in reqs], combine)
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(len(reqs)) as pool:
+            results = list(pool.map(lambda req: self._make_req(*req), reqs))
+        # a connector wrapping an asynchronous one can return coroutines without saying so
+        if any(hasattr(result, "__await__") for result in results):
+            return _gathered(results, combine)
+        return combine(results)
+
+    def get_user(self, username, *, mode=OsuMode.osu, event_days=31, as_tuples=False):
         """Get a user profile.
 
         Parameters
@@ -40,7 +63,12 @@ class OsuApi:
         mode : :class:`osuapi.enums.OsuMode`
             The osu! game mode for which to look up. Defaults to osu!standard.
         event_days : int
-            The number of days in the past to look for events. Defaults to 31 (the maximum).
+            The number of days in the past to look for events, between 1 and 31. Defaults to 31
+            (the maximum). Events are only parsed when read, pass 1 for lookups that don't read
+            them to also keep the response small.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
         """
         return self._make_req(endpoints.USER, dict(
             k=self.key,
@@ -48,9 +76,46 @@ class OsuApi:
             type=_username_type(username),
             m=mode.value,
             event_days=event_days
-            ), JsonList(User))
+            ), _result_type(User, as_tuples))
+
+    def get_user_all_modes(self, username, *, event_days=31, as_tuples=False):
+        """Get a user's profile in every game mode, requesting all modes at once.
+
+        Parameters
+        ----------
+        username : str or int
+            A `str` representing the user's username, or an `int` representing the user's id.
+        event_days : int
+            The number of days in the past to look for events, between 1 and 31. Defaults to 31
+            (the maximum). Events are only parsed when read, pass 1 for lookups that don't read
+            them to also keep the response small.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
+
+        Returns
+        -------
+        :class:`osuapi.model.UserModes`
+            Or None if the user doesn't exist. With as_tuples, a dict of
+            :class:`osuapi.enums.OsuMode` to row instead.
+        """
+        modes = list(OsuMode)
+
+        def combine(results):
+            found = {mode: users[0] for mode, users in zip(modes, results) if users}
+            if not found:
+                return None
+            return found if as_tuples else UserModes(found)
+
+        return self._make_reqs([(endpoints.USER, dict(
+            k=self.key,
+            u=username,
+            type=_username_type(username),
+            m=mode.value,
+            event_days=event_days
+            ), _result_type(User, as_tuples)) for mode in modes], combine)
 
-    def get_user_best(self, username, *, mode=OsuMode.osu, limit=50):
+    def get_user_best(self, username, *, mode=OsuMode.osu, limit=50, as_tuples=False):
         """Get a user's best scores.
 
         Parameters
@@ -61,6 +126,9 @@ class OsuApi:
             The osu! game mode for which to look up. Defaults to osu!standard.
         limit
             The maximum number of results to return. Defaults to 50, maximum 100.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
         """
         return self._make_req(endpoints.USER_BEST, dict(
             k=self.key,
@@ -68,9 +136,9 @@ class OsuApi:
             type=_username_type(username),
             m=mode.value,
             limit=limit
-            ), JsonList(SoloScore))
+            ), _result_type(SoloScore, as_tuples))
 
-    def get_user_recent(self, username, *, mode=OsuMode.osu, limit=10):
+    def get_user_recent(self, username, *, mode=OsuMode.osu, limit=10, as_tuples=False):
         """Get a user's most recent scores, within the last 24 hours.
 
         Parameters
@@ -81,6 +149,9 @@ class OsuApi:
             The osu! game mode for which to look up. Defaults to osu!standard.
         limit
             The maximum number of results to return. Defaults to 10, maximum 50.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
         """
         return self._make_req(endpoints.USER_RECENT, dict(
             k=self.key,
@@ -88,9 +159,9 @@ class OsuApi:
             type=_username_type(username),
             m=mode.value,
             limit=limit
-            ), JsonList(RecentScore))
+            ), _result_type(RecentScore, as_tuples))
 
-    def get_scores(self, beatmap_id, *, username=None, mode=OsuMode.osu, mods=None, limit=50):
+    def get_scores(self, beatmap_id, *, username=None, mode=OsuMode.osu, mods=None, limit=50, as_tuples=False):
         """Get the top scores for a given beatmap.
 
         Parameters
@@ -105,6 +176,9 @@ class OsuApi:
             If specified, restricts returned scores to the specified mods.
         limit
             Number of results to return. Defaults to 50, maximum 100.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
         """
         return self._make_req(endpoints.SCORES, dict(
             k=self.key,
@@ -113,10 +187,10 @@ class OsuApi:
             type=_username_type(username),
             m=mode.value,
             mods=mods.value if mods else None,
-            limit=limit), JsonList(BeatmapScore))
+            limit=limit), _result_type(BeatmapScore, as_tuples))
 
     def get_beatmaps(self, *, since=None, beatmapset_id=None, beatmap_id=None, username=None, mode=None,
-                     include_converted=False, beatmap_hash=None, limit=500):
+                     include_converted=False, beatmap_hash=None, limit=500, as_tuples=False):
         """Get beatmaps.
 
         Parameters
@@ -138,6 +212,9 @@ class OsuApi:
             If specified, restricts results to a specific beatmap hash.
         limit
             Number of results to return. Defaults to 500, maximum 500.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
         """
         return self._make_req(endpoints.BEATMAPS, dict(
             k=self.key,
@@ -150,16 +227,20 @@ class OsuApi:
             a=int(include_converted),
             h=beatmap_hash,
             limit=limit
-            ), JsonList(Beatmap))
+            ), _result_type(Beatmap, as_tuples))
 
-    def get_match(self, match_id):
+    def get_match(self, match_id, *, as_tuples=False):
         """Get a multiplayer match.
 
         Parameters
         ----------
         match_id
             The ID of the match to retrieve. This is the ID that you see in a online multiplayer match summary.
-            This does not correspond the in-game game ID."""
+            This does not correspond the in-game game ID.
+        as_tuples : bool or set of str
+            Return rows from :mod:`osuapi.rows` instead of model objects. Pass
+            ``{"dates", "enums"}`` or either one to also convert those fields.
+        """
         return self._make_req(endpoints.MATCH, dict(
             k=self.key,
-            mp=match_id), Match)
+            mp=match_id), _result_type(Match, as_tuples, many=False))
@@ -0,0 +1,186 @@
+"""Recompute profile totals from best scores in bulk.
+
+:func:`profiles` takes the ``get_user_best`` results of many users and
+computes each user's weighted pp, bonus pp, weighted accuracy and rank
+counts.
+
+.. code:: python
+
+    best = {user_id: api.get_user_best(user_id, limit=100) for user_id in user_ids}
+    for user_id, profile in profiles(best).items():
+        print(user_id, profile.total_pp)
+
+Scores can also be passed as :class:`ScoreColumns`, one flat array per
+value plus the offset of each user's scores, which avoids building model
+objects and is what gets sent to worker processes. If numpy is installed
+it is used to compute every user at once.
+
+The n-th best score (from 0) is weighted by ``0.95 ** n``. Bonus pp is
+``416.6667 * (1 - 0.9994 ** count)`` for a user with ``count`` ranked scores.
+"""
+import collections
+import concurrent.futures
+import math
+import operator
+import os
+
+from .enums import OsuMode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WEIGHT = 0.95
+BONUS_FACTOR = 416.6667
+BONUS_BASE = 0.9994
+
+#: Users per batch above which :func:`profiles` uses worker processes.
+PARALLEL_THRESHOLD = 5000
+
+# fewest users sent to a worker at once
+_MIN_CHUNK = 1000
+
+RANKS = ("XH", "X", "SH", "S", "A", "B", "C", "D")
+_RANK_CODES = {rank: code for code, rank in enumerate(RANKS)}
+
+Profile = collections.namedtuple("Profile", "pp bonus_pp total_pp accuracy ranks")
+Profile.__doc__ = """Totals computed for one user.
+
+pp is the weighted sum of the scores' pp, accuracy the weighted average of
+their accuracy (between 0 and 1) and ranks a dict of rank -> number of scores."""
+
+ScoreColumns = collections.namedtuple("ScoreColumns", "user_ids offsets pp accuracy ranks")
+ScoreColumns.__doc__ = """Best scores of many users as flat columns.
+
+The scores of ``user_ids[i]`` are at ``offsets[i]:offsets[i + 1]`` of pp,
+accuracy and ranks. ranks holds indexes into :data:`RANKS`. Scores don't
+need to be sorted."""
+
+_weights = [1.0]
+
+
+def _weight_table(n):
+    while len(_weights) < n:
+        _weights.append(_weights[-1] * WEIGHT)
+    return _weights
+
+
+def bonus_pp(count):
+    """Bonus pp for a number of ranked scores."""
+    return BONUS_FACTOR * (1 - BONUS_BASE ** count)
+
+
+def columns(best, mode=OsuMode.osu):
+    """Convert a dict of user_id -> list of :class:`osuapi.model.SoloScore` to :class:`ScoreColumns`."""
+    user_ids, offsets, pp, accuracy, ranks = [], [0], [], [], []
+    for user_id, scores in best.items():
+        user_ids.append(user_id)
+        for score in scores:
+            pp.append(score.pp or 0.0)
+            accuracy.append(score.accuracy(mode))
+            ranks.append(_RANK_CODES[score.rank])
+        offsets.append(len(pp))
+    return ScoreColumns(user_ids, offsets, pp, accuracy, ranks)
+
+
+def _profile(pp, bonus, accuracy, ranks):
+    return Profile(pp, bonus, pp + bonus, accuracy, {RANKS[code]: n for code, n in enumerate(ranks) if n})
+
+
+def _compute_python(cols, counts):
+    weights = _weight_table(max(map(operator.sub, cols.offsets[1:], cols.offsets), default=0))
+    mul = operator.mul
+    result = []
+    for i, (start, end) in enumerate(zip(cols.offsets, cols.offsets[1:])):
+        pp = cols.pp[start:end]
+        order = sorted(range(end - start), key=pp.__getitem__, reverse=True)
+        weighted = math.fsum(map(mul, map(pp.__getitem__, order), weights))
+        accuracy = cols.accuracy[start:end]
+        if pp:
+            accuracy = math.fsum(map(mul, map(accuracy.__getitem__, order), weights)) / math.fsum(weights[:len(pp)])
+        else:
+            accuracy = 0.0
+        ranks = [0] * len(RANKS)
+        for code in cols.ranks[start:end]:
+            ranks[code] += 1
+        result.append(_profile(weighted, bonus_pp(len(pp) if counts[i] is None else counts[i]), accuracy, ranks))
+    return result
+
+
+def _compute_numpy(cols, counts):
+    users = len(cols.user_ids)
+    offsets = numpy.asarray(cols.offsets, dtype=numpy.int64)
+    sizes = numpy.diff(offsets)
+    segment = numpy.repeat(numpy.arange(users), sizes)
+    pp = numpy.asarray(cols.pp, dtype=numpy.float64)
+    # best first within each user, users stay in order; pp is never negative so
+    # one key sorts both ways, which is much faster than lexsort
+    order = numpy.argsort(segment * (pp.max(initial=0.0) + 1) - pp)
+    table = numpy.asarray(_weight_table(int(sizes.max(initial=0))))
+    weights = table[numpy.arange(len(pp)) - numpy.repeat(offsets[:-1], sizes)]
+    weighted = numpy.bincount(segment, weights=pp[order] * weights, minlength=users)
+    weight_sums = numpy.bincount(segment, weights=weights, minlength=users)
+    accuracy = numpy.bincount(
+        segment, weights=numpy.asarray(cols.accuracy, dtype=numpy.float64)[order] * weights, minlength=users)
+    accuracy = numpy.divide(accuracy, weight_sums, out=numpy.zeros(users), where=weight_sums > 0)
+    ranks = numpy.bincount(
+        segment * len(RANKS) + numpy.asarray(cols.ranks, dtype=numpy.int64),
+        minlength=users * len(RANKS)).reshape(users, len(RANKS))
+    counts = numpy.where([n is None for n in counts], sizes, [n or 0 for n in counts])
+    bonus = BONUS_FACTOR * (1 - BONUS_BASE ** counts.astype(numpy.float64))
+    return [_profile(float(weighted[i]), float(bonus[i]), float(accuracy[i]), ranks[i].tolist())
+            for i in range(users)]
+
+
+def _compute(cols, counts):
+    if numpy is not None and cols.user_ids:
+        return _compute_numpy(cols, counts)
+    return _compute_python(cols, counts)
+
+
+def _chunks(cols, counts, size):
+    for i in range(0, len(cols.user_ids), size):
+        start, end = cols.offsets[i], cols.offsets[min(i + size, len(cols.user_ids))]
+        offsets = [offset - start for offset in cols.offsets[i:i + size + 1]]
+        yield ScoreColumns(cols.user_ids[i:i + size], offsets, cols.pp[start:end],
+                           cols.accuracy[start:end], cols.ranks[start:end]), counts[i:i + size]
+
+
+def profiles(best, *, mode=OsuMode.osu, score_counts=None, workers=None):
+    """Compute a :class:`Profile` for every user.
+
+    Parameters
+    ----------
+    best : dict or :class:`ScoreColumns`
+        A dict of user_id -> list of :class:`osuapi.model.SoloScore`, or the
+        same scores as columns.
+    mode : :class:`osuapi.enums.OsuMode`
+        Game mode of the scores, used to compute their accuracy.
+    score_counts : dict
+        user_id -> total number of ranked scores, for bonus pp. Defaults to
+        the number of scores passed for the user, which undercounts users
+        with more ranked scores than ``get_user_best`` returns.
+    workers : int
+        Number of worker processes for batches over
+        :data:`PARALLEL_THRESHOLD` users. Defaults to the number of CPUs,
+        1 computes everything in this process.
+
+    Returns
+    -------
+    dict
+        user_id -> :class:`Profile`
+    """
+    cols = best if isinstance(best, ScoreColumns) else columns(best, mode)
+    score_counts = score_counts or {}
+    counts = [score_counts.get(user_id) for user_id in cols.user_ids]
+
+    if workers == 1 or len(cols.user_ids) < PARALLEL_THRESHOLD:
+        results = _compute(cols, counts)
+    else:
+        workers = workers or os.cpu_count() or 1
+        size = max(-(-len(cols.user_ids) // (4 * workers)), _MIN_CHUNK)
+        chunks = list(_chunks(cols, counts, size))
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = [profile for part in executor.map(_compute, *zip(*chunks)) for profile in part]
+    return dict(zip(cols.user_ids, results))
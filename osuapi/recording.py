@@ -0,0 +1,265 @@
+"""Record and replay api traffic.
+
+:class:`RecordingConnector` wraps another connector and appends the body of
+every successful response to an :class:`Archive`. :class:`ReplayConnector`
+answers requests from an archive without touching the network, decoding the
+recorded bodies like a connector would, so recorded traffic can be replayed
+against :class:`osuapi.OsuApi` for load tests and profiling.
+
+.. code:: python
+
+    archive = Archive("traffic.log")
+    api = OsuApi("mykey", connector=RecordingConnector(ReqConnector(), archive))
+    ...
+    api = OsuApi("unused", connector=ReplayConnector(Archive("traffic.log")))
+
+The api key (the ``k`` parameter) is never written to the archive.
+"""
+import collections
+import gzip
+import json
+import os
+import struct
+import threading
+import time
+import urllib.parse
+
+from .errors import HTTPError
+
+Exchange = collections.namedtuple("Exchange", "endpoint params body elapsed time")
+Exchange.__doc__ = """A recorded request and the bytes of its response body."""
+
+_LENGTH = struct.Struct("<I")
+
+
+def request_key(endpoint, params):
+    """Key identifying a request, ignoring the api key and parameter order."""
+    return endpoint + "?" + urllib.parse.urlencode(sorted(
+        (k, str(v)) for k, v in params.items() if k != "k" and v is not None))
+
+
+class Archive:
+    """Append only log of recorded exchanges.
+
+    Each record is length prefixed and gzip compressed: a line of json with
+    the request, followed by the response body as it was received. An index
+    of ``offset<TAB>request key`` lines is kept next to the log in ``path + ".idx"``
+    and rebuilt from the log if it is missing.
+
+    Parameters
+    ----------
+    path : str
+        Path of the log file. Created on first append if it doesn't exist.
+    compresslevel : int
+        gzip compression level for new records.
+    """
+
+    def __init__(self, path, compresslevel=6):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._log = None
+        self._index_file = None
+        self._reader = None
+        self.index = collections.OrderedDict()
+        if os.path.exists(path):
+            self._load_index()
+
+    def _load_index(self):
+        if os.path.exists(self.index_path) and os.path.getmtime(self.index_path) >= os.path.getmtime(self.path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    offset, key = line.rstrip("\n").split("\t", 1)
+                    self.index.setdefault(key, []).append(int(offset))
+            return
+
+        with open(self.path, "rb") as f, open(self.index_path, "w", encoding="utf-8") as index:
+            offset = 0
+            for exchange in self._scan(f):
+                key = request_key(exchange.endpoint, exchange.params)
+                self.index.setdefault(key, []).append(offset)
+                index.write("{}\t{}\n".format(offset, key))
+                offset = f.tell()
+
+    @staticmethod
+    def _decode(blob):
+        header, body = gzip.decompress(blob).split(b"\n", 1)
+        record = json.loads(header.decode("utf-8"))
+        return Exchange(record["endpoint"], record["params"], body, record["elapsed"], record["time"])
+
+    def _scan(self, f):
+        while True:
+            header = f.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            yield self._decode(f.read(_LENGTH.unpack(header)[0]))
+
+    def append(self, endpoint, params, body, elapsed):
+        """Record a request and the bytes of its response body."""
+        params = {k: v for k, v in params.items() if k != "k"}
+        header = json.dumps(dict(endpoint=endpoint, params=params, elapsed=elapsed, time=time.time()),
+                            separators=(",", ":"))
+        blob = gzip.compress(header.encode("utf-8") + b"\n" + body, self.compresslevel)
+        key = request_key(endpoint, params)
+
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.path, "ab")
+                self._index_file = open(self.index_path, "a", encoding="utf-8")
+            offset = self._log.tell()
+            self._log.write(_LENGTH.pack(len(blob)) + blob)
+            self._log.flush()
+            self._index_file.write("{}\t{}\n".format(offset, key))
+            self._index_file.flush()
+            self.index.setdefault(key, []).append(offset)
+
+    def read(self, offset):
+        """Read the exchange recorded at offset."""
+        with self._lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            length, = _LENGTH.unpack(self._reader.read(_LENGTH.size))
+            blob = self._reader.read(length)
+        return self._decode(blob)
+
+    def lookup(self, endpoint, params):
+        """Return the offsets of all recordings of a request."""
+        return self.index.get(request_key(endpoint, params), [])
+
+    def __iter__(self):
+        """Iterate over all exchanges in the order they were recorded."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            yield from self._scan(f)
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self.index.values())
+
+    def close(self):
+        with self._lock:
+            for f in (self._log, self._index_file, self._reader):
+                if f is not None:
+                    f.close()
+            self._log = self._index_file = self._reader = None
+
+
+class RecordingConnector:
+    """Connector recording every successful response of another connector.
+
+    Works with both synchronous and asynchronous connectors. The built in
+    connectors hand over the response body as received, so it should wrap
+    the connector making requests directly. Results of other connectors, and
+    results a connector answers from its cache, are recorded as their json.
+
+    Parameters
+    ----------
+    connector
+        The connector actually making requests.
+    archive : :class:`Archive`
+        Where to record responses.
+    """
+
+    def __init__(self, connector, archive):
+        self.connector = connector
+        self.archive = archive
+
+    def close(self):
+        self.connector.close()
+        self.archive.close()
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        start = time.perf_counter()
+        received = []
+
+        def record(response):
+            if not received:
+                body = json.dumps(response, separators=(",", ":")).encode("utf-8")
+                self.archive.append(endpoint, data, body, time.perf_counter() - start)
+            return type_(response)
+
+        def body_received(body):
+            received.append(True)
+            self.archive.append(endpoint, data, body, time.perf_counter() - start)
+
+        record.body_received = body_received
+        return self.connector.process_request(endpoint, data, record, retries)
+
+
+class ReplayConnector:
+    """Connector answering requests from an :class:`Archive`.
+
+    A request recorded several times is answered with each recording in turn,
+    starting over once all have been used. Requests which were never recorded
+    raise :class:`osuapi.errors.HTTPError` with code 404.
+
+    Parameters
+    ----------
+    archive : :class:`Archive`
+        The recorded traffic.
+    speed : Optional[float]
+        If given, responses follow the recorded timeline scaled by speed, e.g.
+        1 for real time, 10 for ten times faster: a response recorded t
+        seconds after the archive's first one is returned no sooner than
+        t / speed seconds after the first replayed request. By default
+        responses are returned immediately.
+    asynchronous : bool
+        Return coroutines from :meth:`process_request`, like :class:`osuapi.connectors.AHConnector`.
+    observer : :class:`osuapi.metrics.RequestObserver`
+        If given, notified of the time spent decoding and converting each response.
+    clock : callable
+        Returns the current time in seconds.
+    """
+
+    def __init__(self, archive, *, speed=None, asynchronous=False, observer=None, clock=time.monotonic):
+        self.archive = archive
+        self.speed = speed
+        self.asynchronous = asynchronous
+        self.observer = observer
+        self.clock = clock
+        self._served = collections.Counter()
+        self._lock = threading.Lock()
+        self._origin = None
+
+    def close(self):
+        self.archive.close()
+
+    def _next(self, endpoint, data):
+        """The exchange to answer a request with, and the seconds to wait before answering."""
+        key = request_key(endpoint, data)
+        offsets = self.archive.index.get(key)
+        if not offsets:
+            raise HTTPError(404, "Not Found", "No recording for " + key)
+        with self._lock:
+            offset = offsets[self._served[key] % len(offsets)]
+            self._served[key] += 1
+            if self.speed and self._origin is None:
+                # (replay start, recording start), the timeline both are measured from
+                self._origin = self.clock(), self.archive.read(0).time
+        exchange = self.archive.read(offset)
+        if not self.speed:
+            return exchange, 0
+        started, recorded = self._origin
+        return exchange, started + (exchange.time - recorded) / self.speed - self.clock()
+
+    def _respond(self, endpoint, exchange, type_):
+        # imported here, the cache uses this module and doesn't need connectors
+        from .connectors import _convert, _decode
+        return _convert(self.observer, endpoint, _decode(self.observer, endpoint, exchange.body, type_), type_)
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        if self.asynchronous:
+            return self._process_request_async(endpoint, data, type_)
+        exchange, delay = self._next(endpoint, data)
+        if delay > 0:
+            time.sleep(delay)
+        return self._respond(endpoint, exchange, type_)
+
+    async def _process_request_async(self, endpoint, data, type_):
+        import asyncio
+        exchange, delay = self._next(endpoint, data)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._respond(endpoint, exchange, type_)
@@ -0,0 +1,141 @@
+"""Api results as plain tuples.
+
+Every :class:`osuapi.OsuApi` ``get_*`` method takes ``as_tuples``. With it
+set, results are returned as namedtuples with one field per model attribute
+instead of model objects, skipping the model machinery for pipelines that
+only move data along.
+
+.. code:: python
+
+    api.get_scores(53, as_tuples=True)
+    # [BeatmapScoreRow(score=..., enabled_mods=72, date='2016-08-08 16:21:18', ...), ...]
+
+    api.get_scores(53, as_tuples={"enums"})  # enabled_mods=<OsuMod Hidden | DoubleTime>
+
+Only numbers and booleans are converted by default. Dates are left as the
+api's strings and enums and mods as their int values, unless ``"dates"`` or
+``"enums"`` are asked for. Nested models become nested rows. The row types
+are generated from the models' attributes, so they have the same fields.
+"""
+import collections
+import enum
+
+from .dictmodel import AttributeModelMeta, CsvList, DateConverter, JsonList, MAX_SHAPES, Nullable, unwrap
+from .flags import Flags
+
+#: Conversions that can be asked for on top of the numeric ones.
+CONVERSIONS = frozenset(("dates", "enums"))
+
+
+def _parse_bool(value):
+    return bool(int(value))
+
+
+class _Rows:
+    """Converts dicts of one model to rows."""
+
+    def __init__(self, model, conversions):
+        attrs = list(model.__attributemodel__.items())
+        self.type = collections.namedtuple(model.__name__ + "Row", [attr.field_name for _, attr in attrs])
+        self.type.__doc__ = "Row of :class:`{}.{}`.".format(model.__module__, model.__name__)
+        self._fields = [(key, self._parser(attr, conversions)) for key, attr in attrs]
+        self._shapes = {}
+
+    @staticmethod
+    def _parser(attr, conversions):
+        """(function, or None for values kept as they are; nullable) for an attribute."""
+        factories, oftype = unwrap(attr.type)
+        nullable = Nullable in factories
+        if isinstance(oftype, AttributeModelMeta):
+            rows = _rows(oftype, conversions)
+            return (rows.many if JsonList in factories else rows.one), nullable
+        if JsonList in factories or CsvList in factories:
+            return None, nullable
+        if oftype is DateConverter:
+            return (DateConverter if "dates" in conversions else None), nullable
+        if isinstance(oftype, type) and issubclass(oftype, (enum.Enum, Flags)):
+            if "enums" in conversions:
+                return attr.type, False
+            return int, nullable
+        if oftype is bool:
+            return _parse_bool, nullable
+        if oftype is int or oftype is float:
+            return oftype, nullable
+        return None, nullable
+
+    def _shape(self, keys):
+        """Generate the function converting dicts with exactly these keys, like
+        :meth:`osuapi.dictmodel.AttributeModel._shape`. Fields missing from keys are None."""
+        positions = {key: i for i, key in enumerate(keys)}
+        namespace = {"_new": tuple.__new__, "_row": self.type}
+        known = {key for key, _ in self._fields}
+        values = ["_v{}".format(i) if key in known else "_" for i, key in enumerate(keys)]
+        items = []
+        for j, (key, (parse, nullable)) in enumerate(self._fields):
+            if key not in positions:
+                items.append("None")
+                continue
+            var = "_v{}".format(positions[key])
+            if parse is None:
+                items.append(var)
+                continue
+            namespace["_p{}".format(j)] = parse
+            expr = "_p{}({})".format(j, var)
+            items.append("(None if {0} is None else {1})".format(var, expr) if nullable else expr)
+        unpack = "    {}, = dct.values()\n".format(", ".join(values)) if keys else ""
+        exec("def make(dct):\n{}    return _new(_row, ({},))".format(unpack, ", ".join(items)), namespace)
+        make = namespace["make"]
+        if len(self._shapes) < MAX_SHAPES:
+            self._shapes[keys] = make
+        return make
+
+    def one(self, dct):
+        keys = tuple(dct)
+        make = self._shapes.get(keys) or self._shape(keys)
+        return make(dct)
+
+    def many(self, lst):
+        if not lst:
+            return []
+        keys = tuple(lst[0])
+        make = self._shapes.get(keys) or self._shape(keys)
+        one = self.one
+        return [make(dct) if tuple(dct) == keys else one(dct) for dct in lst]
+
+
+_cache = {}
+
+
+def _rows(model, conversions):
+    key = (model, conversions)
+    try:
+        return _cache[key]
+    except KeyError:
+        rows = _cache[key] = _Rows(model, conversions)
+        return rows
+
+
+def _conversions(conversions):
+    conversions = frozenset(conversions)
+    if not conversions <= CONVERSIONS:
+        raise ValueError("Unknown conversions {}".format(", ".join(sorted(conversions - CONVERSIONS))))
+    return conversions
+
+
+def row_type(model, conversions=()):
+    """The namedtuple class rows of model are returned as.
+
+    Parameters
+    ----------
+    model : :class:`osuapi.dictmodel.AttributeModel` subclass
+        Model the rows are made from.
+    conversions : iterable of str
+        Conversions applied besides numbers and booleans, from :data:`CONVERSIONS`.
+    """
+    return _rows(model, _conversions(conversions)).type
+
+
+def converter(model, conversions=(), *, many=True):
+    """A function converting decoded json to rows of model, or a list of rows if many."""
+    rows = _rows(model, _conversions(conversions))
+    return rows.many if many else rows.one
@@ -0,0 +1,244 @@
+"""Full text search over beatmap metadata.
+
+.. code:: python
+
+    index = SearchIndex.build(beatmaps)
+    index.save("beatmaps.idx")
+
+    # at startup
+    index = SearchIndex.load("beatmaps.idx")
+    index.search("freedom div")  # [Hit(beatmap_id=129891, score=...), ...]
+
+Titles, artists, creator, difficulty name, source and tags are indexed, in
+both their romanised and unicode forms. Text is NFKC normalised and case
+folded, and runs of Chinese, Japanese or Korean characters are indexed as
+overlapping pairs of characters, and as single characters, since they aren't
+separated by spaces.
+
+Every word of a query has to match, each as a prefix of an indexed word.
+Hits are ranked by how rare the matched words are and which fields they
+were found in, exact words counting more than prefixes. A short prefix can
+match a great many indexed words; only the :data:`MAX_EXPANSIONS` found in
+the most beatmaps are looked at, so a prefix that is too short to tell
+beatmaps apart misses beatmaps having only rare words that start with it.
+"""
+import array
+import bisect
+import collections
+import heapq
+import math
+import mmap
+import re
+import struct
+import sys
+import unicodedata
+
+_MAGIC = b"OSFT"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHIIII")
+
+#: Fields indexed and the weight of a word found in each.
+FIELDS = (
+    ("title", 3.0), ("title_unicode", 3.0), ("artist", 2.0), ("artist_unicode", 2.0),
+    ("creator", 2.0), ("version", 1.5), ("source", 1.0), ("tags", 1.0))
+
+#: Indexed words considered for each prefix in a query, the ones in the most beatmaps.
+MAX_EXPANSIONS = 512
+
+_PREFIX_WEIGHT = 0.7
+_WORD = re.compile(r"\w+")
+_CJK = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+)")
+
+Hit = collections.namedtuple("Hit", "beatmap_id score")
+
+
+def tokenize(text, unigrams=False):
+    """Split text into words, as a query is.
+
+    With unigrams, each character of a run of Chinese, Japanese or Korean is
+    also a word, as they are in the index, so that single characters find
+    the pairs they end."""
+    words = []
+    for word in _WORD.findall(unicodedata.normalize("NFKC", text).casefold()):
+        for i, part in enumerate(_CJK.split(word)):
+            if not part:
+                continue
+            if i % 2 == 0 or len(part) == 1:
+                words.append(part)
+            else:
+                words.extend(part[j:j + 2] for j in range(len(part) - 1))
+                if unigrams:
+                    words.extend(part)
+    return words
+
+
+class _Terms:
+    """Sorted terms stored as utf-8 in a heap, indexable for bisect."""
+
+    def __init__(self, heap, offsets):
+        self.heap = heap
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.heap[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def _little_endian(arr):
+    if sys.byteorder != "little":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+class SearchIndex:
+    """Inverted index from words to beatmap ids.
+
+    Build one with :meth:`build` or open a saved one with :meth:`load`."""
+
+    def __init__(self, ids, term_offsets, heap, posting_offsets, docs, weights, mapped=None):
+        self.ids = ids
+        self.terms = _Terms(heap, term_offsets)
+        self._posting_offsets = posting_offsets
+        self._docs = docs
+        self._weights = weights
+        self._mapped = mapped
+
+    @classmethod
+    def build(cls, beatmaps):
+        """Index an iterable of :class:`osuapi.model.Beatmap`."""
+        postings = collections.defaultdict(dict)
+        ids = array.array("I")
+        for doc, beatmap in enumerate(beatmaps):
+            ids.append(beatmap.beatmap_id)
+            for field, weight in FIELDS:
+                text = getattr(beatmap, field)
+                if not text:
+                    continue
+                for term in set(tokenize(text, unigrams=True)):
+                    found = postings[term]
+                    found[doc] = found.get(doc, 0.0) + weight
+
+        term_offsets, posting_offsets = array.array("I", [0]), array.array("I", [0])
+        docs, weights = array.array("I"), array.array("f")
+        heap = []
+        size = 0
+        for term in sorted(postings):
+            data = term.encode("utf-8")
+            heap.append(data)
+            size += len(data)
+            term_offsets.append(size)
+            found = postings[term]
+            docs.extend(found)
+            weights.extend(found.values())
+            posting_offsets.append(len(docs))
+        return cls(ids, term_offsets, b"".join(heap), posting_offsets, docs, weights)
+
+    def save(self, path):
+        """Write the index to path, to be opened with :meth:`load`."""
+        arrays = [self.ids, self.terms.offsets, self._posting_offsets, self._docs, self._weights]
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(self.ids), len(self.terms),
+                                 len(self._docs), len(self.terms.heap)))
+            for arr in arrays:
+                f.write(memoryview(_little_endian(array.array(arr.typecode, arr))).cast("B"))
+            f.write(self.terms.heap)
+
+    @classmethod
+    def load(cls, path):
+        """Open an index written by :meth:`save`.
+
+        The file is memory mapped, so it is paged in as searches touch it and
+        shared between processes that open the same index."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, ndocs, nterms, npostings, heap_size = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mapped.close()
+            raise ValueError("{} is not a version {} search index".format(path, _VERSION))
+        buf = memoryview(mapped)
+        parts = []
+        pos = _HEADER.size
+        for typecode, count in (("I", ndocs), ("I", nterms + 1), ("I", nterms + 1), ("I", npostings), ("f", npostings)):
+            part = buf[pos:pos + 4 * count]
+            if sys.byteorder == "little":
+                part = part.cast(typecode)
+            else:
+                part = _little_endian(array.array(typecode, part))
+            parts.append(part)
+            pos += 4 * count
+        ids, term_offsets, posting_offsets, docs, weights = parts
+        return cls(ids, term_offsets, buf[pos:pos + heap_size], posting_offsets, docs, weights, mapped=mapped)
+
+    def close(self):
+        """Release the mapped file of an index opened with :meth:`load`."""
+        if self._mapped is not None:
+            for part in (self.ids, self.terms.offsets, self._posting_offsets, self._docs, self._weights,
+                         self.terms.heap):
+                if isinstance(part, memoryview):
+                    part.release()
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _expand(self, word):
+        """Indexes of the terms starting with word, at most :data:`MAX_EXPANSIONS` of them.
+
+        Past that, word itself if indexed and the terms in the most beatmaps."""
+        start = bisect.bisect_left(self.terms, word)
+        # every term starting with word sorts before this
+        end = bisect.bisect_left(self.terms, word + "\U0010ffff", start)
+        if end - start <= MAX_EXPANSIONS:
+            return range(start, end)
+        offsets = self._posting_offsets
+        exact = start if self.terms[start] == word else None
+        rest = range(start + 1, end) if exact is not None else range(start, end)
+        common = heapq.nlargest(MAX_EXPANSIONS - (exact is not None), rest,
+                                key=lambda i: (offsets[i + 1] - offsets[i], -i))
+        return sorted(common + ([exact] if exact is not None else []))
+
+    def _match(self, word):
+        """doc -> score for one query word."""
+        scores = {}
+        ndocs = len(self.ids)
+        for i in self._expand(word):
+            start, end = self._posting_offsets[i], self._posting_offsets[i + 1]
+            idf = math.log(1 + ndocs / (end - start))
+            if self.terms[i] != word:
+                idf *= _PREFIX_WEIGHT
+            for doc, weight in zip(self._docs[start:end], self._weights[start:end]):
+                score = idf * weight / (weight + 1.0)
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, query, limit=20):
+        """Beatmaps matching every word of query, best first.
+
+        Returns
+        -------
+        list[Hit]
+            ``(beatmap_id, score)`` of at most limit beatmaps.
+        """
+        words = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not words:
+            return []
+        # longest words first: they usually match the fewest beatmaps
+        total = self._match(words[0])
+        for word in words[1:]:
+            if not total:
+                break
+            scores = self._match(word)
+            total = {doc: score + scores[doc] for doc, score in total.items() if doc in scores}
+        best = heapq.nsmallest(limit, total.items(), key=lambda item: (-item[1], item[0]))
+        return [Hit(self.ids[doc], score) for doc, score in best]
@@ -0,0 +1,327 @@
+"""Compact binary encoding of model objects.
+
+Encoders and decoders are generated from each model's ``__attributemodel__``:
+numbers, enums, flags and dates are stored fixed width, strings are interned
+into a table shared by every object in the payload, and nested models and
+lists are encoded recursively.
+
+.. code:: python
+
+    blob = beatmap.to_bytes()
+    Beatmap.from_bytes(blob)
+
+    blob = codec(Beatmap).encode_many(beatmaps)
+    codec(Beatmap).decode(blob)  # list of Beatmap
+
+Payloads carry :data:`SCHEMA_VERSION` and a fingerprint of the model's fields,
+decoding a payload written for a different layout raises ValueError. Fields
+missing from the encoded object decode as None.
+"""
+import datetime
+import enum
+import json
+import struct
+import zlib
+
+from .dictmodel import AttributeModel, EnumAttribute, JsonList, CsvList, Nullable, DateConverter, unwrap
+from .flags import Flags
+
+SCHEMA_VERSION = 1
+
+_MAGIC = b"OSUM"
+_HEADER = struct.Struct("<4sHIB")
+_COUNT = struct.Struct("<I")
+
+FLAG_LIST = 1
+FLAG_JSON = 2
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+
+
+def _encode_date(value):
+    return (value - _EPOCH) // _SECOND
+
+
+def _decode_date(value):
+    return _EPOCH + _SECOND * value
+
+
+class _Strings(dict):
+    """String table built while encoding, maps each string to its index."""
+
+    def __missing__(self, value):
+        idx = self[value] = len(self)
+        return idx
+
+    def to_bytes(self):
+        out = [_COUNT.pack(len(self))]
+        for value in self:
+            data = value.encode("utf-8")
+            out.append(_COUNT.pack(len(data)))
+            out.append(data)
+        return b"".join(out)
+
+
+def _read_strings(buf, pos):
+    count, = _COUNT.unpack_from(buf, pos)
+    pos += _COUNT.size
+    strings = []
+    for _ in range(count):
+        length, = _COUNT.unpack_from(buf, pos)
+        pos += _COUNT.size
+        strings.append(str(buf[pos:pos + length], "utf-8"))
+        pos += length
+    return strings, pos
+
+
+def _enum_code(oftype):
+    values = [member.value for member in oftype]
+    for code, bound in (("b", 1 << 7), ("h", 1 << 15)):
+        if -bound <= min(values) and max(values) < bound:
+            return code
+    return "i"
+
+
+def _scalar(oftype):
+    """Return (struct code, kind) for a scalar type, or None."""
+    if oftype is bool:
+        return "?", "bool"
+    if oftype is int:
+        return "q", "int"
+    if oftype is float:
+        return "d", "float"
+    if oftype is str:
+        return "I", "str"
+    if oftype is DateConverter:
+        return "I", "date"
+    if isinstance(oftype, type) and issubclass(oftype, enum.Enum):
+        return _enum_code(oftype), "enum"
+    if isinstance(oftype, type) and issubclass(oftype, Flags):
+        return "Q", "flags"
+    return None
+
+
+class _Field:
+    def __init__(self, bit, name, attr):
+        self.bit = bit
+        self.name = name
+        factories, self.oftype = unwrap(attr.type)
+        self.nullable = Nullable in factories
+        self.is_list = JsonList in factories or CsvList in factories
+        # EnumAttribute keeps the int value in the object already
+        self.coded = isinstance(attr, EnumAttribute)
+        if isinstance(self.oftype, type) and issubclass(self.oftype, AttributeModel):
+            self.code, self.kind = None, "model"
+        else:
+            scalar = _scalar(self.oftype)
+            if scalar is None:
+                raise TypeError("Can't encode {} of type {!r}".format(name, attr.type))
+            self.code, self.kind = scalar
+        self.fixed = not self.is_list and self.kind != "model"
+
+    @property
+    def signature(self):
+        kind = codec(self.oftype).fingerprint if self.kind == "model" else self.code + self.kind
+        return "{}:{}{}{}".format(self.name, kind, "[]" if self.is_list else "", "?" if self.nullable else "")
+
+    def encoder(self, var):
+        """Source of an expression encoding var."""
+        if self.kind == "str":
+            return "strings[{}]".format(var)
+        if self.kind in ("enum", "flags") and not self.coded:
+            return "{}.value".format(var)
+        if self.kind == "date":
+            return "_encode_date({})".format(var)
+        return var
+
+    def decoder(self, var):
+        """Source of an expression decoding var."""
+        if self.kind == "str":
+            return "strings[{}]".format(var)
+        if self.coded:
+            return var
+        if self.kind == "enum":
+            return "_members_{}[{}]".format(self.bit, var)
+        if self.kind == "flags":
+            return "_type_{}({})".format(self.bit, var)
+        if self.kind == "date":
+            return "_decode_date({})".format(var)
+        return var
+
+
+class Codec:
+    """Binary encoder and decoder for one model class.
+
+    Use :func:`codec` to get the (cached) instance for a model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = [_Field(bit, attr.field_name, attr)
+                       for bit, attr in enumerate(model.__attributemodel__.values())]
+        self.variable = [f for f in self.fields if not f.fixed]
+        self.fingerprint = zlib.crc32(";".join(f.signature for f in self.fields).encode("utf-8"))
+        self._write_fixed, self._read_fixed = self._generate()
+
+    def _generate(self):
+        fixed = [f for f in self.fields if f.fixed]
+        mask_size = (len(self.fields) + 7) // 8
+        fmt = struct.Struct("<" + "".join(f.code for f in fixed))
+        namespace = dict(
+            _pack=fmt.pack, _unpack_from=fmt.unpack_from, _new=object.__new__, _model=self.model,
+            _encode_date=_encode_date, _decode_date=_decode_date, _from_bytes=int.from_bytes)
+        for f in fixed:
+            namespace["_type_{}".format(f.bit)] = f.oftype
+            if f.kind == "enum":
+                namespace["_members_{}".format(f.bit)] = {member.value: member for member in f.oftype}
+
+        write = ["def write(obj, out, strings):", "    get = obj.__dict__.get", "    mask = 0"]
+        for f in self.fields:
+            var = "f{}".format(f.bit)
+            write.append("    {} = get({!r})".format(var, f.name))
+            if f.fixed:
+                write.append("    if {} is None:".format(var))
+                write.append("        {} = 0".format(var))
+                write.append("    else:")
+                write.append("        mask |= {}".format(1 << f.bit))
+                write.append("        {} = {}".format(var, f.encoder(var)))
+            else:
+                write.append("    if {} is not None:".format(var))
+                write.append("        mask |= {}".format(1 << f.bit))
+        write.append("    out.append(mask.to_bytes({}, 'little') + _pack({}))".format(
+            mask_size, "".join("f{}, ".format(f.bit) for f in fixed)))
+        write.append("    return mask")
+
+        read = ["def read(buf, pos, strings):",
+                "    mask = _from_bytes(buf[pos:pos + {0}], 'little')".format(mask_size)]
+        if fixed:
+            read.append("    {}= _unpack_from(buf, pos + {})".format(
+                "".join("f{}, ".format(f.bit) for f in fixed), mask_size))
+        read += ["    obj = _new(_model)",
+                 "    obj.__dict__.update({"]
+        for f in fixed:
+            read.append("        {!r}: {} if mask & {} else None,".format(
+                f.name, f.decoder("f{}".format(f.bit)), 1 << f.bit))
+        read.append("    })")
+        read.append("    return obj, mask, pos + {}".format(mask_size + fmt.size))
+
+        exec("\n".join(write + read), namespace)
+        return namespace["write"], namespace["read"]
+
+    def _write(self, obj, out, strings):
+        mask = self._write_fixed(obj, out, strings)
+        for field in self.variable:
+            if not mask >> field.bit & 1:
+                continue
+            value = obj.__dict__[field.name]
+            if field.is_list:
+                out.append(_COUNT.pack(len(value)))
+            else:
+                value = [value]
+            if field.kind == "model":
+                sub = codec(field.oftype)
+                for item in value:
+                    sub._write(item, out, strings)
+            else:
+                if field.kind == "str":
+                    value = [strings[item] for item in value]
+                elif field.kind in ("enum", "flags"):
+                    value = [item.value for item in value]
+                elif field.kind == "date":
+                    value = [_encode_date(item) for item in value]
+                out.append(struct.pack("<{}{}".format(len(value), field.code), *value))
+
+    def _read(self, buf, pos, strings):
+        obj, mask, pos = self._read_fixed(buf, pos, strings)
+        for field in self.variable:
+            if not mask >> field.bit & 1:
+                obj.__dict__[field.name] = None
+                continue
+            if field.is_list:
+                count, = _COUNT.unpack_from(buf, pos)
+                pos += _COUNT.size
+            else:
+                count = 1
+            if field.kind == "model":
+                sub = codec(field.oftype)
+                items = []
+                for _ in range(count):
+                    item, pos = sub._read(buf, pos, strings)
+                    items.append(item)
+            else:
+                fmt = struct.Struct("<{}{}".format(count, field.code))
+                items = list(fmt.unpack_from(buf, pos))
+                pos += fmt.size
+                if field.kind == "str":
+                    items = [strings[item] for item in items]
+                elif field.kind in ("enum", "flags"):
+                    items = [field.oftype(item) for item in items]
+                elif field.kind == "date":
+                    items = [_decode_date(item) for item in items]
+            obj.__dict__[field.name] = items if field.is_list else items[0]
+        return obj, pos
+
+    def _header(self, flags):
+        return _HEADER.pack(_MAGIC, SCHEMA_VERSION, self.fingerprint, flags)
+
+    def encode(self, obj):
+        """Encode a single model object."""
+        return self.encode_many([obj], flags=0)
+
+    def encode_many(self, objs, flags=FLAG_LIST):
+        """Encode a list of model objects into one payload sharing a string table."""
+        out = [b""]
+        strings = _Strings()
+        count = 0
+        for obj in objs:
+            self._write(obj, out, strings)
+            count += 1
+        if flags & FLAG_LIST:
+            out[0] = _COUNT.pack(count)
+        return b"".join([self._header(flags), strings.to_bytes()] + out)
+
+    def encode_json(self, data):
+        """Wrap a raw api response (a dict or list of dicts) without converting it.
+
+        Decoding such a payload builds the model objects from the json, so it
+        is cheaper to write and costlier to read than :meth:`encode_many`."""
+        flags = FLAG_JSON | (FLAG_LIST if isinstance(data, list) else 0)
+        return self._header(flags) + json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data):
+        """Decode a payload into a model object, or a list if it was encoded by :meth:`encode_many`."""
+        buf = memoryview(data)
+        magic, version, fingerprint, flags = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != SCHEMA_VERSION:
+            raise ValueError("Not a version {} osuapi payload".format(SCHEMA_VERSION))
+        if fingerprint != self.fingerprint:
+            raise ValueError("Payload was not encoded for this version of {}".format(self.model.__name__))
+
+        if flags & FLAG_JSON:
+            raw = json.loads(str(buf[_HEADER.size:], "utf-8"))
+            if flags & FLAG_LIST:
+                return [self.model(item) for item in raw]
+            return self.model(raw)
+
+        strings, pos = _read_strings(buf, _HEADER.size)
+        if not flags & FLAG_LIST:
+            return self._read(buf, pos, strings)[0]
+        count, = _COUNT.unpack_from(buf, pos)
+        pos += _COUNT.size
+        objs = []
+        for _ in range(count):
+            obj, pos = self._read(buf, pos, strings)
+            objs.append(obj)
+        return objs
+
+
+_codecs = {}
+
+
+def codec(model):
+    """Return the :class:`Codec` for a model class."""
+    try:
+        return _codecs[model]
+    except KeyError:
+        result = _codecs[model] = Codec(model)
+        return result
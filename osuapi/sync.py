@@ -0,0 +1,178 @@
+"""Incremental syncing of users' best scores.
+
+:class:`BestScoreSync` remembers, for each user, the ids of their best scores
+and beatmaps in order and the lowest pp among them, and turns each new look at a user's
+best scores into just the scores inserted and removed since the last one.
+
+.. code:: python
+
+    sync = BestScoreSync(api)
+    for user_id in tracked:
+        changes = sync.sync(user_id)
+        db.insert(changes.inserted)
+        db.delete(changes.removed)
+
+    with open("best.json", "w") as f:
+        json.dump(sync.dump(), f)
+
+The first sync of a user fetches all their best scores. Later syncs fetch the
+top ``probe`` scores and only fetch more when those don't line up with what is
+known: best scores are ordered by pp, so once a page ends on a known score every
+change above it has been seen. A new score landing below the probed ones isn't
+in the page though, nor is one below a new top score. Pass the user's current
+``pp_raw`` (from :meth:`osuapi.osu.OsuApi.get_user`) to catch those too: a sync
+with unchanged pp makes no request at all, and one with changed pp fetches the
+whole list, as only the whole list accounts for every change.
+
+Requests are made through the api's connector, which has to be synchronous.
+"""
+import array
+import collections
+
+from .enums import OsuMode
+
+#: Most best scores the api returns for a user.
+MAX_BEST = 100
+
+BestScoreChanges = collections.namedtuple("BestScoreChanges", "user_id inserted removed")
+BestScoreChanges.__doc__ = """Difference in a user's best scores since their last sync.
+
+inserted is a list of the new :class:`osuapi.model.SoloScore`, best first,
+removed a list of the ids of scores no longer among the best."""
+
+
+class _Known:
+    """A user's best score ids and their beatmaps, best first, and the lowest pp among them."""
+
+    __slots__ = ("score_ids", "beatmap_ids", "min_pp", "pp_raw")
+
+    def __init__(self, score_ids, beatmap_ids, min_pp, pp_raw):
+        self.score_ids = array.array("Q", score_ids)
+        self.beatmap_ids = array.array("Q", beatmap_ids)
+        self.min_pp = min_pp
+        self.pp_raw = pp_raw
+
+
+def _pp(score):
+    return score.pp or 0.0
+
+
+class BestScoreSync:
+    """Tracks the best scores of users between syncs.
+
+    Parameters
+    ----------
+    api : :class:`osuapi.osu.OsuApi`
+        Api used to fetch best scores.
+    mode : :class:`osuapi.enums.OsuMode`
+        Game mode of the best scores.
+    probe : int
+        Scores fetched first when syncing a known user. Each further page
+        fetches four times as many, up to :data:`MAX_BEST`.
+    state : dict
+        State saved by :meth:`dump`.
+    """
+
+    def __init__(self, api, *, mode=OsuMode.osu, probe=10, state=None):
+        self.api = api
+        self.mode = mode
+        self.probe = probe
+        self._known = {}
+        for user_id, known in (state or {}).items():
+            self._known[user_id] = _Known(
+                known["score_ids"], known["beatmap_ids"], known["min_pp"], known["pp_raw"])
+        #: Requests made by :meth:`sync` so far.
+        self.requests = 0
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._known
+
+    def forget(self, user_id):
+        """Stop tracking a user, their next sync fetches every best score again."""
+        self._known.pop(str(user_id), None)
+
+    def watermark(self, user_id):
+        """The pp a new score needs to get into a user's best scores, or None if they aren't tracked.
+
+        0 while the user has fewer than :data:`MAX_BEST` best scores. After
+        scores have been pushed out of the list it can be lower than the real
+        threshold, never higher."""
+        known = self._known.get(str(user_id))
+        if known is None:
+            return None
+        return known.min_pp if len(known.score_ids) >= MAX_BEST else 0.0
+
+    def dump(self):
+        """State of every tracked user as json compatible data, to pass back as state."""
+        return {user_id: {"score_ids": known.score_ids.tolist(), "beatmap_ids": known.beatmap_ids.tolist(),
+                          "min_pp": known.min_pp, "pp_raw": known.pp_raw}
+                for user_id, known in self._known.items()}
+
+    def _fetch(self, user_id, limit):
+        self.requests += 1
+        return self.api.get_user_best(user_id, mode=self.mode, limit=limit)
+
+    @staticmethod
+    def _settled(page, known_ids):
+        """Whether the page ends on a known score, so every change above it is in the page."""
+        return page[-1].score_id in known_ids
+
+    def sync(self, user_id, pp_raw=None):
+        """Fetch a user's best scores and return what changed since the last sync.
+
+        Parameters
+        ----------
+        user_id : str or int
+            User to sync, as passed to :meth:`osuapi.osu.OsuApi.get_user_best`.
+        pp_raw : float
+            The user's current pp, if known. When it hasn't changed since the
+            last sync nothing is fetched, when it has the whole list is.
+
+        Returns
+        -------
+        :class:`BestScoreChanges`
+            On the first sync of a user, every score is inserted.
+        """
+        key = str(user_id)
+        known = self._known.get(key)
+        if known is not None and pp_raw is not None and pp_raw == known.pp_raw:
+            return BestScoreChanges(user_id, [], [])
+        known_ids = set(known.score_ids) if known is not None else set()
+
+        # Without pp to check against, the probe is trusted to show the changes.
+        limit = MAX_BEST if known is None or pp_raw is not None else min(self.probe, MAX_BEST)
+        while True:
+            page = self._fetch(user_id, limit)
+            # A short page, or a full one at the maximum, is the whole list.
+            whole = len(page) < limit or limit >= MAX_BEST
+            if whole or self._settled(page, known_ids):
+                break
+            limit = min(limit * 4, MAX_BEST)
+
+        score_ids = [score.score_id for score in page]
+        beatmap_ids = [score.beatmap_id for score in page]
+        inserted = [score for score in page if score.score_id not in known_ids]
+        seen = set(score_ids)
+        if whole:
+            removed = [score_id for score_id in known.score_ids if score_id not in seen] if known is not None else []
+            rest_pp = None
+        else:
+            cut = known.score_ids.index(score_ids[-1]) + 1
+            removed = [score_id for score_id in known.score_ids[:cut] if score_id not in seen]
+            # A user has one best score per beatmap, a new one replaces the
+            # old score on its beatmap wherever that is in the list.
+            new_beatmaps = set(beatmap_ids)
+            for score_id, beatmap_id in zip(known.score_ids[cut:], known.beatmap_ids[cut:]):
+                if beatmap_id in new_beatmaps:
+                    removed.append(score_id)
+                else:
+                    score_ids.append(score_id)
+                    beatmap_ids.append(beatmap_id)
+            rest_pp = known.min_pp if len(score_ids) > len(page) else None
+            # New scores above push the lowest known ones out of the list.
+            removed += score_ids[MAX_BEST:]
+            del score_ids[MAX_BEST:], beatmap_ids[MAX_BEST:]
+        if rest_pp is None:
+            rest_pp = _pp(page[-1]) if page else None
+        self._known[key] = _Known(score_ids, beatmap_ids, rest_pp, pp_raw)
+        return BestScoreChanges(user_id, inserted, removed)
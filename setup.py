@@ -22,12 +22,18 @@ setup(
     license="MIT",
     long_description=readme,
     keywords="osu",
-    packages=find_packages(),
+    packages=find_packages(exclude=["bench", "bench.*"]),
     description="osu! api wrapper.",
+    # module __getattr__ (PEP 562), asyncio.current_task/all_tasks
+    python_requires=">=3.7",
+    entry_points={
+        "console_scripts": ["osuapi = osuapi.cli:main"],
+    },
     classifiers=[
       "Development Status :: 1 - Planning",
       "Intended Audience :: Developers",
       "License :: OSI Approved :: MIT License",
+      "Programming Language :: Python :: 3 :: Only",
       "Topic :: Utilities"
     ]
 )
@@ -0,0 +1,76 @@
+import random
+import unittest
+
+from osuapi.beatmapindex import BeatmapIndex
+from osuapi.enums import BeatmapStatus, OsuMode
+from osuapi.model import Beatmap
+
+import samples
+
+
+def beatmaps(count, seed=0):
+    rng = random.Random(seed)
+    return [Beatmap(dict(
+        samples.BEATMAP, beatmap_id=str(i), difficultyrating=str(round(rng.uniform(1, 8), 2)),
+        hit_length=str(rng.randrange(30, 400)), mode=str(rng.randrange(4)), approved=str(rng.randrange(-2, 5))))
+        for i in range(count)]
+
+
+class BeatmapIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.beatmaps = beatmaps(500)
+        self.index = BeatmapIndex(self.beatmaps)
+
+    def assertMatches(self, predicate, **constraints):
+        expected = sorted(b.beatmap_id for b in self.index.beatmaps.values() if predicate(b))
+        self.assertEqual(sorted(b.beatmap_id for b in self.index.query(**constraints)), expected)
+
+    def test_query(self):
+        self.assertMatches(lambda b: 5 <= b.difficultyrating <= 6 and b.mode is OsuMode.osu,
+                           difficultyrating=(5, 6), mode=OsuMode.osu)
+        self.assertMatches(lambda b: b.hit_length <= 60 and b.approved in (BeatmapStatus.ranked, BeatmapStatus.loved),
+                           hit_length=(None, 60), approved=[BeatmapStatus.ranked, BeatmapStatus.loved])
+        self.assertMatches(lambda b: b.hit_length == 100, hit_length=100)
+        self.assertEqual(len(self.index.query()), 500)
+        self.assertEqual(self.index.count(mode=OsuMode.taiko),
+                         sum(b.mode is OsuMode.taiko for b in self.beatmaps))
+
+    def test_update(self):
+        self.index.remove(300)
+        self.index.add(beatmaps(20, seed=1))
+        self.index.add([Beatmap(dict(samples.BEATMAP, beatmap_id="1000", difficultyrating="9.5"))])
+        self.assertEqual(len(self.index), 500)
+        self.assertNotIn(300, self.index)
+        self.assertEqual([b.beatmap_id for b in self.index.query(difficultyrating=(9, None))], [1000])
+        self.assertMatches(lambda b: 2 <= b.difficultyrating <= 3 and b.mode is OsuMode.mania,
+                           difficultyrating=(2, 3), mode=OsuMode.mania)
+
+    def test_repeated_id(self):
+        old, new = (Beatmap(dict(samples.BEATMAP, beatmap_id="2000", difficultyrating=rating))
+                    for rating in ("9.5", "9.8"))
+        index = BeatmapIndex([old, new])
+        self.assertEqual(len(index), 1)
+        self.assertIs(index.query(difficultyrating=(9, None))[0], new)
+        self.assertEqual(index.query(difficultyrating=9.5), [])
+        self.index.add([old, new] * 200)
+        self.assertEqual(len(self.index), 501)
+        self.assertEqual(self.index.count(difficultyrating=(9, None)), 1)
+
+    def test_enum_values(self):
+        self.assertMatches(lambda b: b.mode is OsuMode.taiko, mode=1)
+        self.assertMatches(lambda b: b.approved in (BeatmapStatus.ranked, BeatmapStatus.loved),
+                           approved=[1, BeatmapStatus.loved])
+
+    def test_bulk_update(self):
+        self.index.add(beatmaps(400, seed=2))
+        self.assertEqual(len(self.index), 500)
+        self.assertMatches(lambda b: 2 <= b.difficultyrating <= 3, difficultyrating=(2, 3))
+        for beatmap_id in range(0, 400, 2):
+            self.index.remove(beatmap_id)
+        self.assertMatches(lambda b: b.hit_length <= 100, hit_length=(None, 100))
+        self.assertEqual(self.index.count(hit_length=(None, None)), 300)
+
+    def test_unknown_field(self):
+        with self.assertRaises(TypeError):
+            self.index.query(title="FREEDOM DiVE")
@@ -0,0 +1,193 @@
+import asyncio
+import unittest
+
+from osuapi import CircuitOpenError, HTTPError, ReqConnector, RequestShedError
+from osuapi.breaker import BreakerConnector
+from osuapi.cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyConnector:
+    def __init__(self):
+        self.status = 200
+        self.calls = []
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        self.calls.append(retries)
+        if self.status != 200:
+            raise HTTPError(self.status, "Error", "")
+        return type_(data)
+
+
+class AsyncFlakyConnector(FlakyConnector):
+    async def process_request(self, endpoint, data, type_, retries=5):
+        await asyncio.sleep(0)
+        return super().process_request(endpoint, data, type_, retries)
+
+
+class Response:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.reason = "Error"
+        self.text = content.decode()
+
+    def close(self):
+        pass
+
+
+class Session:
+    """requests session answering with a queue of responses."""
+
+    def __init__(self):
+        self.responses = []
+
+    def get(self, url, params=None, headers=None):
+        return self.responses.pop(0)
+
+
+class BreakerConnectorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.inner = FlakyConnector()
+        self.breaker = BreakerConnector(self.inner, window=4, min_requests=4, reset_timeout=10, clock=self.clock)
+
+    def fail(self, times, endpoint="a"):
+        for _ in range(times):
+            with self.assertRaises(HTTPError):
+                self.breaker.process_request(endpoint, {}, dict)
+
+    def test_opens_and_fails_fast(self):
+        self.inner.status = 503
+        self.fail(4)
+        self.assertEqual(self.breaker.state("a"), "open")
+        self.assertEqual(self.breaker.state("b"), "closed")
+        with self.assertRaises(CircuitOpenError) as cm:
+            self.breaker.process_request("a", {}, dict)
+        self.assertEqual(cm.exception.retry_after, 10)
+        self.assertEqual(len(self.inner.calls), 4)
+
+    def test_client_errors_dont_count(self):
+        self.inner.status = 404
+        self.fail(8)
+        self.assertEqual(self.breaker.state("a"), "closed")
+
+    def test_failure_rate(self):
+        self.inner.status = 500
+        self.fail(1)
+        self.inner.status = 200
+        for _ in range(3):
+            self.breaker.process_request("a", {}, dict)
+        self.inner.status = 500
+        self.fail(1)
+        self.assertEqual(self.breaker.state("a"), "closed")
+        self.fail(1)
+        self.assertEqual(self.breaker.state("a"), "open")
+
+    def test_half_open(self):
+        self.inner.status = 500
+        self.fail(4)
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state("a"), "half_open")
+        self.fail(1)
+        self.assertEqual(self.inner.calls[-1], 1)
+        self.assertEqual(self.breaker.state("a"), "open")
+
+        self.clock.now = 20
+        self.inner.status = 200
+        self.assertEqual(self.breaker.process_request("a", {"x": 1}, dict), {"x": 1})
+        self.assertEqual(self.breaker.state("a"), "closed")
+        self.breaker.process_request("a", {}, dict)
+        self.assertEqual(self.inner.calls[-1], 5)
+
+    def test_fallback(self):
+        cache = ResponseCache()
+        self.breaker = BreakerConnector(self.inner, window=4, min_requests=4, fallback=cache, clock=self.clock)
+        self.assertEqual(self.breaker.process_request("a", {"u": 1}, dict), {"u": 1})
+        self.inner.status = 502
+        cached = self.breaker.process_request("a", {"u": 1}, dict)
+        self.assertEqual(cached, {"u": 1})
+        self.fail(2)
+        self.assertEqual(self.breaker.state("a"), "open")
+        self.assertEqual(self.breaker.process_request("a", {"u": 1}, dict), cached)
+        # the cached json is converted for each request
+        self.assertEqual(self.breaker.process_request("a", {"u": 1}, lambda data: data["u"]), 1)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.process_request("a", {"u": 2}, dict)
+
+    def test_fallback_shared_with_connector(self):
+        # the documented setup, with responses that have no validators like the api's
+        cache = ResponseCache()
+        sess = Session()
+        breaker = BreakerConnector(ReqConnector(sess, cache=cache), fallback=cache, shed_at=0)
+        sess.responses.append(Response(200, b'[{"u": 1}]'))
+        self.assertEqual(breaker.process_request("a", {"u": 1}, list), [{"u": 1}])
+        self.assertEqual(breaker.low_priority().process_request("a", {"u": 1}, list), [{"u": 1}])
+
+        # validated responses are left to the connector
+        sess.responses += [Response(200, b'[{"u": 2}]', {"ETag": '"v1"'}), Response(304)]
+        self.assertEqual(breaker.process_request("a", {"u": 2}, list), [{"u": 2}])
+        self.assertEqual(cache.get("a", {"u": 2}).etag, '"v1"')
+        self.assertEqual(breaker.process_request("a", {"u": 2}, list), [{"u": 2}])
+        self.assertEqual(cache.get("a", {"u": 2}).etag, '"v1"')
+
+    def test_shedding(self):
+        breaker = BreakerConnector(self.inner, shed_at=1)
+        low = breaker.low_priority()
+
+        def nested(data):
+            with self.assertRaises(RequestShedError):
+                low.process_request("a", {}, dict)
+            return breaker.process_request("a", {}, dict)
+
+        self.assertEqual(breaker.process_request("a", {}, nested), {})
+        self.assertEqual(breaker.in_flight, 0)
+        self.assertEqual(low.process_request("a", {}, dict), {})
+
+    def test_async(self):
+        self.inner = AsyncFlakyConnector()
+        self.breaker = BreakerConnector(self.inner, window=2, min_requests=2, clock=self.clock)
+
+        async def run():
+            self.assertEqual(await self.breaker.process_request("a", {"x": 1}, dict), {"x": 1})
+            self.inner.status = 500
+            with self.assertRaises(HTTPError):
+                await self.breaker.process_request("a", {}, dict)
+            with self.assertRaises(CircuitOpenError):
+                await self.breaker.process_request("a", {}, dict)
+            self.assertEqual(self.breaker.in_flight, 0)
+
+        self.assertTrue(self.breaker.asynchronous)
+        self.assertTrue(self.breaker.low_priority().asynchronous)
+        self.assertFalse(BreakerConnector(FlakyConnector()).asynchronous)
+        asyncio.run(run())
+
+    def test_unawaited(self):
+        self.inner = AsyncFlakyConnector()
+        self.breaker = BreakerConnector(self.inner, window=2, min_requests=2, reset_timeout=10, clock=self.clock)
+        self.inner.status = 500
+
+        async def run():
+            for _ in range(2):
+                with self.assertRaises(HTTPError):
+                    await self.breaker.process_request("a", {}, dict)
+            self.clock.now = 10
+            # never awaited: takes no slot and doesn't claim the half open probe
+            self.breaker.process_request("a", {}, dict).close()
+            self.assertEqual(self.breaker.in_flight, 0)
+            self.inner.status = 200
+            self.assertEqual(await self.breaker.process_request("a", {"x": 1}, dict), {"x": 1})
+            self.assertEqual(self.breaker.state("a"), "closed")
+
+        asyncio.run(run())
@@ -1,17 +1,26 @@
 import asyncio
+import concurrent.futures
 import http.server
 import multiprocessing
 import os
+import random
+import threading
 import unittest
 import warnings
 
 import osuapi
+from osuapi import cache, connectors, endpoints, metrics
 
 
 def async_test(f):
     def wrapper(*args, **kwargs):
         coro = f(*args, **kwargs)
-        loop = asyncio.get_event_loop()
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            # asyncio.run() elsewhere in the suite leaves no current loop
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
         loop.run_until_complete(coro)
     return wrapper
 
@@ -55,6 +64,70 @@ class AHConnectorTest(unittest.TestCase):
                 "http://localhost:6969/500", {}, int, retries=3)
 
 
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:
+    aiohttp = None
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class AHConnectorCancellationTest(unittest.TestCase):
+    REQUESTS = 10000
+    LIMIT = 8
+
+    async def slow(self, request):
+        """Sends headers, then the body in pieces, sometimes a 504 to be retried."""
+        if random.random() < 0.1:
+            return web.Response(status=504)
+        resp = web.StreamResponse()
+        resp.content_length = 4 * 1024
+        await resp.prepare(request)
+        for _ in range(4):
+            await resp.write(b"0" * 1024)
+            await asyncio.sleep(0)
+        await resp.write_eof()
+        return resp
+
+    async def ok(self, request):
+        return web.json_response(1)
+
+    async def stress(self):
+        app = web.Application()
+        app.router.add_get("/slow", self.slow)
+        app.router.add_get("/ok", self.ok)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = "http://127.0.0.1:{}".format(runner.addresses[0][1])
+
+        observer = metrics.MetricsObserver()
+        sess = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.LIMIT))
+        connector = osuapi.AHConnector(sess=sess, observer=observer)
+        try:
+            for _ in range(self.REQUESTS // 100):
+                tasks = [asyncio.ensure_future(connector.process_request(base + "/slow", {}, bytes, retries=2))
+                         for _ in range(100)]
+                await asyncio.sleep(random.random() * 0.005)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            self.assertEqual(observer.in_flight[base + "/slow"], 0)
+            self.assertEqual(len(sess.connector._acquired), 0)
+            # with a leaked connection these would wait for a free one forever
+            results = await asyncio.wait_for(asyncio.gather(
+                *[connector.process_request(base + "/ok", {}, int) for _ in range(2 * self.LIMIT)]), 10)
+            self.assertEqual(results, [1] * 2 * self.LIMIT)
+        finally:
+            await sess.close()
+            await runner.cleanup()
+
+    def test_cancelled_requests_release_connections(self):
+        asyncio.run(self.stress())
+
+
 class ReqConnectorTest(unittest.TestCase):
     def setUp(self):
         self.connector = osuapi.ReqConnector()
@@ -75,3 +148,220 @@ class ReqConnectorTest(unittest.TestCase):
         with self.assertRaisesRegex(osuapi.HTTPError, ".*500.*"):
             res = self.connector.process_request(
                 "http://localhost:6969/500", {}, int, retries=3)
+
+    def test_observer(self):
+        observer = metrics.MetricsObserver()
+        self.connector.observer = observer
+        with self.assertRaises(osuapi.HTTPError):
+            self.connector.process_request(
+                "http://localhost:6969/504", {}, int, retries=2)
+
+        endpoint = "http://localhost:6969/504"
+        self.assertEqual(observer.statuses, {(endpoint, 504): 1})
+        # two requests, the second one a retry
+        self.assertEqual(observer.retries[endpoint], 1)
+        self.assertEqual(observer.in_flight[endpoint], 0)
+        self.assertEqual(observer.latency[endpoint].count, 1)
+
+
+class ETagHandler(http.server.BaseHTTPRequestHandler):
+    body = b'{"answer": 42}'
+    etag = '"v1"'
+
+    def do_GET(self):
+        type(self).requests.append(dict(self.headers))
+        if self.etag is not None and self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.etag is not None:
+            self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ETagServerTest(unittest.TestCase):
+    """Base for tests against a local ETagHandler, with a cache on the connector."""
+    etag = '"v1"'
+
+    def setUp(self):
+        handler = type("Handler", (ETagHandler,), {"requests": [], "etag": self.etag})
+        self.requests = handler.requests
+        self.httpd = http.server.HTTPServer(("localhost", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = "http://localhost:{}/get_user".format(self.httpd.server_address[1])
+        self.cache = cache.ResponseCache()
+        self.observer = metrics.MetricsObserver()
+        self.connector = osuapi.ReqConnector(observer=self.observer, cache=self.cache)
+
+    def tearDown(self):
+        self.connector.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ConditionalRequestTest(ETagServerTest):
+
+    def test_not_modified_reuses_result(self):
+        first = self.connector.process_request(self.url, {"u": 1}, dict)
+        second = self.connector.process_request(self.url, {"u": 1}, dict)
+        self.assertEqual(first, {"answer": 42})
+        self.assertEqual(second, first)
+        self.assertNotIn("If-None-Match", self.requests[0])
+        self.assertEqual(self.requests[1]["If-None-Match"], '"v1"')
+        self.assertIn("gzip", self.requests[0]["Accept-Encoding"])
+        self.assertEqual(self.observer.statuses, {(self.url, 200): 1, (self.url, 304): 1})
+        self.assertEqual(self.observer.encodings[(self.url, "identity")], 2)
+        self.assertEqual(self.observer.wire_size[self.url].count, 2)
+
+    def test_converted_per_request(self):
+        first = self.connector.process_request(self.url, {"u": 1}, dict)
+        answer = self.connector.process_request(self.url, {"u": 1}, lambda data: data["answer"])
+        self.assertEqual(self.requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(answer, 42)
+        self.assertIsNot(self.connector.process_request(self.url, {"u": 1}, dict), first)
+
+    def test_params_cached_separately(self):
+        self.connector.process_request(self.url, {"u": 1}, dict)
+        self.connector.process_request(self.url, {"u": 2}, dict)
+        self.assertNotIn("If-None-Match", self.requests[1])
+        self.assertEqual(len(self.cache), 2)
+
+    def test_lru(self):
+        lru = cache.ResponseCache(maxsize=1)
+        lru.store(self.url, {"u": 1}, {"ETag": "a"}, 1)
+        lru.store(self.url, {"u": 2}, {"Last-Modified": "b"}, 2)
+        self.assertIsNone(lru.get(self.url, {"u": 1}))
+        self.assertEqual(lru.conditional_headers(lru.get(self.url, {"u": 2})), {"If-Modified-Since": "b"})
+        self.assertEqual(lru.conditional_headers(None), {})
+
+
+class UnvalidatedResponseTest(ETagServerTest):
+    etag = None
+
+    def test_not_cached(self):
+        self.assertEqual(self.connector.process_request(self.url, {"u": 1}, dict), {"answer": 42})
+        self.connector.process_request(self.url, {"u": 1}, dict)
+        self.assertEqual(len(self.cache), 0)
+        self.assertNotIn("If-None-Match", self.requests[1])
+        self.assertFalse(self.cache.store(self.url, {"u": 1}, {}, {}))
+        self.assertTrue(self.cache.store(self.url, {"u": 1}, {}, {}, require_validator=False))
+
+
+class HistogramTest(unittest.TestCase):
+    def test_percentile(self):
+        hist = metrics.Histogram(bounds=(1, 2, 4, 8))
+        for value in [0.5] * 50 + [3] * 49 + [100]:
+            hist.observe(value)
+        self.assertEqual(hist.percentile(0.5), 1)
+        self.assertEqual(hist.percentile(0.99), 4)
+        self.assertEqual(hist.percentile(1), 100)
+
+    def test_endpoint_name(self):
+        self.assertEqual(metrics.endpoint_name(endpoints.BEATMAPS), "get_beatmaps")
+
+
+class SleepyConnector:
+    """Async connector answering every request after a short sleep, counting the requests in flight."""
+    def __init__(self):
+        self.threads = set()
+        self.closed = False
+        self.in_flight = 0
+        self.peak = 0
+
+    def close(self):
+        self.closed = True
+
+    async def process_request(self, endpoint, data, type_, retries=5):
+        self.threads.add(threading.get_ident())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+        if data.get("fail"):
+            raise osuapi.HTTPError(404, "Not Found", "")
+        return type_(data)
+
+
+class ThreadedAHConnectorTest(unittest.TestCase):
+    def setUp(self):
+        self.connector = osuapi.ThreadedAHConnector(factory=SleepyConnector)
+
+    def tearDown(self):
+        self.connector.close()
+
+    def test_many_threads(self):
+        with concurrent.futures.ThreadPoolExecutor(20) as pool:
+            results = list(pool.map(
+                lambda i: self.connector.process_request(endpoints.USER, {"u": i}, dict), range(40)))
+        self.assertEqual([r["u"] for r in results], list(range(40)))
+        # requests overlap on the one loop thread instead of running one by one
+        self.assertGreater(self.connector.connector.peak, 1)
+        self.assertEqual(self.connector.connector.threads, {self.connector._thread.ident})
+
+    def test_submit(self):
+        future = self.connector.submit(endpoints.USER, {"fail": True}, dict)
+        self.assertIsInstance(future, concurrent.futures.Future)
+        with self.assertRaises(osuapi.HTTPError):
+            future.result()
+
+    def test_close(self):
+        future = self.connector.submit(endpoints.USER, {"u": 1}, dict)
+        self.connector.close()
+        self.assertEqual(future.result(0), {"u": 1})
+        self.assertTrue(self.connector.connector.closed)
+        self.assertFalse(self.connector._thread.is_alive())
+
+    def test_without_aiohttp(self):
+        threads = threading.active_count()
+        session, connectors._ah_session = connectors._ah_session, None
+        try:
+            with self.assertRaisesRegex(ImportError, "aiohttp"):
+                osuapi.ThreadedAHConnector()
+        finally:
+            connectors._ah_session = session
+        self.assertEqual(threading.active_count(), threads)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class ThreadedAHConnectorServerTest(unittest.TestCase):
+    """The default factory: a real AHConnector on the loop thread."""
+
+    def setUp(self):
+        handler = type("Handler", (ETagHandler,), {"requests": []})
+        self.requests = handler.requests
+        self.httpd = http.server.ThreadingHTTPServer(("localhost", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = "http://localhost:{}/get_user".format(self.httpd.server_address[1])
+        self.observer = metrics.MetricsObserver()
+        self.connector = osuapi.ThreadedAHConnector(limit=4, observer=self.observer)
+
+    def tearDown(self):
+        self.connector.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_requests(self):
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(
+                lambda i: self.connector.process_request(self.url, {"u": i}, dict), range(16)))
+        self.assertEqual(results, [{"answer": 42}] * 16)
+        self.assertEqual(len(self.requests), 16)
+        self.assertEqual(self.observer.statuses, {(self.url, 200): 16})
+        self.assertEqual(self.observer.in_flight[self.url], 0)
+
+    def test_close(self):
+        future = self.connector.submit(self.url, {"u": 1}, dict)
+        sess = self.connector.connector.sess
+        self.connector.close()
+        self.assertEqual(future.result(0), {"answer": 42})
+        self.assertTrue(sess.closed)
+        self.assertFalse(self.connector._thread.is_alive())
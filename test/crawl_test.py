@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from osuapi import cli, endpoints
+from osuapi.crawl import Checkpoint, JsonlSink, ParquetSink, RateLimiter, RawConnector, crawl_keys
+from osuapi.errors import HTTPError
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+import samples
+
+
+class FakeConnector:
+    """Answers get_user, get_scores and get_beatmaps from generated rows."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requests = []
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        self.requests.append((endpoint, data))
+        if endpoint == endpoints.USER:
+            if data["u"] in self.fail:
+                raise HTTPError(404, "Not Found", "")
+            return type_([dict(samples.USER, user_id=str(data["u"]))])
+        if endpoint == endpoints.SCORES:
+            return type_([dict(samples.BEATMAP_SCORE, score_id=str(data["b"] * 10 + i)) for i in range(3)])
+        if endpoint == endpoints.BEATMAPS:
+            # 1200 maps in mode 0, ranked two per second
+            since = data["since"]
+            rows = [dict(samples.BEATMAP, beatmap_id=str(i), approved_date="2020-01-01 00:{:02}:{:02}".format(
+                i // 2 // 60, i // 2 % 60)) for i in range(1200)] if data["m"] == 0 else []
+            return type_([row for row in rows if row["approved_date"] >= since][:data["limit"]])
+        raise AssertionError(endpoint)
+
+
+class CrawlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def run_cli(self, *argv, connector=None):
+        args = cli.parser().parse_args(["crawl"] + list(argv) + ["--key", "key", "--rate", "1000"])
+        connector = connector or FakeConnector()
+        cli.crawl(args, connector=connector)
+        return connector
+
+    def read_jsonl(self, name):
+        with open(self.path(name)) as f:
+            return [json.loads(line) for line in f]
+
+    def test_users(self):
+        self.run_cli("users", "--ids", "1-30,40", "--mode", "osu", "mania", "-o", self.path("users.jsonl"),
+                     "--batch-size", "7", connector=FakeConnector(fail={5}))
+        rows = self.read_jsonl("users.jsonl")
+        self.assertEqual(len(rows), 60)
+        self.assertEqual({row["mode"] for row in rows}, {"0", "3"})
+        state = Checkpoint(self.path("users.jsonl.checkpoint")).state["users"]
+        self.assertEqual(state["position"], 62)
+        self.assertEqual(sorted(state["failed"]), [[5, 0], [5, 3]])
+
+    def test_resume(self):
+        connector = FakeConnector()
+        sink = JsonlSink(self.path("out.jsonl"))
+        checkpoint = Checkpoint(self.path("out.checkpoint"))
+        checkpoint.state["keys"] = {"position": 8, "failed": []}
+        crawl_keys(list(range(10)), lambda key: [{"key": key}], sink, name="keys", checkpoint=checkpoint)
+        sink.close()
+        self.assertEqual([row["key"] for row in self.read_jsonl("out.jsonl")], [8, 9])
+
+    def test_resume_retries_failed(self):
+        checkpoint = Checkpoint(self.path("out.checkpoint"))
+        flaky = {3, 5}
+
+        def fetch(key):
+            if key in flaky:
+                raise HTTPError(404, "Not Found", "")
+            return [{"key": key}]
+        sink = JsonlSink(self.path("out.jsonl"))
+        crawl_keys(list(range(8)), fetch, sink, name="keys", checkpoint=checkpoint, batch_size=1)
+        self.assertEqual(sorted(checkpoint.state["keys"]["failed"]), [3, 5])
+
+        flaky = {5}
+        crawl_keys(list(range(10)), fetch, sink, name="keys", checkpoint=checkpoint)
+        sink.close()
+        self.assertEqual(sorted(row["key"] for row in self.read_jsonl("out.jsonl")), [0, 1, 2, 3, 4, 6, 7, 8, 9])
+        self.assertEqual(checkpoint.state["keys"], {"position": 10, "failed": [5]})
+
+    def test_scores_sqlite(self):
+        self.run_cli("scores", "--ids", "1-5", "-o", self.path("scores.db"))
+        db = sqlite3.connect(self.path("scores.db"))
+        self.assertEqual(db.execute("SELECT count(*), count(DISTINCT beatmap_id) FROM scores").fetchone(), (15, 5))
+        db.close()
+
+    def test_beatmaps(self):
+        connector = self.run_cli("beatmaps", "-o", self.path("beatmaps.jsonl"))
+        ids = [row["beatmap_id"] for row in self.read_jsonl("beatmaps.jsonl")]
+        self.assertEqual(sorted(ids, key=int), [str(i) for i in range(1200)])
+        self.assertEqual(len([r for r in connector.requests if r[1]["m"] == 0]), 3)
+        # every mode ended on a short page, running again fetches nothing
+        connector = self.run_cli("beatmaps", "-o", self.path("beatmaps.jsonl"))
+        self.assertEqual(connector.requests, [])
+        self.assertEqual(len(self.read_jsonl("beatmaps.jsonl")), 1200)
+
+    def test_beatmaps_without_dates(self):
+        class Unranked(FakeConnector):
+            def process_request(self, endpoint, data, type_, retries=5):
+                rows = super().process_request(endpoint, data, list, retries)
+                return type_([dict(row, approved_date=None) if i % 3 == 0 else row for i, row in enumerate(rows)])
+        self.run_cli("beatmaps", "-o", self.path("beatmaps.jsonl"), connector=Unranked())
+        ids = {row["beatmap_id"] for row in self.read_jsonl("beatmaps.jsonl")}
+        self.assertEqual(ids, {str(i) for i in range(1200)})
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_new_columns(self):
+        sink = ParquetSink(self.path("out"))
+        sink.write([{"a": 1}])
+        sink.write([{"a": 2, "b": "x"}])
+        sink.write([{"b": "y"}])
+        sink.close()
+        parts = sorted(os.listdir(self.path("out")))
+        self.assertEqual(len(parts), 2)
+        tables = [pyarrow.parquet.read_table(os.path.join(self.path("out"), part)).to_pylist() for part in parts]
+        self.assertEqual(tables, [[{"a": "1"}], [{"a": "2", "b": "x"}, {"a": None, "b": "y"}]])
+
+    def test_raw_connector(self):
+        connector = RawConnector(FakeConnector())
+        self.assertEqual(connector.process_request(endpoints.USER, {"u": 1}, None)[0]["user_id"], "1")
+
+    def test_single_attempt(self):
+        attempts = []
+
+        class FiveOhFour(FakeConnector):
+            def process_request(self, endpoint, data, type_, retries=5):
+                attempts.append(retries)
+                raise HTTPError(504, "Gateway Timeout", "")
+        self.run_cli("users", "--ids", "1", "--retries", "1", "-o", self.path("users.jsonl"),
+                     connector=FiveOhFour())
+        self.assertEqual(attempts, [1, 1])
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(1000, burst=1)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertLessEqual(limiter._tokens, 0)
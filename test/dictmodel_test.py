@@ -0,0 +1,168 @@
+import unittest
+import warnings
+
+from osuapi import dictmodel
+from osuapi.enums import OsuMod
+from osuapi.model import Beatmap, SoloScore, JsonList, User, UserEvent
+
+import samples
+
+
+class DriftTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reports = []
+        dictmodel.set_drift_handler(lambda *args: self.reports.append(args))
+
+    def tearDown(self):
+        dictmodel.set_drift_handler(None)
+
+    def test_known_shape(self):
+        score = SoloScore(samples.SOLO_SCORE)
+        self.assertEqual(score.score_id, 2177560145)
+        self.assertEqual(self.reports, [])
+
+    def test_reported_once_per_shape(self):
+        rows = [dict(samples.SOLO_SCORE, new_field=str(i)) for i in range(10)]
+        scores = [SoloScore(row) for row in rows]
+        self.assertEqual(scores[9].pp, 798.011)
+        self.assertEqual(self.reports, [(SoloScore, {"new_field": "0"}, frozenset())])
+        self.assertIn("new_field", dictmodel.schema_drift()[SoloScore])
+
+    def test_missing(self):
+        row = dict(samples.BEATMAP)
+        del row["video"]
+        Beatmap(row)
+        self.assertEqual(self.reports, [(Beatmap, {}, frozenset(["video"]))])
+
+    def test_past_max_shapes(self):
+        shapes, SoloScore.__shapes__ = SoloScore.__shapes__, {}
+        try:
+            rows = [dict(samples.SOLO_SCORE, **{"field{}".format(i): "1"}) for i in range(dictmodel.MAX_SHAPES + 10)]
+            scores = [SoloScore(row) for row in rows + rows]
+            self.assertEqual(len(SoloScore.__shapes__), dictmodel.MAX_SHAPES)
+        finally:
+            SoloScore.__shapes__ = shapes
+        # reported once per set of keys, cached or not
+        self.assertEqual(len(self.reports), dictmodel.MAX_SHAPES + 10)
+        self.assertEqual(dict(scores[-1]), dict(SoloScore(samples.SOLO_SCORE)))
+
+    def test_default_warns(self):
+        dictmodel.set_drift_handler(None)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            for i in range(5):
+                SoloScore(dict(samples.SOLO_SCORE, other_field=str(i)))
+        self.assertEqual(len(caught), 1)
+        self.assertIn("other_field", str(caught[0].message))
+
+
+class JsonListTest(unittest.TestCase):
+
+    def test_mixed_shapes(self):
+        reordered = dict(reversed(list(samples.SOLO_SCORE.items())))
+        rows = [samples.SOLO_SCORE, reordered, dict(samples.SOLO_SCORE, score_id="1")]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            scores = JsonList(SoloScore)(rows)
+        self.assertEqual([type(score) for score in scores], [SoloScore] * 3)
+        self.assertEqual(dict(scores[0]), dict(scores[1]))
+        self.assertEqual(dict(scores[0]), dict(SoloScore(samples.SOLO_SCORE)))
+        self.assertEqual(scores[2].score_id, 1)
+
+    def test_empty(self):
+        self.assertEqual(JsonList(SoloScore)([]), [])
+
+
+class InternedTest(unittest.TestCase):
+
+    def test_shared(self):
+        first = Beatmap(dict(samples.BEATMAP, creator="".join(["pee", "ppy"])))
+        second = Beatmap(dict(samples.BEATMAP, creator="".join(["peep", "py"])))
+        self.assertIsNot(first.creator, "".join(["pee", "ppy"]))
+        self.assertIs(first.creator, second.creator)
+
+    def test_bounded(self):
+        convert = dictmodel.Interned(str, maxsize=1)
+        a = convert("".join(["a", "b"]))
+        self.assertIs(convert("".join(["a", "b"])), a)
+        c = "".join(["c", "d"])
+        self.assertIs(convert(c), c)
+        self.assertEqual(len(convert.table), 1)
+
+    def test_clear_and_disable(self):
+        Beatmap(samples.BEATMAP)
+        creator = Beatmap.__attributemodel__["creator"].type
+        self.assertIn(samples.BEATMAP["creator"], creator.table)
+        dictmodel.clear_interned()
+        self.assertEqual(creator.table, {})
+        try:
+            dictmodel.set_interning(False)
+            first = Beatmap(dict(samples.BEATMAP, creator="".join(["pee", "ppy"])))
+            second = Beatmap(dict(samples.BEATMAP, creator="".join(["peep", "py"])))
+            self.assertIsNot(first.creator, second.creator)
+            self.assertEqual(creator.table, {})
+        finally:
+            dictmodel.set_interning(True)
+
+
+class EnumAttributeTest(unittest.TestCase):
+
+    def test_stored_as_int(self):
+        score = SoloScore(dict(samples.SOLO_SCORE, enabled_mods="72"))
+        self.assertEqual(score.__dict__["enabled_mods"], 72)
+        self.assertEqual(score.enabled_mods, OsuMod.Hidden | OsuMod.DoubleTime)
+        self.assertEqual(dict(score)["enabled_mods"], OsuMod.Hidden | OsuMod.DoubleTime)
+
+    def test_flags_shared(self):
+        first = SoloScore(dict(samples.SOLO_SCORE, enabled_mods="72"))
+        second = SoloScore(dict(samples.SOLO_SCORE, enabled_mods="72"))
+        self.assertIs(first.enabled_mods, first.enabled_mods)
+        self.assertIs(first.enabled_mods, second.enabled_mods)
+
+    def test_set(self):
+        score = SoloScore(samples.SOLO_SCORE)
+        score.enabled_mods = OsuMod.HardRock
+        self.assertEqual(score.__dict__["enabled_mods"], 16)
+        self.assertEqual(score.enabled_mods, OsuMod.HardRock)
+        self.assertIsInstance(SoloScore.enabled_mods, dictmodel.EnumAttribute)
+
+    def test_roundtrip(self):
+        score = SoloScore(dict(samples.SOLO_SCORE, enabled_mods="24"))
+        decoded = SoloScore.from_bytes(score.to_bytes())
+        self.assertEqual(decoded.__dict__["enabled_mods"], 24)
+        self.assertEqual(dict(decoded), dict(score))
+
+
+class LazyListTest(unittest.TestCase):
+
+    def test_converted_once(self):
+        calls = []
+
+        def convert(value):
+            calls.append(value)
+            return int(value)
+
+        lst = JsonList(convert, lazy=True)(["1", "2", "3"])
+        self.assertEqual(len(lst), 3)
+        self.assertEqual(calls, [])
+        self.assertEqual(lst[1], 2)
+        self.assertEqual(lst[1], 2)
+        self.assertEqual(calls, ["2"])
+        self.assertEqual(lst[-1], 3)
+        self.assertEqual(lst, [1, 2, 3])
+        self.assertEqual(calls, ["2", "3", "1"])
+
+    def test_user_events(self):
+        user = User(dict(samples.USER, events=[samples.USER_EVENT] * 3))
+        self.assertIsInstance(user.events, dictmodel.LazyList)
+        self.assertIsNone(user.events._items)
+        self.assertIsInstance(user.events[0], UserEvent)
+        self.assertIs(user.events[0], user.events[0])
+        self.assertEqual(user.events[1:], [user.events[1], user.events[2]])
+        self.assertEqual(dict(user.events[2]), dict(UserEvent(samples.USER_EVENT)))
+
+    def test_roundtrip(self):
+        user = User(samples.USER)
+        decoded = User.from_bytes(user.to_bytes())
+        self.assertEqual(dict(decoded.events[0]), dict(user.events[0]))
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from osuapi import difficulty
+from osuapi.enums import OsuMod
+from osuapi.model import Beatmap
+
+import samples
+
+
+class WithModsTest(unittest.TestCase):
+
+    def setUp(self):
+        # AR 9, OD 8, CS 4, HP 6, 222.22 bpm
+        self.beatmap = Beatmap(samples.BEATMAP)
+
+    def test_nomod(self):
+        adjusted = self.beatmap.with_mods(OsuMod.Hidden)
+        self.assertEqual(adjusted.mods, OsuMod.NoMod)
+        self.assertEqual(adjusted.diff_approach, 9)
+        self.assertEqual(adjusted.total_length, 142)
+
+    def test_hardrock(self):
+        adjusted = self.beatmap.with_mods(OsuMod.HardRock)
+        self.assertEqual((adjusted.diff_approach, adjusted.diff_overall), (10, 10))
+        self.assertAlmostEqual(adjusted.diff_drain, 8.4)
+        self.assertAlmostEqual(adjusted.diff_size, 5.2)
+
+    def test_rate(self):
+        # Easy halves AR to 4.5 (1260ms) and OD to 4 (56ms) before the rate change
+        adjusted = self.beatmap.with_mods(OsuMod.DoubleTime | OsuMod.Nightcore | OsuMod.Easy)
+        self.assertAlmostEqual(adjusted.diff_approach, 5 + (1200 - 1260 / 1.5) / 150)
+        self.assertAlmostEqual(adjusted.diff_overall, (80 - 56 / 1.5) / 6)
+        self.assertAlmostEqual(adjusted.bpm, 333.33)
+        self.assertEqual((adjusted.total_length, adjusted.hit_length), (94, 72))
+        adjusted = self.beatmap.with_mods(OsuMod.HalfTime)
+        self.assertAlmostEqual(adjusted.diff_approach, 5 + (1200 - 600 / 0.75) / 150)
+        self.assertEqual(adjusted.total_length, 189)
+
+    def test_cached(self):
+        self.assertIs(self.beatmap.with_mods(OsuMod.DoubleTime),
+                      self.beatmap.with_mods(OsuMod.DoubleTime | OsuMod.Hidden))
+
+    def assertMany(self):
+        beatmaps = [Beatmap(dict(samples.BEATMAP, diff_approach=str(ar))) for ar in (2, 5, 9.5)]
+        for mods in (OsuMod.NoMod, OsuMod.HardRock | OsuMod.DoubleTime, OsuMod.Easy | OsuMod.HalfTime):
+            columns = difficulty.with_mods_many(beatmaps, mods)
+            for i, beatmap in enumerate(beatmaps):
+                expected = beatmap.with_mods(mods)
+                for name in difficulty.COLUMNS:
+                    self.assertAlmostEqual(columns[name][i], getattr(expected, name), msg=name)
+
+    def test_many(self):
+        self.assertMany()
+        with mock.patch.object(difficulty, "numpy", None):
+            self.assertMany()
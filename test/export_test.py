@@ -0,0 +1,88 @@
+import csv
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+from osuapi.export import TABLES, MatchExporter, export_matches
+from osuapi.model import Match
+
+import samples
+
+try:
+    import pyarrow.ipc
+    import pyarrow.types
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def matches(count):
+    for i in range(count):
+        match = dict(samples.MATCH, match=dict(samples.MATCH["match"], match_id=str(i)))
+        yield Match(match)
+
+
+class MatchExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_schema(self):
+        self.assertEqual([column.name for column in TABLES["scores"]][:3], ["match_id", "game_id", "score"])
+        self.assertNotIn("scores", [column.name for column in TABLES["games"]])
+        self.assertIn("passed", [column.name for column in TABLES["scores"]])
+
+    def test_csv(self):
+        counts = export_matches(matches(3), self.dir, "csv", batch_size=2)
+        self.assertEqual(counts, {"matches": 3, "games": 3, "scores": 6})
+        with open(os.path.join(self.dir, "scores.csv"), newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["match_id"] for row in rows], ["0", "0", "1", "1", "2", "2"])
+        self.assertEqual(rows[0]["game_id"], "261640022")
+        self.assertEqual(rows[0]["enabled_mods"], "8")
+        with open(os.path.join(self.dir, "matches.csv"), newline="") as f:
+            match = next(csv.DictReader(f))
+        self.assertEqual(match["start_time"], "2018-12-16 07:00:05")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        open_match = dict(samples.MATCH, match=dict(samples.MATCH["match"], end_time=None))
+        with MatchExporter(self.dir, "parquet", batch_size=3) as exporter:
+            for match in matches(4):
+                exporter.write(match)
+            exporter.write(Match(open_match))
+        games = pyarrow.parquet.read_table(os.path.join(self.dir, "games.parquet"))
+        self.assertEqual(games.num_rows, 5)
+        self.assertTrue(pyarrow.types.is_timestamp(games.schema.field("start_time").type))
+        self.assertEqual(games.column("mods").to_pylist(), [1] * 5)
+        scores = pyarrow.parquet.read_table(os.path.join(self.dir, "scores.parquet"))
+        self.assertEqual(scores.column("passed").to_pylist(), [True] * 10)
+        matches_table = pyarrow.parquet.read_table(os.path.join(self.dir, "matches.parquet"))
+        self.assertIsNone(matches_table.column("end_time").to_pylist()[-1])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_missing_field(self):
+        game = dict(samples.MATCH["games"][0])
+        del game["scoring_type"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            match = Match(dict(samples.MATCH, games=[game]))
+        export_matches(itertools.chain(matches(1), [match]), self.dir, "parquet")
+        games = pyarrow.parquet.read_table(os.path.join(self.dir, "games.parquet"))
+        self.assertEqual(games.column("scoring_type").to_pylist(), [3, None])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow(self):
+        export_matches(matches(2), self.dir, "arrow")
+        with pyarrow.ipc.open_file(os.path.join(self.dir, "scores.arrow")) as reader:
+            self.assertEqual(reader.read_all().num_rows, 4)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            MatchExporter(self.dir, "xlsx")
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import osuapi
+from osuapi import connectors
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# not loaded by `import osuapi`, only once the features needing them are used
+HEAVY = ("aiohttp", "requests", "numpy", "asyncio", "osuapi.connectors", "osuapi.difficulty")
+
+
+def imported_by(module):
+    """Import module in a fresh interpreter, returning the names of the modules loaded.
+
+    Import times are left to ``python -m bench imports``."""
+    proc = subprocess.run(
+        [sys.executable, "-c", "import sys, {}; print('\\n'.join(sys.modules))".format(module)],
+        cwd=ROOT, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return set(proc.stdout.split())
+
+
+class ImportTest(unittest.TestCase):
+    def test_no_heavy_imports(self):
+        modules = imported_by("osuapi")
+        self.assertIn("osuapi.osu", modules)
+        for heavy in HEAVY:
+            self.assertNotIn(heavy, modules)
+
+    def test_observers_without_connectors(self):
+        for module in ("osuapi.metrics", "osuapi.cache"):
+            modules = imported_by(module)
+            for heavy in ("aiohttp", "requests", "osuapi.connectors"):
+                self.assertNotIn(heavy, modules)
+
+    def test_lazy_connectors(self):
+        self.assertIs(osuapi.ReqConnector, connectors.ReqConnector)
+        self.assertIs(osuapi.AHConnector, connectors.AHConnector)
+        self.assertIn("ThreadedAHConnector", dir(osuapi))
+        with self.assertRaises(AttributeError):
+            osuapi.NotAConnector
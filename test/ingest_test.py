@@ -0,0 +1,47 @@
+import array
+import io
+import json
+import unittest
+
+from osuapi.ingest import ingest, ingest_columns
+from osuapi.model import BeatmapScore, SoloScore, JsonList
+from osuapi.serialization import codec
+
+import samples
+
+
+def dump(count):
+    scores = [dict(samples.SOLO_SCORE, score_id=str(i), pp=None if i % 7 == 0 else str(i / 10)) for i in range(count)]
+    # a mix of one row per line and whole responses per line
+    lines = [json.dumps(score) for score in scores[:count // 2]]
+    lines += [json.dumps(scores[i:i + 10]) for i in range(count // 2, count, 10)]
+    return scores, io.BytesIO("\n".join(lines).encode("utf-8") + b"\n\n")
+
+
+class IngestTest(unittest.TestCase):
+
+    def test_binary(self):
+        scores, f = dump(200)
+        blobs = list(ingest(f, SoloScore, workers=2, chunk_size=4096))
+        self.assertGreater(len(blobs), 2)
+        decoded = [score for blob in blobs for score in codec(SoloScore).decode(blob)]
+        self.assertEqual([dict(score) for score in decoded], [dict(score) for score in JsonList(SoloScore)(scores)])
+
+    def test_in_process(self):
+        scores, f = dump(40)
+        blob, = ingest(f, SoloScore, workers=1)
+        self.assertEqual([score.score_id for score in codec(SoloScore).decode(blob)], list(range(40)))
+        self.assertEqual(list(ingest(io.BytesIO(b""), SoloScore)), [])
+
+    def test_columns(self):
+        scores, f = dump(200)
+        columns = ingest_columns(f, SoloScore, workers=2, chunk_size=4096)
+        self.assertEqual(columns["score_id"], array.array("q", range(200)))
+        self.assertIsInstance(columns["perfect"], array.array)
+        self.assertEqual(columns["pp"][:8], [None, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, None])
+        self.assertEqual(columns["enabled_mods"][0], 24)
+        self.assertEqual(columns["date"][0], "2013-06-22 09:12:30")
+
+    def test_empty_columns(self):
+        columns = ingest_columns(io.BytesIO(b""), BeatmapScore)
+        self.assertEqual(columns["score"], [])
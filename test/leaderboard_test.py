@@ -0,0 +1,60 @@
+import pickle
+import unittest
+
+from osuapi.enums import OsuMod
+from osuapi.leaderboard import Leaderboards
+from osuapi.model import BeatmapScore, SoloScore
+
+import samples
+
+
+def score(score_id, user_id, value, mods=0):
+    return BeatmapScore(dict(samples.BEATMAP_SCORE, score_id=str(score_id), user_id=str(user_id),
+                             score=str(value), enabled_mods=str(mods)))
+
+
+class LeaderboardsTest(unittest.TestCase):
+
+    def test_top_k_best_per_user(self):
+        boards = Leaderboards(k=3)
+        boards.add([score(1, 1, 100), score(2, 2, 300), score(3, 1, 500), score(4, 3, 200),
+                    score(5, 4, 50), score(6, 2, 250), score(7, 5, 200)], beatmap_id=10)
+        self.assertEqual([s.score_id for s in boards.top(10)], [3, 2, 4])
+        self.assertEqual(list(boards.keys()), [(10, 0)])
+
+    def test_k_at_least_one(self):
+        with self.assertRaises(ValueError):
+            Leaderboards(k=0)
+        boards = Leaderboards(k=1)
+        boards.add([score(1, 1, 100), score(2, 2, 300), score(3, 3, 200)], beatmap_id=10)
+        self.assertEqual([s.score_id for s in boards.top(10)], [2])
+
+    def test_mods(self):
+        boards = Leaderboards(k=2)
+        boards.add([score(1, 1, 100, 16), score(2, 2, 300), score(3, 1, 500)], beatmap_id=10)
+        self.assertEqual([s.score_id for s in boards.top(10, mods=OsuMod.HardRock)], [1])
+        self.assertEqual([s.score_id for s in boards.top(10, mods=0)], [3, 2])
+        self.assertEqual([s.score_id for s in boards.top(10)], [3, 2])
+
+    def test_groups(self):
+        countries = {1: "KR", 2: "DE", 3: "KR"}
+        boards = Leaderboards(k=5, group=lambda s: countries[s.user_id])
+        boards.add([score(1, 1, 100), score(2, 2, 300), score(3, 3, 200)], beatmap_id=10)
+        self.assertEqual([s.user_id for s in boards.top(10, group="KR")], [3, 1])
+
+    def test_merge(self):
+        scores = [score(i, i % 7, i * 37 % 101) for i in range(1, 60)]
+        whole = Leaderboards(k=4)
+        whole.add(scores, beatmap_id=10)
+        parts = [Leaderboards(k=4), Leaderboards(k=4)]
+        parts[0].add(scores[::2], beatmap_id=10)
+        parts[1].add(scores[1::2], beatmap_id=10)
+        merged = Leaderboards(k=4)
+        for part in parts:
+            merged.merge(pickle.loads(pickle.dumps(part)))
+        self.assertEqual([s.score_id for s in merged.top(10)], [s.score_id for s in whole.top(10)])
+
+    def test_solo_scores(self):
+        boards = Leaderboards()
+        boards.add([SoloScore(samples.SOLO_SCORE)])
+        self.assertEqual(list(boards.keys()), [(129891, 24)])
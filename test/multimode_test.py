@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from osuapi import OsuApi, OsuMode
+from osuapi.model import User, UserModes
+
+import samples
+
+
+class ModeConnector:
+    """Answers get_user with the sample user, ranked by mode, after a delay.
+
+    peak is the most requests that were in flight at once."""
+    delay = 0.1
+
+    def __init__(self):
+        self.threads = set()
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        pass
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def response(self, data):
+        self.threads.add(threading.get_ident())
+        if data["u"] == "nobody":
+            return []
+        return [dict(samples.USER, pp_rank=str(data["m"] + 1))]
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        self.started()
+        try:
+            time.sleep(self.delay)
+        finally:
+            self.finished()
+        return type_(self.response(data))
+
+
+class AsyncModeConnector(ModeConnector):
+    asynchronous = True
+
+    async def process_request(self, endpoint, data, type_, retries=5):
+        self.started()
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.finished()
+        return type_(self.response(data))
+
+
+class WrappedAsyncConnector(AsyncModeConnector):
+    # returns coroutines without declaring itself asynchronous
+    asynchronous = False
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return AsyncModeConnector.process_request(self, endpoint, data, type_, retries)
+
+
+class UserAllModesTest(unittest.TestCase):
+
+    def check(self, user):
+        self.assertIsInstance(user, UserModes)
+        self.assertEqual(list(user), list(OsuMode))
+        self.assertEqual([user[mode].pp_rank for mode in OsuMode], [1, 2, 3, 4])
+        self.assertEqual(user.username, "Cookiezi")
+        for mode in OsuMode:
+            self.assertIsInstance(user[mode], User)
+            self.assertIs(user[mode].events, user.events)
+            self.assertIs(user[mode].join_date, user.join_date)
+
+    def test_threads(self):
+        connector = ModeConnector()
+        api = OsuApi("key", connector=connector)
+        self.check(api.get_user_all_modes("Cookiezi"))
+        self.assertGreater(connector.peak, 1)
+        self.assertEqual(len(connector.threads), 4)
+        self.assertIsNone(api.get_user_all_modes("nobody"))
+
+    def test_async(self):
+        for connector in (AsyncModeConnector(), WrappedAsyncConnector()):
+            api = OsuApi("key", connector=connector)
+
+            async def run():
+                self.check(await api.get_user_all_modes("Cookiezi"))
+
+            asyncio.run(run())
+            # the four requests are awaited together
+            self.assertEqual(connector.peak, 4)
+
+    def test_as_tuples(self):
+        api = OsuApi("key", connector=ModeConnector())
+        rows = api.get_user_all_modes("Cookiezi", as_tuples={"dates"})
+        self.assertEqual(list(rows), list(OsuMode))
+        self.assertEqual([rows[mode].pp_rank for mode in OsuMode], [1, 2, 3, 4])
+        self.assertEqual(type(rows[OsuMode.osu]).__name__, "UserRow")
+        self.assertEqual(rows[OsuMode.taiko].join_date.year, 2011)
+        self.assertIsNone(api.get_user_all_modes("nobody", as_tuples=True))
@@ -0,0 +1,59 @@
+import random
+import unittest
+from unittest import mock
+
+from osuapi import performance
+from osuapi.model import SoloScore
+
+import samples
+
+
+def best(seed, users=20):
+    rng = random.Random(seed)
+    result = {}
+    for user_id in range(users):
+        result[user_id] = [
+            SoloScore(dict(samples.SOLO_SCORE, pp=str(rng.uniform(10, 700)), count100=str(rng.randrange(50)),
+                           rank=rng.choice(performance.RANKS)))
+            for _ in range(rng.randrange(0, 100))]
+    return result
+
+
+class ProfilesTest(unittest.TestCase):
+
+    def test_weighting(self):
+        scores = [SoloScore(dict(samples.SOLO_SCORE, pp=str(pp), rank=rank))
+                  for pp, rank in ((100, "S"), (300, "XH"), (200, "S"))]
+        profile = performance.profiles({1: scores}, score_counts={1: 10})[1]
+        self.assertAlmostEqual(profile.pp, 300 + 200 * 0.95 + 100 * 0.95 ** 2)
+        self.assertAlmostEqual(profile.bonus_pp, 416.6667 * (1 - 0.9994 ** 10))
+        self.assertAlmostEqual(profile.total_pp, profile.pp + profile.bonus_pp)
+        self.assertAlmostEqual(profile.accuracy, scores[0].accuracy(performance.OsuMode.osu))
+        self.assertEqual(profile.ranks, {"S": 2, "XH": 1})
+
+    def test_implementations_agree(self):
+        cols = performance.columns(best(1))
+        counts = [None] * len(cols.user_ids)
+        python = performance._compute_python(cols, counts)
+        if performance.numpy is None:
+            self.skipTest("numpy not installed")
+        for a, b in zip(python, performance._compute_numpy(cols, counts)):
+            self.assertAlmostEqual(a.pp, b.pp)
+            self.assertAlmostEqual(a.accuracy, b.accuracy)
+            self.assertAlmostEqual(a.bonus_pp, b.bonus_pp)
+            self.assertEqual(a.ranks, b.ranks)
+
+    def test_process_pool(self):
+        cols = performance.columns(best(2, users=50))
+        counts = {user_id: 200 + i for i, user_id in enumerate(cols.user_ids)}
+        serial = performance.profiles(cols, score_counts=counts, workers=1)
+        # 50 users in chunks of 7, the last one short
+        self.assertEqual(len(list(performance._chunks(cols, [None] * 50, 7))), 8)
+        with mock.patch.object(performance, "PARALLEL_THRESHOLD", 10), \
+                mock.patch.object(performance, "_MIN_CHUNK", 1):
+            parallel = performance.profiles(cols, score_counts=counts, workers=2)
+        self.assertEqual(list(parallel), list(serial))
+        for user_id, profile in serial.items():
+            self.assertAlmostEqual(parallel[user_id].pp, profile.pp)
+            self.assertAlmostEqual(parallel[user_id].bonus_pp, profile.bonus_pp)
+            self.assertEqual(parallel[user_id].ranks, profile.ranks)
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import osuapi
+from osuapi import endpoints
+from osuapi.metrics import RequestObserver
+from osuapi.recording import Archive, RecordingConnector, ReplayConnector
+
+
+class DictConnector:
+    """Answers requests from a dict of endpoint -> response."""
+    def __init__(self, responses):
+        self.responses = responses
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return type_(self.responses[endpoint])
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def close(self):
+        pass
+
+
+class Session:
+    """requests session answering every request with the same body."""
+    def __init__(self, content):
+        self.content = content
+
+    def get(self, url, params=None, headers=None):
+        return Response(self.content)
+
+    def close(self):
+        pass
+
+
+class DecodeObserver(RequestObserver):
+    def __init__(self):
+        self.decoded = 0
+
+    def response_decoded(self, endpoint, elapsed):
+        self.decoded += 1
+
+
+USER = [{"user_id": "2", "username": "peppy", "country": "AU", "events": [], "join_date": "2007-08-28 03:09:12",
+         "pp_country_rank": "1"}]
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "traffic.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self):
+        archive = Archive(self.path)
+        api = osuapi.OsuApi("secret", connector=RecordingConnector(DictConnector({endpoints.USER: USER}), archive))
+        api.get_user("peppy")
+        api.close()
+
+    def test_replay(self):
+        self.record()
+        archive = Archive(self.path)
+        self.assertEqual(len(archive), 1)
+        api = osuapi.OsuApi("other key", connector=ReplayConnector(archive))
+        res = api.get_user("peppy")
+        self.assertEqual(res[0].username, "peppy")
+        with self.assertRaisesRegex(osuapi.HTTPError, "404"):
+            api.get_user("cookiezi")
+        api.close()
+
+    def test_key_not_recorded(self):
+        self.record()
+        exchange, = Archive(self.path)
+        self.assertNotIn("k", exchange.params)
+        with open(self.path, "rb") as f:
+            self.assertNotIn(b"secret", f.read())
+
+    def test_rebuild_index(self):
+        self.record()
+        self.record()
+        os.remove(self.path + ".idx")
+        archive = Archive(self.path)
+        self.assertEqual(len(archive), 2)
+        self.assertEqual(len(archive.lookup(endpoints.USER, {"u": "peppy", "type": "string", "m": 0, "event_days": 31})), 2)
+
+    def test_replay_async(self):
+        self.record()
+        api = osuapi.OsuApi("key", connector=ReplayConnector(Archive(self.path), speed=100, asynchronous=True))
+        loop = asyncio.new_event_loop()
+        res = loop.run_until_complete(api.get_user("peppy"))
+        loop.close()
+        self.assertEqual(res[0].user_id, 2)
+        api.close()
+
+    def test_raw_body(self):
+        # recorded as sent, escapes and all
+        body = b'[{"user_id":"2","username":"\\u0070eppy","country":"AU","events":[]}]'
+        archive = Archive(self.path)
+        api = osuapi.OsuApi("key", connector=RecordingConnector(osuapi.ReqConnector(Session(body)), archive))
+        api.get_user("peppy")
+        api.close()
+        exchange, = Archive(self.path)
+        self.assertEqual(exchange.body, body)
+
+        observer = DecodeObserver()
+        api = osuapi.OsuApi("key", connector=ReplayConnector(Archive(self.path), observer=observer))
+        self.assertEqual(api.get_user("peppy")[0].username, "peppy")
+        self.assertEqual(observer.decoded, 1)
+        api.close()
+
+    def test_timeline(self):
+        archive = Archive(self.path)
+        connector = RecordingConnector(DictConnector({endpoints.USER: USER, endpoints.USER_BEST: []}), archive)
+        api = osuapi.OsuApi("key", connector=connector)
+        api.get_user("peppy")
+        time.sleep(0.2)
+        api.get_user_best("peppy")
+        api.close()
+
+        api = osuapi.OsuApi("key", connector=ReplayConnector(Archive(self.path), speed=2))
+        start = time.monotonic()
+        api.get_user("peppy")
+        api.get_user_best("peppy")
+        # the second response comes 0.2s into the recording, 0.1s into the replay
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        api.close()
+
+    def test_replay_threads(self):
+        self.record()
+        self.record()
+        replay = ReplayConnector(Archive(self.path))
+        api = osuapi.OsuApi("key", connector=replay)
+        threads = [threading.Thread(target=api.get_user, args=("peppy",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(replay._served.values()), 8)
+        api.close()
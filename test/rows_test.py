@@ -0,0 +1,70 @@
+import datetime
+import unittest
+
+from osuapi import OsuApi, endpoints, rows
+from osuapi.enums import BeatmapStatus, OsuMod
+from osuapi.model import Beatmap, BeatmapScore, Match
+
+import samples
+
+
+class StaticConnector:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        return type_(self.responses[endpoint])
+
+
+class RowsTest(unittest.TestCase):
+
+    def test_fields_match_model(self):
+        row = rows.converter(Beatmap, many=False)(samples.BEATMAP)
+        model = Beatmap(samples.BEATMAP)
+        self.assertEqual(set(row._fields), set(dict(model)))
+        self.assertEqual(type(row).__name__, "BeatmapRow")
+
+    def test_numeric_only(self):
+        row, = rows.converter(BeatmapScore)([samples.BEATMAP_SCORE])
+        self.assertEqual(row.score, 132408001)
+        self.assertEqual(row.pp, 798.011)
+        self.assertIs(row.perfect, True)
+        self.assertEqual(row.enabled_mods, 16)
+        self.assertEqual(row.date, "2013-06-22 09:12:30")
+        self.assertEqual(row.username, "Cookiezi")
+
+    def test_conversions(self):
+        row, = rows.converter(BeatmapScore, {"dates", "enums"})([samples.BEATMAP_SCORE])
+        self.assertEqual(row.enabled_mods, OsuMod.HardRock)
+        self.assertEqual(row.date, datetime.datetime(2013, 6, 22, 9, 12, 30))
+        beatmap = rows.converter(Beatmap, {"enums"}, many=False)(samples.BEATMAP)
+        self.assertIs(beatmap.approved, BeatmapStatus.ranked)
+        self.assertEqual(beatmap.packs, "S41,T120")
+        with self.assertRaises(ValueError):
+            rows.row_type(Beatmap, {"colours"})
+
+    def test_nulls_and_missing(self):
+        data = dict(samples.BEATMAP, approved_date=None, max_combo=None)
+        del data["diff_aim"]
+        row = rows.converter(Beatmap, {"dates"}, many=False)(data)
+        self.assertIsNone(row.approved_date)
+        self.assertIsNone(row.max_combo)
+        self.assertIsNone(row.diff_aim)
+
+    def test_nested(self):
+        match = rows.converter(Match, many=False)(samples.MATCH)
+        self.assertEqual(match.match.match_id, 49006012)
+        self.assertEqual([score.passed for score in match.games[0].scores], [True, True])
+        self.assertEqual(match.games[0].mods, 1)
+
+    def test_api(self):
+        api = OsuApi("key", connector=StaticConnector({
+            endpoints.SCORES: [samples.BEATMAP_SCORE], endpoints.MATCH: samples.MATCH}))
+        row, = api.get_scores(129891, as_tuples=True)
+        self.assertIsInstance(row, rows.row_type(BeatmapScore))
+        self.assertEqual(row.score_id, 2177560145)
+        self.assertEqual(api.get_match(49006012, as_tuples={"enums"}).games[0].mods, OsuMod.NoFail)
+        self.assertIsInstance(api.get_scores(129891)[0], BeatmapScore)
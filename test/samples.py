@@ -0,0 +1,64 @@
+"""Api response rows used by the offline tests."""
+
+BEATMAP = {
+    "beatmapset_id": "39804", "beatmap_id": "129891", "approved": "1", "total_length": "142",
+    "hit_length": "109", "version": "FOUR DIMENSIONS", "file_md5": "da8aae79c8f3306b5d65ec951874a7fb",
+    "diff_size": "4", "diff_overall": "8", "diff_approach": "9", "diff_drain": "6", "mode": "0",
+    "count_normal": "1223", "count_slider": "404", "count_spinner": "3",
+    "submit_date": "2011-06-29 04:43:01", "approved_date": "2011-11-05 20:48:48",
+    "last_update": "2011-11-05 19:36:35", "artist": "xi", "artist_unicode": "xi",
+    "title": "FREEDOM DiVE", "title_unicode": "FREEDOM DiVE", "creator": "Nakagawa-Kanon",
+    "creator_id": "87065", "bpm": "222.22", "source": "BMS", "tags": "parousia onosakihito",
+    "genre_id": "2", "language_id": "5", "favourite_count": "15321", "rating": "9.57031",
+    "storyboard": "0", "video": "0", "download_unavailable": "0", "audio_unavailable": "0",
+    "playcount": "11093364", "passcount": "1123546", "packs": "S41,T120", "max_combo": "2385",
+    "diff_aim": "3.4201", "diff_speed": "3.76217", "difficultyrating": "7.23645",
+}
+
+BEATMAP_SCORE = {
+    "score_id": "2177560145", "score": "132408001", "username": "Cookiezi", "maxcombo": "2385",
+    "count50": "0", "count100": "5", "count300": "1978", "countmiss": "0", "countkatu": "5",
+    "countgeki": "247", "perfect": "1", "enabled_mods": "16", "user_id": "124493",
+    "date": "2013-06-22 09:12:30", "rank": "SH", "pp": "798.011", "replay_available": "1",
+}
+
+SOLO_SCORE = {
+    "beatmap_id": "129891", "score_id": "2177560145", "score": "132408001", "maxcombo": "2385",
+    "count50": "0", "count100": "5", "count300": "1978", "countmiss": "0", "countkatu": "5",
+    "countgeki": "247", "perfect": "1", "enabled_mods": "24", "user_id": "124493",
+    "date": "2013-06-22 09:12:30", "rank": "XH", "pp": "798.011", "replay_available": "1",
+}
+
+USER_EVENT = {
+    "display_html": "<img src='/images/A_small.png'/> <b><a href='/u/124493'>Cookiezi</a></b> achieved "
+                    "rank #1 on <a href='/b/129891?m=0'>xi - FREEDOM DiVE [FOUR DIMENSIONS]</a> (osu!)",
+    "beatmap_id": "129891", "beatmapset_id": "39804", "date": "2013-06-22 09:12:30", "epicfactor": "1",
+}
+
+USER = {
+    "user_id": "124493", "username": "Cookiezi", "join_date": "2011-09-08 08:31:03",
+    "count300": "22536456", "count100": "988513", "count50": "74211", "playcount": "82343",
+    "ranked_score": "32003432511", "total_score": "143255612384", "pp_rank": "3", "level": "102.431",
+    "pp_raw": "14356.2", "accuracy": "98.82123565673828", "count_rank_ss": "72",
+    "count_rank_ssh": "1433", "count_rank_s": "310", "count_rank_sh": "2019", "count_rank_a": "1107",
+    "country": "KR", "total_seconds_played": "4018342", "pp_country_rank": "1",
+    "events": [USER_EVENT],
+}
+
+MATCH = {
+    "match": {"match_id": "49006012", "name": "OWC: (South Korea) vs (Germany)",
+              "start_time": "2018-12-16 07:00:05", "end_time": "2018-12-16 08:20:33"},
+    "games": [{
+        "game_id": "261640022", "start_time": "2018-12-16 07:06:11", "end_time": "2018-12-16 07:09:02",
+        "beatmap_id": "129891", "play_mode": "0", "match_type": "0", "scoring_type": "3",
+        "team_type": "2", "mods": "1",
+        "scores": [
+            {"slot": "0", "team": "1", "user_id": "124493", "score": "912345", "maxcombo": "2385",
+             "rank": "0", "count50": "0", "count100": "12", "count300": "1971", "countmiss": "0",
+             "countgeki": "240", "countkatu": "10", "perfect": "1", "pass": "1", "enabled_mods": "8"},
+            {"slot": "4", "team": "2", "user_id": "2558286", "score": "854120", "maxcombo": "1822",
+             "rank": "0", "count50": "1", "count100": "30", "count300": "1952", "countmiss": "1",
+             "countgeki": "228", "countkatu": "22", "perfect": "0", "pass": "1", "enabled_mods": "0"},
+        ],
+    }],
+}
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from osuapi import search
+from osuapi.model import Beatmap
+from osuapi.search import SearchIndex, tokenize
+
+import samples
+
+
+BEATMAPS = [
+    Beatmap(dict(samples.BEATMAP)),
+    Beatmap(dict(samples.BEATMAP, beatmap_id="2", title="Freedom", title_unicode="Freedom", artist="someone",
+                 tags="", version="Insane")),
+    Beatmap(dict(samples.BEATMAP, beatmap_id="3", title="Bad Apple!!", title_unicode="Bad Apple!!",
+                 artist="Alstroemeria Records", artist_unicode="Alstroemeria Records", tags="東方 touhou",
+                 version="Lunatic", creator="ouranhshc", source="東方幻想郷")),
+    Beatmap(dict(samples.BEATMAP, beatmap_id="4", title="Senbonzakura", title_unicode="千本桜",
+                 artist="Kurousa-P", artist_unicode="黒うさP", tags="vocaloid miku", version="Hard")),
+]
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex.build(BEATMAPS)
+
+    def search(self, query, index=None):
+        return [hit.beatmap_id for hit in (index or self.index).search(query)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("FREEDOM DiVE↓"), ["freedom", "dive"])
+        self.assertEqual(tokenize("千本桜 Ｍｉｋｕ"), ["千本", "本桜", "miku"])
+        self.assertEqual(tokenize("千本桜", unigrams=True), ["千本", "本桜", "千", "本", "桜"])
+
+    def test_single_character(self):
+        self.assertEqual(self.search("桜"), [4])
+        self.assertEqual(self.search("方"), [3])
+        self.assertEqual(self.search("本"), [4])
+
+    def test_max_expansions(self):
+        beatmaps = [Beatmap(dict(samples.BEATMAP, beatmap_id=str(i), tags="qa{}".format(i))) for i in range(1, 11)]
+        beatmaps += [Beatmap(dict(samples.BEATMAP, beatmap_id=str(i), tags="qbig")) for i in (11, 12)]
+        index = SearchIndex.build(beatmaps)
+        expansions, search.MAX_EXPANSIONS = search.MAX_EXPANSIONS, 4
+        try:
+            # the most common words starting with q, not the first ones in order
+            self.assertEqual(sorted(self.search("q", index)), [1, 2, 10, 11, 12])
+            search.MAX_EXPANSIONS = 1
+            # the word itself is always looked at
+            self.assertEqual(self.search("qa1", index), [1])
+        finally:
+            search.MAX_EXPANSIONS = expansions
+
+    def test_search(self):
+        self.assertEqual(self.search("freedom dive"), [129891])
+        self.assertEqual(sorted(self.search("freedom")), [2, 129891])
+        self.assertEqual(sorted(self.search("free")), [2, 129891])
+        self.assertEqual(self.search("bad appl"), [3])
+        self.assertEqual(self.search("千本桜"), [4])
+        self.assertEqual(self.search("東方"), [3])
+        self.assertEqual(self.search("freedom apple"), [])
+        self.assertEqual(self.search(""), [])
+
+    def test_save_load(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "search.idx")
+            self.index.save(path)
+            with SearchIndex.load(path) as loaded:
+                self.assertEqual(len(loaded), 4)
+                for query in ("freedom", "kurousa", "本桜", "lunatic"):
+                    self.assertEqual(loaded.search(query), self.index.search(query))
+        finally:
+            shutil.rmtree(tmp)
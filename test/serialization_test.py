@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from osuapi.dictmodel import AttributeModel, LazyList
+from osuapi.model import Beatmap, BeatmapScore, SoloScore, User, Match
+from osuapi.beatmaptable import BeatmapTable
+from osuapi.serialization import codec
+
+import samples
+
+
+class CodecTest(unittest.TestCase):
+
+    def assertRoundTrip(self, model, row):
+        obj = model(row)
+        decoded = model.from_bytes(obj.to_bytes())
+        self.assertIsInstance(decoded, model)
+        for k, v in obj:
+            if isinstance(v, (list, LazyList)) and v and isinstance(v[0], AttributeModel):
+                self.assertEqual(len(getattr(decoded, k)), len(v), k)
+            elif not isinstance(v, AttributeModel):
+                self.assertEqual(getattr(decoded, k), v, k)
+        return decoded
+
+    def test_beatmap(self):
+        self.assertRoundTrip(Beatmap, samples.BEATMAP)
+
+    def test_nulls(self):
+        row = dict(samples.BEATMAP, approved_date=None, diff_aim=None, packs=None)
+        decoded = self.assertRoundTrip(Beatmap, row)
+        self.assertIsNone(decoded.approved_date)
+        self.assertIsNone(decoded.packs)
+
+    def test_scores(self):
+        self.assertRoundTrip(SoloScore, samples.SOLO_SCORE)
+        self.assertRoundTrip(BeatmapScore, dict(samples.BEATMAP_SCORE, pp=None))
+
+    def test_nested(self):
+        user = self.assertRoundTrip(User, samples.USER)
+        self.assertEqual(dict(user.events[0]), dict(User(samples.USER).events[0]))
+        match = self.assertRoundTrip(Match, samples.MATCH)
+        self.assertEqual(match.match.name, "OWC: (South Korea) vs (Germany)")
+        self.assertEqual(match.games[0].scores[1].user_id, 2558286)
+
+    def test_many_share_strings(self):
+        rows = [dict(samples.BEATMAP, beatmap_id=str(i)) for i in range(50)]
+        beatmaps = [Beatmap(row) for row in rows]
+        blob = codec(Beatmap).encode_many(beatmaps)
+        self.assertLess(len(blob), 50 * len(beatmaps[0].to_bytes()) / 1.5)
+        decoded = codec(Beatmap).decode(blob)
+        self.assertEqual([b.beatmap_id for b in decoded], list(range(50)))
+
+    def test_json_passthrough(self):
+        blob = codec(Beatmap).encode_json([samples.BEATMAP])
+        decoded, = codec(Beatmap).decode(blob)
+        self.assertEqual(dict(decoded), dict(Beatmap(samples.BEATMAP)))
+
+    def test_wrong_model(self):
+        with self.assertRaises(ValueError):
+            SoloScore.from_bytes(Beatmap(samples.BEATMAP).to_bytes())
+
+
+class BeatmapTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "beatmaps.tbl")
+        self.beatmaps = [
+            Beatmap(dict(samples.BEATMAP, beatmap_id=str(i), title="map {}".format(i), approved_date=None))
+            for i in (30, 10, 20)]
+        BeatmapTable.build(self.path, self.beatmaps)
+        self.table = BeatmapTable(self.path)
+
+    def tearDown(self):
+        self.table.close()
+        shutil.rmtree(self.dir)
+
+    def test_lookup(self):
+        for beatmap in self.beatmaps:
+            self.assertEqual(dict(self.table[beatmap.beatmap_id]), dict(beatmap))
+        self.assertIsNone(self.table[20].approved_date)
+        self.assertEqual(self.table[20].packs, ["S41", "T120"])
+        self.assertNotIn(15, self.table)
+        self.assertIsNone(self.table.get(40))
+        with self.assertRaises(KeyError):
+            self.table[5]
+
+    def test_iter_sorted(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual([b.title for b in self.table], ["map 10", "map 20", "map 30"])
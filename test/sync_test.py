@@ -0,0 +1,98 @@
+import unittest
+
+from osuapi import OsuApi, endpoints
+from osuapi.sync import MAX_BEST, BestScoreSync
+
+
+def score(score_id, pp, beatmap_id=None):
+    return {"beatmap_id": str(beatmap_id or score_id), "score_id": str(score_id), "score": "1000000", "maxcombo": "500",
+            "count50": "0", "count100": "3", "count300": "400", "countmiss": "0", "countkatu": "2",
+            "countgeki": "80", "perfect": "0", "enabled_mods": "0", "user_id": "124493",
+            "date": "2020-01-01 00:00:00", "rank": "S", "pp": str(pp), "replay_available": "0"}
+
+
+class BestConnector:
+    """Serves a mutable list of best scores, counting the scores sent."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.limits = []
+
+    def close(self):
+        pass
+
+    def process_request(self, endpoint, data, type_, retries=5):
+        assert endpoint == endpoints.USER_BEST
+        self.limits.append(data["limit"])
+        best = sorted(self.scores, key=lambda s: -float(s["pp"]))[:MAX_BEST]
+        return type_(best[:data["limit"]])
+
+
+class BestScoreSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connector = BestConnector([score(i, 1000 - i) for i in range(1, MAX_BEST + 1)])
+        self.sync = BestScoreSync(OsuApi("key", connector=self.connector), probe=5)
+
+    def ids(self, changes):
+        return [s.score_id for s in changes.inserted], changes.removed
+
+    def test_first_sync(self):
+        changes = self.sync.sync(124493)
+        self.assertEqual(len(changes.inserted), MAX_BEST)
+        self.assertEqual(changes.removed, [])
+        self.assertEqual(self.connector.limits, [MAX_BEST])
+        self.assertEqual(self.sync.watermark(124493), 900)
+
+    def test_unchanged(self):
+        self.sync.sync(124493)
+        self.assertEqual(self.ids(self.sync.sync(124493)), ([], []))
+        self.assertEqual(self.connector.limits, [MAX_BEST, 5])
+
+    def test_new_top_score(self):
+        self.sync.sync(124493)
+        self.connector.scores.append(score(500, 997.5))
+        self.assertEqual(self.ids(self.sync.sync(124493)), ([500], [MAX_BEST]))
+        self.assertEqual(self.connector.limits, [MAX_BEST, 5])
+        self.assertEqual(self.ids(self.sync.sync(124493)), ([], []))
+
+    def test_improved_score(self):
+        self.sync.sync(124493)
+        # a better score on the same beatmap replaces the old one
+        self.connector.scores = [s for s in self.connector.scores if s["score_id"] != "30"]
+        self.connector.scores.append(score(501, 995.5, beatmap_id=30))
+        self.assertEqual(self.ids(self.sync.sync(124493)), ([501], [30]))
+        self.assertEqual(self.connector.limits, [MAX_BEST, 5, 20])
+        self.assertEqual(self.ids(self.sync.sync(124493, pp_raw=1.0)), ([], []))
+        self.assertEqual(self.connector.limits[3:], [MAX_BEST])
+
+    def test_deep_change_needs_pp(self):
+        self.sync.sync(124493, pp_raw=10000.0)
+        self.connector.scores.append(score(502, 950.5))
+        self.assertEqual(self.ids(self.sync.sync(124493, pp_raw=10000.0)), ([], []))
+        self.assertEqual(self.ids(self.sync.sync(124493, pp_raw=10001.0)), ([502], [MAX_BEST]))
+        self.assertEqual(self.connector.limits, [MAX_BEST, MAX_BEST])
+
+    def test_top_and_deep_change(self):
+        self.sync.sync(124493, pp_raw=10000.0)
+        self.connector.scores += [score(600, 999.5), score(601, 950.5)]
+        self.assertEqual(self.ids(self.sync.sync(124493, pp_raw=10002.0)), ([600, 601], [99, MAX_BEST]))
+        self.assertEqual(self.sync.dump()["124493"]["score_ids"][-1], 98)
+        self.assertEqual(self.ids(self.sync.sync(124493, pp_raw=10002.0)), ([], []))
+        self.assertEqual(self.ids(self.sync.sync(124493)), ([], []))
+
+    def test_few_scores(self):
+        self.connector.scores = [score(1, 100), score(2, 50)]
+        self.sync.sync("peppy")
+        self.connector.scores.append(score(3, 10))
+        self.assertEqual(self.ids(self.sync.sync("peppy")), ([3], []))
+        self.assertEqual(self.sync.watermark("peppy"), 0.0)
+
+    def test_state(self):
+        self.sync.sync(124493)
+        restored = BestScoreSync(self.sync.api, probe=5, state=self.sync.dump())
+        self.assertIn(124493, restored)
+        self.connector.scores.append(score(503, 999.5))
+        self.assertEqual(self.ids(restored.sync(124493)), ([503], [MAX_BEST]))
+        restored.forget(124493)
+        self.assertNotIn(124493, restored)